@@ -2,10 +2,16 @@ from django.contrib import admin
 from django.contrib.auth.admin import GroupAdmin as BaseGroupAdmin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
 from unfold.admin import ModelAdmin
 from unfold.forms import AdminPasswordChangeForm, UserChangeForm, UserCreationForm
 
-from .models import User, JiraIntegration
+from .jobs import retry_failed
+from .models import User, JiraIntegration, Job, RequestProfile
+from .profiling import hot_functions
 
 admin.site.unregister(Group)
 
@@ -24,23 +30,187 @@ class GroupAdmin(BaseGroupAdmin, ModelAdmin):
 
 @admin.register(JiraIntegration)
 class JiraIntegrationAdmin(ModelAdmin):
-    list_display = ['user', 'site_name', 'site_url', 'is_active', 'is_token_expired', 'created_at']
-    list_filter = ['is_active', 'created_at']
-    search_fields = ['user__username', 'site_name', 'site_url']
-    readonly_fields = ['_access_token', '_refresh_token', 'cloud_id', 'created_at', 'updated_at']
-    
+    list_display = [
+        "user",
+        "site_name",
+        "site_url",
+        "is_active",
+        "is_token_expired",
+        "created_at",
+    ]
+    list_filter = ["is_active", "created_at"]
+    search_fields = ["user__username", "site_name", "site_url"]
+    readonly_fields = [
+        "_access_token",
+        "_refresh_token",
+        "cloud_id",
+        "created_at",
+        "updated_at",
+    ]
+
+    fieldsets = (
+        ("User", {"fields": ("user",)}),
+        ("Jira Instance", {"fields": ("site_name", "site_url", "cloud_id")}),
+        ("Status", {"fields": ("is_active", "last_sync_at")}),
+        (
+            "Timestamps",
+            {"fields": ("created_at", "updated_at"), "classes": ("collapse",)},
+        ),
+    )
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(ModelAdmin):
+    list_display = [
+        "request_id",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "samples",
+        "user",
+        "created_at",
+    ]
+    list_filter = ["method", "status_code", "created_at"]
+    search_fields = ["request_id", "path", "user__username"]
+    readonly_fields = [
+        "request_id",
+        "user",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "interval_ms",
+        "samples",
+        "created_at",
+        "hot_functions",
+        "flame_graph",
+    ]
+
+    fieldsets = (
+        (
+            "Request",
+            {
+                "fields": (
+                    "request_id",
+                    "user",
+                    "method",
+                    "path",
+                    "status_code",
+                    "created_at",
+                )
+            },
+        ),
+        (
+            "Profile",
+            {
+                "fields": (
+                    "duration_ms",
+                    "interval_ms",
+                    "samples",
+                    "flame_graph",
+                    "hot_functions",
+                )
+            },
+        ),
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<path:object_id>/folded/",
+                self.admin_site.admin_view(self.folded_view),
+                name="api_requestprofile_folded",
+            ),
+        ] + super().get_urls()
+
+    def folded_view(self, request, object_id):
+        """The folded stacks as a file for flamegraph.pl, speedscope or inferno"""
+        profile = get_object_or_404(RequestProfile, pk=object_id)
+        response = HttpResponse(
+            profile.folded, content_type="text/plain; charset=utf-8"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="profile-{profile.request_id}.folded"'
+        )
+        return response
+
+    @admin.display(description="Flame graph")
+    def flame_graph(self, obj):
+        url = reverse("admin:api_requestprofile_folded", args=[obj.pk])
+        return format_html(
+            '<a href="{}">Download folded stacks</a> (open in speedscope.app or flamegraph.pl)',
+            url,
+        )
+
+    @admin.display(description="Hot functions (self / total samples)")
+    def hot_functions(self, obj):
+        rows = format_html_join(
+            "\n",
+            "<tr><td>{}</td><td>{}</td><td>{}</td></tr>",
+            hot_functions(obj.folded),
+        )
+        return format_html(
+            "<table><tr><th>Function</th><th>Self</th><th>Total</th></tr>{}</table>",
+            rows,
+        )
+
+
+@admin.register(Job)
+class JobAdmin(ModelAdmin):
+    list_display = [
+        "id",
+        "name",
+        "status",
+        "priority",
+        "attempts",
+        "max_attempts",
+        "run_at",
+        "locked_by",
+        "finished_at",
+    ]
+    list_filter = ["status", "name", "created_at"]
+    search_fields = ["name", "dedup_key", "locked_by"]
+    readonly_fields = [
+        "attempts",
+        "locked_by",
+        "locked_at",
+        "last_error",
+        "created_at",
+        "finished_at",
+    ]
+    actions = ["retry"]
+
     fieldsets = (
-        ('User', {
-            'fields': ('user',)
-        }),
-        ('Jira Instance', {
-            'fields': ('site_name', 'site_url', 'cloud_id')
-        }),
-        ('Status', {
-            'fields': ('is_active', 'last_sync_at')
-        }),
-        ('Timestamps', {
-            'fields': ('created_at', 'updated_at'),
-            'classes': ('collapse',)
-        }),
+        ("Job", {"fields": ("name", "payload", "priority", "dedup_key")}),
+        (
+            "Schedule",
+            {
+                "fields": (
+                    "status",
+                    "run_at",
+                    "attempts",
+                    "max_attempts",
+                    "locked_by",
+                    "locked_at",
+                    "finished_at",
+                )
+            },
+        ),
+        ("Last error", {"fields": ("last_error",), "classes": ("collapse",)}),
+        ("Timestamps", {"fields": ("created_at",), "classes": ("collapse",)}),
     )
+
+    @admin.action(description="Run selected failed jobs again")
+    def retry(self, request, queryset):
+        retried, skipped = retry_failed(queryset)
+        message = f"{retried} job(s) queued again."
+        if skipped:
+            message += f" {skipped} skipped: a job with the same deduplication key is already queued or running."
+        self.message_user(request, message)
@@ -5,8 +5,18 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.http import HttpResponseRedirect
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import views as jwt_views
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+import hmac
+import json
 import logging
 
 from .serializers import (
@@ -22,8 +32,12 @@ from .serializers import (
     JiraProjectSerializer,
 )
 from .models import JiraIntegration
-from .chat_service import ChatService
+from . import metrics
+from .authentication import CachedJWTAuthentication, get_integration
+from .chat_service import AsyncChatService, ChatService
+from .responses import conditional_json_response
 from .services import JiraOAuthService
+from .tasks import schedule_dashboard_warmup
 
 User = get_user_model()
 
@@ -117,12 +131,13 @@ logger = logging.getLogger(__name__)
 
 class JiraIntegrationViewSet(viewsets.GenericViewSet):
     """ViewSet for Jira integration management"""
+
     permission_classes = [IsAuthenticated]
     serializer_class = JiraIntegrationStatusSerializer
-    
+
     def get_queryset(self):
         return JiraIntegration.objects.filter(user=self.request.user)
-    
+
     @extend_schema(
         responses={
             200: JiraIntegrationStatusSerializer,
@@ -133,109 +148,113 @@ class JiraIntegrationViewSet(viewsets.GenericViewSet):
     def status(self, request, *args, **kwargs):
         """Get current Jira integration status for the user"""
         try:
-            integration = JiraIntegration.objects.get(user=request.user)
+            integration = get_integration(request.user, cached=True)
             serializer = JiraIntegrationStatusSerializer(integration)
             return Response(serializer.data)
         except JiraIntegration.DoesNotExist:
             return Response(
                 {"is_connected": False, "message": "No Jira integration found"},
-                status=status.HTTP_404_NOT_FOUND
+                status=status.HTTP_404_NOT_FOUND,
             )
-    
+
     @extend_schema(
         request=None,  # No request body required
         responses={
             200: JiraOAuthInitSerializer,
             400: None,
-        }
+        },
     )
     @action(["post"], detail=False, url_path="connect")
     def connect(self, request, *args, **kwargs):
         """Initiate Jira OAuth flow"""
         try:
-            authorization_url, state = JiraOAuthService.generate_authorization_url(request.user.id)
-            print(f"Generated Jira OAuth authorization URL: {authorization_url}")
-            
+            authorization_url, state = JiraOAuthService.generate_authorization_url(
+                request.user.id
+            )
+            logger.debug(
+                "Generated Jira OAuth authorization URL for user %s", request.user.id
+            )
+
             # Create response data directly since fields are read_only
-            response_data = {
-                'authorization_url': authorization_url,
-                'state': state
-            }
-            
-            print("response data:", response_data)
-            
+            response_data = {"authorization_url": authorization_url, "state": state}
+
             return Response(response_data)
         except Exception as e:
             logger.error(f"Error initiating Jira OAuth: {str(e)}")
             return Response(
                 {"error": "Failed to initiate OAuth flow"},
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_400_BAD_REQUEST,
             )
-    
+
     @extend_schema(
         request=JiraOAuthCallbackSerializer,
         responses={
             200: JiraIntegrationStatusSerializer,
             400: None,
-        }
+        },
     )
     @action(["get"], detail=False, url_path="callback", permission_classes=[AllowAny])
     def callback(self, request, *args, **kwargs):
         """Handle OAuth callback and create integration"""
         # OAuth callbacks come as GET requests with query parameters
-        code = request.GET.get('code')
-        state = request.GET.get('state')
-        
-        print(f"Received callback with code: {code[:20] if code else 'None'}... and state: {state}")
-        
+        code = request.GET.get("code")
+        state = request.GET.get("state")
+
+        logger.debug("Received Jira OAuth callback (code present: %s)", bool(code))
+
         if not code or not state:
             return Response(
                 {"error": "Missing required parameters: code and state"},
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        
+
         # Decode state to get user information
         state_data = JiraOAuthService.decode_state(state)
-        if not state_data or 'user_id' not in state_data:
+        if not state_data or "user_id" not in state_data:
             return Response(
-                {"error": "Invalid state parameter"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"error": "Invalid state parameter"}, status=status.HTTP_400_BAD_REQUEST
             )
-        
+
         try:
             # Get the user from the state
             from django.contrib.auth import get_user_model
+
             User = get_user_model()
-            user = User.objects.get(id=state_data['user_id'])
-            
+            user = User.objects.get(id=state_data["user_id"])
+
             # Exchange code for token
             token_data = JiraOAuthService.exchange_code_for_token(code, state)
-            
+
             # Get accessible resources
-            resources = JiraOAuthService.get_accessible_resources(token_data['access_token'])
-            
+            resources = JiraOAuthService.get_accessible_resources(
+                token_data["access_token"]
+            )
+
             # Create or update integration
             integration = JiraOAuthService.create_or_update_integration(
-                user=user,
-                token_data=token_data,
-                resources=resources
+                user=user, token_data=token_data, resources=resources
             )
-            
+
             # Redirect to frontend integrations page with success message
             from django.http import HttpResponseRedirect
-            return HttpResponseRedirect("http://localhost:3000/integrations?jira_connected=success")
-            
+
+            return HttpResponseRedirect(
+                "http://localhost:3000/integrations?jira_connected=success"
+            )
+
         except User.DoesNotExist:
             return Response(
-                {"error": "User not found"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"error": "User not found"}, status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
             logger.error(f"Error in Jira OAuth callback: {str(e)}")
             # Redirect to frontend integrations page with error message
             from django.http import HttpResponseRedirect
-            return HttpResponseRedirect("http://localhost:3000/integrations?jira_connected=error")
-    
+
+            return HttpResponseRedirect(
+                "http://localhost:3000/integrations?jira_connected=error"
+            )
+
     @extend_schema(
         responses={
             204: None,
@@ -246,18 +265,19 @@ class JiraIntegrationViewSet(viewsets.GenericViewSet):
     def disconnect(self, request, *args, **kwargs):
         """Disconnect Jira integration"""
         success = JiraOAuthService.disconnect_integration(request.user)
-        
+
         if success:
             return Response(status=status.HTTP_204_NO_CONTENT)
         else:
             return Response(
                 {"error": "No integration found to disconnect"},
-                status=status.HTTP_404_NOT_FOUND
+                status=status.HTTP_404_NOT_FOUND,
             )
-    
+
     @extend_schema(
         responses={
             200: JiraProjectSerializer(many=True),
+            304: None,
             400: None,
             404: None,
         }
@@ -266,34 +286,34 @@ class JiraIntegrationViewSet(viewsets.GenericViewSet):
     def projects(self, request, *args, **kwargs):
         """Get projects from user's Jira instance"""
         try:
-            integration = JiraIntegration.objects.get(user=request.user)
-            
+            integration = get_integration(request.user)
+
             if not integration.is_active:
                 return Response(
                     {"error": "Jira integration is not active"},
-                    status=status.HTTP_400_BAD_REQUEST
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
-            
+
             projects = JiraOAuthService.get_projects(integration)
             serializer = JiraProjectSerializer(projects, many=True)
-            
-            return Response(serializer.data)
-            
+
+            return conditional_json_response(request, serializer.data)
+
         except JiraIntegration.DoesNotExist:
             return Response(
-                {"error": "No Jira integration found"},
-                status=status.HTTP_404_NOT_FOUND
+                {"error": "No Jira integration found"}, status=status.HTTP_404_NOT_FOUND
             )
         except Exception as e:
             logger.error(f"Error fetching Jira projects: {str(e)}")
             return Response(
                 {"error": "Failed to fetch projects"},
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_400_BAD_REQUEST,
             )
-    
+
     @extend_schema(
         responses={
             200: None,  # Will define proper serializer later
+            304: None,
             400: None,
             404: None,
         }
@@ -302,35 +322,76 @@ class JiraIntegrationViewSet(viewsets.GenericViewSet):
     def dashboard_data(self, request, *args, **kwargs):
         """Get comprehensive dashboard data from Jira"""
         try:
-            integration = JiraIntegration.objects.get(user=request.user)
-            
+            integration = get_integration(request.user)
+
             if not integration.is_active:
                 return Response(
                     {"error": "Jira integration is not active"},
-                    status=status.HTTP_400_BAD_REQUEST
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
-            
-            dashboard_data = JiraOAuthService.get_dashboard_data(integration)
-            
-            return Response(dashboard_data)
-            
+
+            dashboard_data = JiraOAuthService.get_dashboard_snapshot(
+                integration, refresh=request.query_params.get("refresh") == "1"
+            )
+
+            return conditional_json_response(request, dashboard_data)
+
         except JiraIntegration.DoesNotExist:
             return Response(
-                {"error": "No Jira integration found"},
-                status=status.HTTP_404_NOT_FOUND
+                {"error": "No Jira integration found"}, status=status.HTTP_404_NOT_FOUND
             )
         except Exception as e:
             logger.error(f"Error fetching Jira dashboard data: {str(e)}")
             return Response(
                 {"error": "Failed to fetch dashboard data"},
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+
+class TokenObtainPairView(jwt_views.TokenObtainPairView):
+    """Obtain a JWT pair; queues a warmup of the user's dashboard (see api.tasks)"""
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0]) from e
+
+        self._warm_dashboard(serializer.user)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+    def _warm_dashboard(self, user):
+        try:
+            # Only users with Jira connected have a dashboard to warm
+            if JiraIntegration.objects.filter(user=user, is_active=True).exists():
+                schedule_dashboard_warmup(user)
+        except Exception:
+            # The dashboard loads without the warmup; the login must not fail over it
+            logger.warning(
+                "Could not queue the dashboard warmup of user %s",
+                user.pk,
+                exc_info=True,
             )
 
 
+def build_chat_messages(message, conversation_history):
+    """Build the conversation messages for a chat turn"""
+    messages = []
+    for msg in conversation_history:
+        if msg.get("role") in ["user", "assistant"] and msg.get("content"):
+            messages.append({"role": msg["role"], "content": msg["content"]})
+
+    # Add current message
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
 class ChatViewSet(viewsets.GenericViewSet):
     """ViewSet for AI chat with Jira function calling"""
+
     permission_classes = [IsAuthenticated]
-    
+
     @extend_schema(
         request={
             "application/json": {
@@ -342,14 +403,17 @@ class ChatViewSet(viewsets.GenericViewSet):
                         "items": {
                             "type": "object",
                             "properties": {
-                                "role": {"type": "string", "enum": ["user", "assistant"]},
-                                "content": {"type": "string"}
-                            }
+                                "role": {
+                                    "type": "string",
+                                    "enum": ["user", "assistant"],
+                                },
+                                "content": {"type": "string"},
+                            },
                         },
-                        "description": "Previous conversation messages"
-                    }
+                        "description": "Previous conversation messages",
+                    },
                 },
-                "required": ["message"]
+                "required": ["message"],
             }
         },
         responses={
@@ -357,54 +421,131 @@ class ChatViewSet(viewsets.GenericViewSet):
                 "type": "object",
                 "properties": {
                     "response": {"type": "string"},
-                    "function_calls": {"type": "integer"}
-                }
+                    "function_calls": {"type": "integer"},
+                },
             },
             400: {"type": "object", "properties": {"error": {"type": "string"}}},
-            500: {"type": "object", "properties": {"error": {"type": "string"}}}
+            500: {"type": "object", "properties": {"error": {"type": "string"}}},
         },
-        description="Send a message to the AI assistant with Jira context"
+        description="Send a message to the AI assistant with Jira context",
     )
-    @action(detail=False, methods=['post'], url_path='message')
+    @action(detail=False, methods=["post"], url_path="message")
     def send_message(self, request):
         """Send a message to the AI chat assistant"""
         try:
-            message = request.data.get('message')
-            conversation_history = request.data.get('conversation_history', [])
-            
+            message = request.data.get("message")
+            conversation_history = request.data.get("conversation_history", [])
+
             if not message:
                 return Response(
-                    {"error": "Message is required"},
-                    status=status.HTTP_400_BAD_REQUEST
+                    {"error": "Message is required"}, status=status.HTTP_400_BAD_REQUEST
                 )
-            
-            # Build conversation messages
-            messages = []
-            for msg in conversation_history:
-                if msg.get('role') in ['user', 'assistant'] and msg.get('content'):
-                    messages.append({
-                        "role": msg['role'],
-                        "content": msg['content']
-                    })
-            
-            # Add current message
-            messages.append({
-                "role": "user",
-                "content": message
-            })
-            
+
+            messages = build_chat_messages(message, conversation_history)
+
             # Get chat response
             chat_service = ChatService()
             result = chat_service.chat_with_jira_context(request.user, messages)
-            
-            return Response({
-                "response": result["content"],
-                "function_calls": result["function_calls"]
-            })
-            
+
+            return Response(
+                {
+                    "response": result["content"],
+                    "function_calls": result["function_calls"],
+                }
+            )
+
         except Exception as e:
             logger.error(f"Error in chat service: {str(e)}")
             return Response(
                 {"error": "Failed to process chat message"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncChatView(View):
+    """
+    Async variant of ChatViewSet.send_message, served under ASGI.
+
+    The turn awaits OpenAI and Jira instead of holding a worker thread, so one
+    process can keep many chat turns in flight.
+    """
+
+    http_method_names = ["post"]
+
+    def _authenticate(self, request):
+        try:
+            result = CachedJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        return result[0] if result else None
+
+    async def post(self, request):
+        user = await sync_to_async(self._authenticate)(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse(
+                {"error": "Invalid JSON body"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if not isinstance(data, dict):
+            return JsonResponse(
+                {"error": "Expected a JSON object"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        message = data.get("message")
+        if not message:
+            return JsonResponse(
+                {"error": "Message is required"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            messages = build_chat_messages(
+                message, data.get("conversation_history", [])
+            )
+            result = await AsyncChatService().chat_with_jira_context(user, messages)
+            return JsonResponse(
+                {
+                    "response": result["content"],
+                    "function_calls": result["function_calls"],
+                }
+            )
+        except Exception as e:
+            logger.error(f"Error in async chat service: {str(e)}")
+            return JsonResponse(
+                {"error": "Failed to process chat message"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint with the metrics of this process, or of all
+    processes sharing METRICS_DIR.
+
+    The scraper must send METRICS_TOKEN as a bearer token. Without a token the
+    endpoint is only served when METRICS_PUBLIC is set.
+    """
+
+    http_method_names = ["get"]
+
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        if token:
+            supplied = request.META.get("HTTP_AUTHORIZATION", "").removeprefix(
+                "Bearer "
             )
+            if not hmac.compare_digest(supplied.encode(), token.encode()):
+                return HttpResponse(status=401)
+        elif not settings.METRICS_PUBLIC:
+            return HttpResponse(status=403)
+        return HttpResponse(
+            metrics.exposition(settings.METRICS_DIR or None),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -0,0 +1,90 @@
+import copy
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import TTLCache
+from .models import JiraIntegration
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_MISSING = object()
+
+# Rows are invalidated by api.signals when they change in this process; the
+# TTL bounds how long other processes may serve a stale row
+user_cache = TTLCache("user", settings.AUTH_USER_CACHE_TTL)
+integration_cache = TTLCache("integration", settings.AUTH_INTEGRATION_CACHE_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that serves the user of read-only requests from an
+    in-process cache.
+
+    The token signature and expiry are checked on every request as before;
+    only the users table lookup is skipped while the cached row is fresh.
+    Requests that may write always load the user from the database.
+    """
+
+    def authenticate(self, request):
+        self._safe = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not getattr(self, "_safe", False):
+            user = super().get_user(validated_token)
+            user_cache.set(str(user.pk), user)
+            return user
+        # The claim may hold the id as a string; key the cache by the string form
+        user = user_cache.get(
+            str(validated_token.get(api_settings.USER_ID_CLAIM)), None
+        )
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(str(user.pk), user)
+        # Views may change the user; never hand out the shared instance
+        return copy.copy(user)
+
+
+def _integration(user, active_only: bool, cached) -> JiraIntegration:
+    if cached is None:
+        raise JiraIntegration.DoesNotExist("No Jira integration found")
+    if active_only and not cached.is_active:
+        raise JiraIntegration.DoesNotExist("No active Jira integration found")
+    return copy.copy(cached)
+
+
+def get_integration(
+    user, active_only: bool = False, cached: bool = False
+) -> JiraIntegration:
+    """
+    The user's JiraIntegration; with cached, from the in-process cache when
+    it is fresh.
+
+    The cached copy may be up to AUTH_INTEGRATION_CACHE_TTL seconds old, so
+    only read-only paths that don't use its tokens should ask for it. Raises
+    JiraIntegration.DoesNotExist like JiraIntegration.objects.get; a missing
+    integration is cached too.
+    """
+    cached = integration_cache.get(user.pk, _MISSING) if cached else _MISSING
+    if cached is _MISSING:
+        cached = JiraIntegration.objects.filter(user_id=user.pk).first()
+        integration_cache.set(user.pk, cached)
+    return _integration(user, active_only, cached)
+
+
+async def aget_integration(
+    user, active_only: bool = False, cached: bool = False
+) -> JiraIntegration:
+    """get_integration for async views; a cache hit doesn't leave the event loop"""
+    cached = integration_cache.get(user.pk, _MISSING) if cached else _MISSING
+    if cached is _MISSING:
+        cached = await JiraIntegration.objects.filter(user_id=user.pk).afirst()
+        integration_cache.set(user.pk, cached)
+    return _integration(user, active_only, cached)
+
+
+def invalidate_user(user_id: int | None):
+    user_cache.delete(str(user_id))
+    integration_cache.delete(user_id)
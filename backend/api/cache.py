@@ -0,0 +1,242 @@
+"""
+Two-tier cache for data fetched from Jira.
+
+L1 is a bounded LRU in each process, L2 the shared Django cache
+(settings.CACHES["default"]: a table in the main database, or a directory
+when CACHE_DIR is set), so a result one worker computed is reused by the
+others and survives worker restarts.
+"""
+
+import hashlib
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import deadlines, metrics
+
+cache_lookups = metrics.counter(
+    "cache_lookups_total",
+    "Cache lookups by cache, tier (l1 in-process, l2 shared) and result",
+    ("cache", "tier", "result"),
+)
+cache_fill_seconds = metrics.histogram(
+    "cache_fill_seconds",
+    "Time spent computing values missing from a cache",
+    ("cache", "status"),
+)
+
+_MISSING = object()
+
+# Keys the shared backends accept as they are; others are hashed
+_PLAIN_KEY = re.compile(r"[\w.:@{}-]{1,160}")
+_UNSAFE = re.compile(r"[^\w.:@{}-]")
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 10000):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=_MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                self._entries.move_to_end(key)
+                cache_lookups.inc(cache=self.name, tier="l1", result="hit")
+                return entry[0]
+            self._entries.pop(key, None)
+        cache_lookups.inc(cache=self.name, tier="l1", result="miss")
+        return default
+
+    def set(self, key: Hashable, value, ttl: float | None = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def scope(cloud_id: str | None, user_id: int | None = None) -> str:
+    """Namespace of a Jira site's data, or of one user's view of the site"""
+    return f"site:{cloud_id}" if user_id is None else f"site:{cloud_id}:user:{user_id}"
+
+
+class TieredCache:
+    """
+    Cache of one kind of data (the name), split into scopes (see scope()).
+
+    Lookups go to the process's LRU first, then to the shared backend. Each
+    scope has a version that is part of all its keys: invalidate() replaces
+    it, which drops every entry of the scope at once. Other processes see the
+    new version within CACHE_VERSION_TTL seconds.
+
+    get_or_set() computes a missing value once: threads of a process wait on
+    a per-key lock, and other processes wait while a lock entry in the shared
+    backend says someone is computing it.
+
+    Values are shared between callers in a process and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        l1_ttl: float | None = None,
+        maxsize: int | None = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.l1_ttl = ttl if l1_ttl is None else min(l1_ttl, ttl)
+        self.local = TTLCache(name, self.l1_ttl, maxsize or settings.CACHE_L1_MAXSIZE)
+        self._versions = TTLCache(
+            f"{name}:version", settings.CACHE_VERSION_TTL, settings.CACHE_L1_MAXSIZE
+        )
+        self._fill_locks: dict[str, tuple[threading.Lock, int]] = {}
+        self._fill_locks_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches["default"]
+
+    def version(self, scope: str) -> str:
+        """Current version of the scope's keys"""
+        version = self._versions.get(scope, None)
+        if version is None:
+            key = self._version_key(scope)
+            version = self.shared.get(key)
+            if version is None:
+                # A scope seen for the first time, or whose version was culled:
+                # start from a fresh one so no older entry is served
+                self.shared.add(key, uuid.uuid4().hex[:12], timeout=None)
+                version = self.shared.get(key)
+            self._versions.set(scope, version)
+        return version
+
+    def invalidate(self, scope: str):
+        """Drop every entry of the scope, in all processes"""
+        version = uuid.uuid4().hex[:12]
+        self.shared.set(self._version_key(scope), version, timeout=None)
+        self._versions.set(scope, version)
+
+    def get(self, scope: str, key: str, default=None):
+        full_key = self._key(scope, key)
+        value = self.local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        envelope = self.shared.get(full_key)
+        if envelope is None:
+            cache_lookups.inc(cache=self.name, tier="l2", result="miss")
+            return default
+        cache_lookups.inc(cache=self.name, tier="l2", result="hit")
+        expires_at, value = envelope
+        # Never keep a copy in L1 longer than the entry lives in L2
+        self.local.set(
+            full_key, value, ttl=min(self.l1_ttl, max(0.0, expires_at - time.time()))
+        )
+        return value
+
+    def set(self, scope: str, key: str, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        full_key = self._key(scope, key)
+        self.shared.set(full_key, (time.time() + ttl, value), timeout=ttl)
+        self.local.set(full_key, value, ttl=min(self.l1_ttl, ttl))
+
+    def delete(self, scope: str, key: str):
+        """Drop one entry; other processes may serve their L1 copy for up to l1_ttl"""
+        full_key = self._key(scope, key)
+        self.shared.delete(full_key)
+        self.local.delete(full_key)
+
+    def get_or_set(
+        self, scope: str, key: str, compute: Callable, ttl: float | None = None
+    ):
+        """The cached value, or compute()'s result stored for the next caller"""
+        value = self.get(scope, key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        full_key = self._key(scope, key)
+        with self._fill_lock(full_key):
+            # Another thread may have filled it while this one waited
+            value = self.get(scope, key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            lock_key = f"{full_key}:lock"
+            locked = self.shared.add(lock_key, 1, timeout=settings.CACHE_LOCK_TIMEOUT)
+            if not locked:
+                value = self._wait_for(scope, key, lock_key)
+                if value is not _MISSING:
+                    return value
+                # The other process failed or is too slow; compute it here too
+            try:
+                with metrics.span(cache_fill_seconds, cache=self.name):
+                    value = compute()
+                self.set(scope, key, value, ttl)
+            finally:
+                if locked:
+                    self.shared.delete(lock_key)
+            return value
+
+    def _wait_for(self, scope: str, key: str, lock_key: str):
+        """Poll the shared backend until the holder of lock_key stores the value"""
+        until = time.monotonic() + deadlines.timeout(settings.CACHE_LOCK_WAIT)
+        while time.monotonic() < until:
+            time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+            value = self.get(scope, key, _MISSING)
+            if value is not _MISSING or self.shared.get(lock_key) is None:
+                return value
+        return _MISSING
+
+    @contextmanager
+    def _fill_lock(self, full_key: str):
+        with self._fill_locks_lock:
+            lock, waiters = self._fill_locks.get(full_key, (None, 0))
+            lock = lock or threading.Lock()
+            self._fill_locks[full_key] = (lock, waiters + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._fill_locks_lock:
+                lock, waiters = self._fill_locks[full_key]
+                if waiters == 1:
+                    del self._fill_locks[full_key]
+                else:
+                    self._fill_locks[full_key] = (lock, waiters - 1)
+
+    def _version_key(self, scope: str) -> str:
+        return _plain(f"{self.name}:{scope}:version")
+
+    def _key(self, scope: str, key: str) -> str:
+        return _plain(f"{self.name}:{scope}:{self.version(scope)}:{key}")
+
+
+def _plain(key: str) -> str:
+    if _PLAIN_KEY.fullmatch(key):
+        return key
+    return f"{_UNSAFE.sub('_', key[:80])}:{hashlib.sha1(key.encode()).hexdigest()}"
@@ -0,0 +1,78 @@
+from collections.abc import Iterable
+
+from django.conf import settings
+
+from .cache import TieredCache, scope
+
+projects_cache = TieredCache("projects", settings.JIRA_PROJECT_CATALOG_TTL)
+
+
+class ProjectCatalog:
+    """
+    One user's view of the projects on a Jira site, indexed by key and id.
+
+    Filled from any project listing the user fetches and from single project
+    fetches. Issue totals are kept next to the projects so project details can
+    be answered without a request while both are fresh. Entries live in
+    projects_cache under the user's scope on the site, shared by all workers.
+    """
+
+    def __init__(self, cloud_id: str | None, user_id: int):
+        self.scope = scope(cloud_id, user_id)
+
+    @property
+    def is_fresh(self) -> bool:
+        """Whether the catalog holds a full listing younger than the TTL"""
+        return projects_cache.get(self.scope, "listing") is not None
+
+    def load(self, projects: Iterable[dict]):
+        """Replace the catalog with a full project listing"""
+        entries, keys_by_id = {}, {}
+        for project in projects:
+            if not project.get("key"):
+                continue
+            entries[project["key"]] = project
+            if project.get("id"):
+                keys_by_id[str(project["id"])] = project["key"]
+        projects_cache.set(
+            self.scope, "listing", {"projects": entries, "keys_by_id": keys_by_id}
+        )
+
+    def add(self, project: dict):
+        """Remember a single project fetched on its own"""
+        projects_cache.set(self.scope, f"project:{project['key']}", project)
+        if project.get("id"):
+            projects_cache.set(self.scope, f"id:{project['id']}", project["key"])
+
+    def get(self, key_or_id: str) -> dict | None:
+        """The project with this key or id, if it is known and fresh"""
+        listing = projects_cache.get(self.scope, "listing")
+        if listing is not None:
+            key = (
+                key_or_id
+                if key_or_id in listing["projects"]
+                else listing["keys_by_id"].get(str(key_or_id))
+            )
+            if key is not None:
+                return listing["projects"][key]
+        project = projects_cache.get(self.scope, f"project:{key_or_id}")
+        if project is None:
+            key = projects_cache.get(self.scope, f"id:{key_or_id}")
+            project = projects_cache.get(self.scope, f"project:{key}") if key else None
+        return project
+
+    def total(self, key: str) -> int | None:
+        return projects_cache.get(self.scope, f"total:{key}")
+
+    def set_total(self, key: str, total: int):
+        projects_cache.set(self.scope, f"total:{key}", total)
+
+
+def get_catalog(cloud_id: str | None, user_id: int) -> ProjectCatalog:
+    """The catalog of user_id's projects on the cloud_id site"""
+    return ProjectCatalog(cloud_id, user_id)
+
+
+def invalidate_catalog(cloud_id: str | None, user_id: int):
+    """Forget everything cached about user_id's projects on the site, in all processes"""
+    projects_cache.invalidate(scope(cloud_id, user_id))
@@ -0,0 +1,146 @@
+import re
+
+from . import fastjson
+from .tool_results import decode_table
+
+# Read-only listing tools whose result can be shown to the user as-is, with
+# the user intents (normalized text) they answer
+TEMPLATES = {
+    "get_projects": [
+        r"^(list|show|give|get|what are|which are|display)( me)?( all)? (my |the |our )?projects",
+        r"^(what|which) projects (am i|are we|do i|do we|i am|we are)",
+        r"^(my |all )?projects$",
+    ],
+    "get_user_issues": [
+        r"^(what|which) (issues|tickets|tasks) are assigned to me",
+        r"^(list|show|give|get|display)( me)? (all )?(my|the) (open |assigned )?(issues|tickets|tasks)",
+        r"^(list|show|give|get|display)( me)? (all )?(issues|tickets|tasks) assigned to me",
+        r"^(what|which) (issues|tickets|tasks) (do i have|am i working on)",
+        r"^(what am i working on|my (issues|tickets|tasks))$",
+    ],
+    "get_boards": [
+        r"^(list|show|give|get|what are|which are|display)( me)?( all)? (my |the |our )?boards",
+        r"^(my |all )?boards$",
+    ],
+}
+
+# Anything asking for judgement or analysis goes through the model
+ANALYTICAL_WORDS = re.compile(
+    r"\b(why|how|should|summar\w*|analy\w*|compare|risk\w*|recommend\w*|insight\w*|priorit\w*|explain|trend\w*|blocked|late|overdue)\b"
+)
+
+TEMPLATE_PATTERNS = {
+    function_name: [re.compile(pattern) for pattern in patterns]
+    for function_name, patterns in TEMPLATES.items()
+}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    text = re.sub(r"[^\w\s-]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def matches_template(function_name: str, user_message: str) -> bool:
+    """Whether the user message is a plain listing request answered by function_name"""
+    text = normalize(user_message)
+    if ANALYTICAL_WORDS.search(text):
+        return False
+    return any(
+        pattern.search(text) for pattern in TEMPLATE_PATTERNS.get(function_name, [])
+    )
+
+
+def render_projects(projects: list[dict], total: int | None = None) -> str:
+    if not projects:
+        return "I couldn't find any projects in your Jira instance."
+    if total is not None and total > len(projects):
+        lines = [f"You have {total} projects; here are the first {len(projects)}:", ""]
+    else:
+        lines = [f"Here are your projects ({len(projects)}):", ""]
+    for project in projects:
+        line = f"- **{project['key']}** — {project['name']}"
+        if project.get("lead"):
+            line += f" (lead: {project['lead']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def render_issues(
+    issues: list[dict], status: str | None = None, total: int | None = None
+) -> str:
+    scope = f" with status {status}" if status else ""
+    if not issues:
+        return f"You don't have any issues assigned to you{scope} right now."
+    if total is not None and total > len(issues):
+        lines = [
+            f"You have {total} issues assigned to you{scope}; here are the {len(issues)} most recently updated:",
+            "",
+        ]
+    else:
+        lines = [
+            f"You have {len(issues)} issue{'s' if len(issues) != 1 else ''} assigned to you{scope}:",
+            "",
+        ]
+    for issue in issues:
+        details = [issue["status"]]
+        if issue.get("priority") and issue["priority"] != "None":
+            details.append(f"{issue['priority']} priority")
+        lines.append(
+            f"- **{issue['key']}** {issue['summary']} — {', '.join(details)} ({issue['project']})"
+        )
+    return "\n".join(lines)
+
+
+def render_boards(boards: list[dict]) -> str:
+    if not boards:
+        return "I couldn't find any agile boards."
+    lines = [f"Here are your boards ({len(boards)}):", ""]
+    for board in boards:
+        line = f"- **{board['name']}**"
+        if board.get("type"):
+            line += f" ({board['type']})"
+        if board.get("location"):
+            line += f" — {board['location']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def render_tool_result(function_name: str, arguments: dict, result: str) -> str | None:
+    """
+    Render a listing tool result as the reply to the user.
+
+    Returns None when the result can't be rendered verbatim (errors,
+    summarized results, unsupported tools).
+    """
+    try:
+        payload = fastjson.loads(result)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or "error" in payload or payload.get("truncated"):
+        return None
+
+    if function_name == "get_projects":
+        return render_projects(
+            decode_table(payload.get("projects", {})), payload.get("total")
+        )
+    if function_name == "get_user_issues":
+        status = arguments.get("status")
+        if status == "Done":
+            # get_user_issues treats "Done" as "not done"; let the model word that
+            return None
+        return render_issues(
+            decode_table(payload.get("issues", {})), status, payload.get("total")
+        )
+    if function_name == "get_boards":
+        return render_boards(decode_table(payload.get("boards", {})))
+    return None
+
+
+def render_fast_path(
+    function_name: str, arguments: dict, user_message: str, result: str
+) -> str | None:
+    """Deterministic reply for a listing turn, or None when the model should answer"""
+    if not matches_template(function_name, user_message):
+        return None
+    return render_tool_result(function_name, arguments, result)
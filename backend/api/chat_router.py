@@ -0,0 +1,142 @@
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+
+from . import metrics
+from .chat_formatters import (
+    ANALYTICAL_WORDS,
+    TEMPLATE_PATTERNS,
+    matches_template,
+    normalize,
+)
+
+logger = logging.getLogger(__name__)
+
+route_seconds = metrics.histogram(
+    "chat_route_seconds", "Wall time of chat turns per route", ("route",)
+)
+route_tokens = metrics.counter(
+    "chat_route_tokens_total", "OpenAI tokens used per route", ("route", "kind")
+)
+
+
+@dataclass(frozen=True)
+class Route:
+    """Completion settings and tools used for one class of chat turns"""
+
+    name: str
+    model: str
+    max_tokens: int
+    temperature: float
+    # Names of the tools offered to the model; empty means all of them
+    tools: tuple[str, ...] = ()
+    # Jira reads to start while the first completion runs (see prefetch.PREFETCHES);
+    # only worth it where the first completion nearly always calls a tool
+    prefetch: tuple[str, ...] = ()
+    # Further reads by listing tool, started when the message asks for that listing
+    tool_prefetch: tuple[tuple[str, tuple[str, ...]], ...] = ()
+
+    def select_tools(self, tools: list[dict]) -> list[dict]:
+        if not self.tools:
+            return tools
+        return [tool for tool in tools if tool["function"]["name"] in self.tools]
+
+    def prefetch_for(self, user_message: str) -> tuple[str, ...]:
+        """The Jira reads to start for user_message on this route"""
+        for function_name, reads in self.tool_prefetch:
+            if matches_template(function_name, user_message):
+                return self.prefetch + reads
+        return self.prefetch
+
+
+@lru_cache(maxsize=1)
+def default_routes() -> dict[str, Route]:
+    """The routes by name, built from the settings on first use"""
+    return {
+        # "Show my issues": one listing tool call and a short answer
+        "listing": Route(
+            "listing",
+            model=settings.CHAT_ROUTE_FAST_MODEL,
+            max_tokens=600,
+            temperature=0.2,
+            tools=("get_projects", "get_user_issues", "get_boards", "find_issues"),
+            # The client for any of them, and the one listing the message asks for
+            prefetch=("client",),
+            tool_prefetch=(
+                ("get_projects", ("projects",)),
+                ("get_user_issues", ("user_issues",)),
+            ),
+        ),
+        # "What's the status of DEMO-12?", "find the login bug"
+        "lookup": Route(
+            "lookup",
+            model=settings.CHAT_ROUTE_FAST_MODEL,
+            max_tokens=900,
+            temperature=0.3,
+            tools=(
+                "find_issues",
+                "search_issues",
+                "get_user_issues",
+                "get_project_details",
+            ),
+            prefetch=("client",),
+        ),
+        # Everything else gets the full configuration; these turns are often
+        # answered without Jira, so nothing is loaded ahead
+        "full": Route(
+            "full",
+            model=settings.CHAT_ROUTE_FULL_MODEL,
+            max_tokens=2000,
+            temperature=0.7,
+        ),
+    }
+
+
+_LISTING_PATTERNS = [
+    pattern for patterns in TEMPLATE_PATTERNS.values() for pattern in patterns
+]
+_LOOKUP_PATTERN = re.compile(
+    r"\b([a-z][a-z0-9]+-\d+|status of|find|search|look up|lookup|anything (about|on)|any (issues?|tickets?|bugs?) (about|on|for))\b"
+)
+
+
+def classify(user_message: str) -> str:
+    """Route name for a user message, from keywords and known listing phrasings"""
+    text = normalize(user_message)
+    if ANALYTICAL_WORDS.search(text) or len(text.split()) > 30:
+        return "full"
+    if any(pattern.search(text) for pattern in _LISTING_PATTERNS):
+        return "listing"
+    if _LOOKUP_PATTERN.search(text):
+        return "lookup"
+    return "full"
+
+
+def last_user_message(messages: list[dict]) -> str:
+    return next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+
+
+def route_turn(messages: list[dict]) -> Route:
+    """Pick the route for the latest user message of a conversation"""
+    routes = default_routes()
+    if not settings.CHAT_ROUTER_ENABLED:
+        return routes["full"]
+    route = routes[classify(last_user_message(messages))]
+    logger.info("Chat turn routed to %s (%s)", route.name, route.model)
+    return route
+
+
+def record_usage(route: Route, response) -> None:
+    """Count the tokens a completion made for route used"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    route_tokens.inc(usage.prompt_tokens or 0, route=route.name, kind="prompt")
+    route_tokens.inc(usage.completion_tokens or 0, route=route.name, kind="completion")
+
+
+def record_turn(route: Route, seconds: float) -> None:
+    route_seconds.observe(seconds, route=route.name)
@@ -1,17 +1,184 @@
-import json
+import asyncio
+import logging
 import os
-from typing import List, Dict, Any
-from openai import OpenAI
+import time
+from typing import List, Dict, Any, Optional
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from .services import JiraOAuthService
 from .models import JiraIntegration
+from .authentication import aget_integration, get_integration
+from .transport import async_client
+from .tool_results import FORMAT_HINT, compact_tool_result
+from .chat_formatters import render_fast_path, render_tool_result
+from .intents import Intent, match_intent
+from .search_index import get_store
+from .catalog import ProjectCatalog, get_catalog
+from .chat_router import Route, last_user_message, record_turn, record_usage, route_turn
+from .prefetch import (
+    DEFAULT_ISSUE_LIMIT,
+    ISSUE_FIELDS,
+    AsyncJiraPrefetch,
+    JiraPrefetch,
+    prefetched,
+    user_issues_jql,
+)
+from . import deadlines, fastjson, metrics, site_metadata, tracing
+from .instrumentation import completion_call
+
+logger = logging.getLogger(__name__)
+
+# path: "intent" (answered without OpenAI), "direct" (no tools), "fast_path"
+# (tool result rendered locally), "llm" (second completion), "timeout" or "error"
+chat_turns = metrics.counter(
+    "chat_turns_total", "Chat turns by how they were answered", ("path",)
+)
+
+
+def fast_path_ratio() -> float:
+    """Fraction of tool-using chat turns answered via the fast path"""
+    fast = chat_turns.value(path="fast_path")
+    total = fast + chat_turns.value(path="llm")
+    return fast / total if total else 0.0
+
+
+SYSTEM_PROMPT = (
+    """You are Ask Pulse, an AI assistant for project management and Jira analytics. You help users understand their projects, track issues, and get insights from their Jira data.
+
+You have access to the following Jira functions:
+- get_projects: Get all projects in user's Jira instance
+- get_user_issues: Get issues assigned to the current user (can filter by status)
+- search_issues: Search issues using JQL queries
+- find_issues: Find issues by free text in a fast local index (prefer it for vague "anything about X?" questions)
+- get_project_details: Get detailed info about a specific project
+- get_boards: Get agile boards (can filter by project)
+
+When users ask about their work, projects, or issues, use these functions to provide accurate, up-to-date information. Always be helpful and provide actionable insights.
+
+Some example queries you can help with:
+- "What issues are assigned to me?"
+- "Show me projects I'm working on"
+- "Find all high priority bugs"
+- "What's the status of project XYZ?"
+- "Show me all issues in progress"
+
+Be conversational and provide context with your responses. If you need to use JQL for searches, explain what you're doing.
+
+"""
+    + FORMAT_HINT
+)
+
+# Issues loaded to seed an empty local index before the first find_issues
+INDEX_SEED_LIMIT = 100
+
+NO_INTEGRATION_ERROR = fastjson.dumps(
+    {"error": "No Jira integration found. Please connect your Jira account first."}
+)
+
+TIMEOUT_REPLY = "Sorry, that took too long to answer. Please try again in a moment."
+
+
+def _timed_out_result(function_name: str) -> str:
+    return fastjson.dumps(
+        {
+            "error": f"{function_name} was cancelled because it did not finish in time. "
+            "Answer with the other results and say that this part is missing.",
+            "timed_out": True,
+        }
+    )
+
+
+def _tool_result(function_name: str, result: str) -> str:
+    """result, or a timed out marker when it failed because the tool budget ran out"""
+    if deadlines.expired() and "error" in fastjson.loads(result):
+        return _timed_out_result(function_name)
+    return result
+
+
+def _timeout_errors() -> tuple:
+    """Errors that end a turn with TIMEOUT_REPLY"""
+    # The openai SDK costs about half a second to import, so it is only loaded
+    # once a chat client is created; by the time a turn fails it is loaded
+    from openai import APITimeoutError
+
+    return (deadlines.DeadlineExceeded, APITimeoutError)
+
+
+def _completion_timeout() -> float:
+    return deadlines.timeout(settings.OPENAI_TIMEOUT)
+
+
+def _project_list(projects) -> List[Dict]:
+    """Normalize the different project list formats returned by the Jira clients"""
+    if isinstance(projects, dict) and "values" in projects:
+        return projects["values"]
+    return projects if isinstance(projects, list) else []
+
+
+def _is_not_found(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 404
+
+
+def _project_record(project: Dict) -> Dict:
+    return {
+        "key": project.get("key"),
+        "name": project.get("name"),
+        "description": project.get("description", ""),
+        "projectTypeKey": project.get("projectTypeKey"),
+        "lead": project.get("lead", {}).get("displayName")
+        if project.get("lead")
+        else None,
+    }
+
+
+def _issue_record(issue: Dict, with_assignee: bool = False) -> Dict:
+    fields = issue["fields"]
+    record = {
+        "key": issue["key"],
+        "summary": fields["summary"],
+        "status": fields["status"]["name"],
+        "priority": fields["priority"]["name"] if fields.get("priority") else "None",
+        "project": fields["project"]["name"],
+    }
+    if with_assignee:
+        record["assignee"] = (
+            fields["assignee"]["displayName"]
+            if fields.get("assignee")
+            else "Unassigned"
+        )
+    record["updated"] = fields["updated"]
+    return record
+
+
+def _board_record(board: Dict) -> Dict:
+    return {
+        "id": board.get("id"),
+        "name": board.get("name"),
+        "type": board.get("type"),
+        "location": board.get("location", {}).get("displayName")
+        if board.get("location")
+        else None,
+    }
 
 
 class ChatService:
     """Service for handling OpenAI chat with Jira function calls"""
-    
+
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = self.create_client()
+        self.tool_result_budget = settings.CHAT_TOOL_RESULT_BUDGET
+        self.fast_path_enabled = settings.CHAT_FAST_PATH_ENABLED
+        self.prefetch_enabled = settings.CHAT_PREFETCH_ENABLED
+        self.local_intents_enabled = settings.CHAT_LOCAL_INTENTS_ENABLED
+        self.local_intent_threshold = settings.CHAT_LOCAL_INTENT_THRESHOLD
+        self.deadline = settings.CHAT_DEADLINE
+        self.answer_reserve = settings.CHAT_ANSWER_RESERVE
+
+    def create_client(self):
+        from openai import OpenAI
+
+        return OpenAI(api_key=settings.OPENAI_API_KEY)
 
     def get_jira_tools(self) -> List[Dict]:
         """Define function tools for Jira integration"""
@@ -25,10 +192,10 @@ class ChatService:
                         "type": "object",
                         "properties": {},
                         "required": [],
-                        "additionalProperties": False
+                        "additionalProperties": False,
                     },
-                    "strict": True
-                }
+                    "strict": True,
+                },
             },
             {
                 "type": "function",
@@ -41,20 +208,20 @@ class ChatService:
                             "status": {
                                 "type": ["string", "null"],
                                 "description": "Filter by status (e.g., 'In Progress', 'Done', 'To Do')",
-                                "enum": ["To Do", "In Progress", "Done", None]
+                                "enum": ["To Do", "In Progress", "Done", None],
                             },
                             "limit": {
                                 "type": ["integer", "null"],
                                 "description": "Maximum number of issues to return (default: 20)",
                                 "minimum": 1,
-                                "maximum": 100
-                            }
+                                "maximum": 100,
+                            },
                         },
                         "required": ["status", "limit"],
-                        "additionalProperties": False
+                        "additionalProperties": False,
                     },
-                    "strict": True
-                }
+                    "strict": True,
+                },
             },
             {
                 "type": "function",
@@ -66,20 +233,45 @@ class ChatService:
                         "properties": {
                             "jql": {
                                 "type": "string",
-                                "description": "JQL query string (e.g., 'project = MYPROJ AND status = \"In Progress\"')"
+                                "description": "JQL query string (e.g., 'project = MYPROJ AND status = \"In Progress\"')",
                             },
                             "limit": {
                                 "type": ["integer", "null"],
                                 "description": "Maximum number of issues to return (default: 20)",
                                 "minimum": 1,
-                                "maximum": 50
-                            }
+                                "maximum": 50,
+                            },
                         },
                         "required": ["jql", "limit"],
-                        "additionalProperties": False
+                        "additionalProperties": False,
                     },
-                    "strict": True
-                }
+                    "strict": True,
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "find_issues",
+                    "description": "Find issues by free text (words from the summary, labels, components or an issue key) in a fast local index of the issues synced from Jira. Use for questions like 'anything about the login bug?'; use search_issues for exact filters.",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "query": {
+                                "type": "string",
+                                "description": "Free text to look for (e.g., 'login bug', 'billing export')",
+                            },
+                            "limit": {
+                                "type": ["integer", "null"],
+                                "description": "Maximum number of issues to return (default: 10)",
+                                "minimum": 1,
+                                "maximum": 50,
+                            },
+                        },
+                        "required": ["query", "limit"],
+                        "additionalProperties": False,
+                    },
+                    "strict": True,
+                },
             },
             {
                 "type": "function",
@@ -91,14 +283,14 @@ class ChatService:
                         "properties": {
                             "project_key": {
                                 "type": "string",
-                                "description": "The project key (e.g., 'MYPROJ', 'DEMO')"
+                                "description": "The project key (e.g., 'MYPROJ', 'DEMO')",
                             }
                         },
                         "required": ["project_key"],
-                        "additionalProperties": False
+                        "additionalProperties": False,
                     },
-                    "strict": True
-                }
+                    "strict": True,
+                },
             },
             {
                 "type": "function",
@@ -110,254 +302,732 @@ class ChatService:
                         "properties": {
                             "project_key": {
                                 "type": ["string", "null"],
-                                "description": "Project key to filter boards (optional)"
+                                "description": "Project key to filter boards (optional)",
                             }
                         },
                         "required": ["project_key"],
-                        "additionalProperties": False
+                        "additionalProperties": False,
                     },
-                    "strict": True
-                }
-            }
+                    "strict": True,
+                },
+            },
         ]
-    
-    def execute_jira_function(self, user, function_name: str, arguments: Dict) -> str:
-        """Execute a Jira function call"""
+
+    def execute_jira_function(
+        self,
+        user,
+        function_name: str,
+        arguments: Dict,
+        prefetch: Optional[JiraPrefetch] = None,
+    ) -> str:
+        """Execute a Jira function call, using prefetched data where it matches"""
         try:
-            # Get user's Jira integration
-            integration = JiraIntegration.objects.get(user=user, is_active=True)
-            jira = JiraOAuthService.get_jira_client(integration)
-            
+            if prefetch is not None:
+                jira = prefetch.client()
+            else:
+                # Get user's Jira integration
+                integration = get_integration(user, active_only=True)
+                jira = JiraOAuthService.get_jira_client(integration)
+
             if function_name == "get_projects":
-                projects = jira.projects()
-                # Handle different project data formats
-                if isinstance(projects, dict) and 'values' in projects:
-                    project_list = projects['values']
-                else:
-                    project_list = projects if isinstance(projects, list) else []
-                
-                result = []
-                for project in project_list[:10]:  # Limit to 10 projects
-                    result.append({
-                        "key": project.get("key"),
-                        "name": project.get("name"),
-                        "description": project.get("description", ""),
-                        "projectTypeKey": project.get("projectTypeKey"),
-                        "lead": project.get("lead", {}).get("displayName") if project.get("lead") else None
-                    })
-                return json.dumps({"projects": result})
-            
+                projects = prefetched(prefetch, "projects", jira.projects)
+                self._catalog(jira, user).load(_project_list(projects))
+                return self._projects_result(projects)
+
             elif function_name == "get_user_issues":
-                current_user = jira.myself()
-                status_filter = f' AND status != "{arguments["status"]}"' if arguments.get("status") == "Done" else f' AND status = "{arguments["status"]}"' if arguments.get("status") else ""
-                limit = arguments.get("limit", 20)
-                
-                jql = f'assignee = "{current_user["emailAddress"]}"{status_filter} ORDER BY updated DESC'
-                issues = jira.jql(jql, limit=limit)
-                
-                result = []
-                for issue in issues["issues"]:
-                    result.append({
-                        "key": issue["key"],
-                        "summary": issue["fields"]["summary"],
-                        "status": issue["fields"]["status"]["name"],
-                        "priority": issue["fields"]["priority"]["name"] if issue["fields"].get("priority") else "None",
-                        "project": issue["fields"]["project"]["name"],
-                        "updated": issue["fields"]["updated"]
-                    })
-                return json.dumps({"issues": result})
-            
+                status = arguments.get("status")
+                limit = arguments.get("limit") or DEFAULT_ISSUE_LIMIT
+                current_user = prefetched(prefetch, "myself", jira.myself)
+
+                def fetch():
+                    return jira.jql(
+                        user_issues_jql(current_user, status),
+                        limit=limit,
+                        fields=ISSUE_FIELDS,
+                    )
+
+                if status is None and limit == DEFAULT_ISSUE_LIMIT:
+                    issues = prefetched(prefetch, "user_issues", fetch)
+                else:
+                    issues = fetch()
+                self._index_issues(jira, user, issues)
+                return self._issues_result(issues, with_total=True)
+
             elif function_name == "search_issues":
-                jql = arguments["jql"]
-                limit = arguments.get("limit", 20)
-                
-                issues = jira.jql(jql, limit=limit)
-                
-                result = []
-                for issue in issues["issues"]:
-                    result.append({
-                        "key": issue["key"],
-                        "summary": issue["fields"]["summary"],
-                        "status": issue["fields"]["status"]["name"],
-                        "priority": issue["fields"]["priority"]["name"] if issue["fields"].get("priority") else "None",
-                        "project": issue["fields"]["project"]["name"],
-                        "assignee": issue["fields"]["assignee"]["displayName"] if issue["fields"].get("assignee") else "Unassigned",
-                        "updated": issue["fields"]["updated"]
-                    })
-                return json.dumps({"issues": result, "total": issues.get("total", len(result))})
-            
+                limit = arguments.get("limit") or DEFAULT_ISSUE_LIMIT
+                issues = jira.jql(arguments["jql"], limit=limit, fields=ISSUE_FIELDS)
+                self._index_issues(jira, user, issues)
+                return self._issues_result(issues, with_assignee=True, with_total=True)
+
+            elif function_name == "find_issues":
+                if not self._index_size(jira, user):
+                    self._index_issues(
+                        jira,
+                        user,
+                        jira.jql(
+                            "ORDER BY updated DESC",
+                            limit=INDEX_SEED_LIMIT,
+                            fields=ISSUE_FIELDS,
+                        ),
+                    )
+                return self._found_issues_result(jira, user, arguments)
+
             elif function_name == "get_project_details":
                 project_key = arguments["project_key"]
-                
-                # Get project info
-                projects = jira.projects()
-                project_list = projects['values'] if isinstance(projects, dict) and 'values' in projects else projects
-                
-                project = None
-                for p in project_list:
-                    if p.get("key") == project_key:
-                        project = p
-                        break
-                
-                if not project:
-                    return json.dumps({"error": f"Project {project_key} not found"})
-                
+                catalog = self._catalog(jira, user, prefetch)
+                project = catalog.get(project_key)
+                if project is None:
+                    try:
+                        project = jira.project(project_key)
+                    except Exception as e:
+                        if _is_not_found(e):
+                            return fastjson.dumps(
+                                {"error": f"Project {project_key} not found"}
+                            )
+                        raise
+                    catalog.add(project)
+
                 # Get issues count for project
-                try:
-                    issues = jira.jql(f'project = {project_key}', limit=1)
-                    total_issues = issues.get("total", 0)
-                except:
-                    total_issues = 0
-                
-                result = {
-                    "key": project.get("key"),
-                    "name": project.get("name"),
-                    "description": project.get("description", ""),
-                    "projectTypeKey": project.get("projectTypeKey"),
-                    "lead": project.get("lead", {}).get("displayName") if project.get("lead") else None,
-                    "total_issues": total_issues
-                }
-                return json.dumps({"project": result})
-            
+                total_issues = catalog.total(project["key"])
+                if total_issues is None:
+                    try:
+                        total_issues = jira.jql(
+                            f'project = "{project["key"]}"', limit=0, fields="key"
+                        ).get("total", 0)
+                        catalog.set_total(project["key"], total_issues)
+                    except Exception:
+                        total_issues = 0
+                return self._project_details_result(project, total_issues)
+
             elif function_name == "get_boards":
                 project_key = arguments.get("project_key")
-                
+
                 try:
-                    boards = jira.boards(projectKeyOrId=project_key) if project_key else jira.boards()
-                    
-                    result = []
-                    board_list = boards.get('values', []) if isinstance(boards, dict) else boards
-                    
-                    for board in board_list[:10]:  # Limit to 10 boards
-                        result.append({
-                            "id": board.get("id"),
-                            "name": board.get("name"),
-                            "type": board.get("type"),
-                            "location": board.get("location", {}).get("displayName") if board.get("location") else None
-                        })
-                    
-                    return json.dumps({"boards": result})
+                    if project_key and self._can_see_project(
+                        jira, user, project_key, prefetch
+                    ):
+                        boards = site_metadata.boards(jira, project_key)
+                    else:
+                        boards = (
+                            jira.boards(projectKeyOrId=project_key)
+                            if project_key
+                            else jira.boards()
+                        )
+                    return self._boards_result(boards)
                 except Exception as e:
-                    return json.dumps({"error": f"Could not fetch boards: {str(e)}"})
-            
+                    return fastjson.dumps(
+                        {"error": f"Could not fetch boards: {str(e)}"}
+                    )
+
             else:
-                return json.dumps({"error": f"Unknown function: {function_name}"})
-                
+                return fastjson.dumps({"error": f"Unknown function: {function_name}"})
+
         except JiraIntegration.DoesNotExist:
-            return json.dumps({"error": "No Jira integration found. Please connect your Jira account first."})
+            return NO_INTEGRATION_ERROR
         except Exception as e:
-            return json.dumps({"error": f"Error executing {function_name}: {str(e)}"})
-    
+            return fastjson.dumps(
+                {"error": f"Error executing {function_name}: {str(e)}"}
+            )
+
+    def _projects_result(self, projects) -> str:
+        projects = _project_list(projects)
+        result = [
+            _project_record(project) for project in projects[:10]
+        ]  # Limit to 10 projects
+        return compact_tool_result(
+            {"projects": result, "total": len(projects)}, self.tool_result_budget
+        )
+
+    def _issues_result(
+        self, issues: Dict, with_assignee: bool = False, with_total: bool = False
+    ) -> str:
+        result = [_issue_record(issue, with_assignee) for issue in issues["issues"]]
+        payload = {"issues": result}
+        if with_total:
+            payload["total"] = issues.get("total", len(result))
+        return compact_tool_result(payload, self.tool_result_budget)
+
+    def _index_issues(self, jira, user, issues: Dict):
+        """Feed issues Jira returned to the user into their local search index for the site"""
+        get_store().index_issues(
+            getattr(jira, "cloud_id", None), user.pk, issues.get("issues", [])
+        )
+
+    def _index_size(self, jira, user) -> int:
+        cloud_id = getattr(jira, "cloud_id", None)
+        return len(get_store().get(cloud_id, user.pk)) if cloud_id else 0
+
+    def _found_issues_result(self, jira, user, arguments: Dict) -> str:
+        index = get_store().get(jira.cloud_id, user.pk)
+        matches = index.search(arguments["query"], limit=arguments.get("limit") or 10)
+        result = [
+            {
+                "key": document["key"],
+                "summary": document["summary"],
+                "status": document["status"],
+                "priority": document["priority"] or "None",
+                "project": document["project"],
+                "updated": document["updated"],
+                "score": round(score, 2),
+            }
+            for score, document in matches
+        ]
+        return compact_tool_result(
+            {"issues": result, "indexed": len(index)}, self.tool_result_budget
+        )
+
+    def _catalog(self, jira, user, prefetch=None) -> ProjectCatalog:
+        """The user's project catalog for the site, filled from the prefetch when it is stale"""
+        catalog = get_catalog(getattr(jira, "cloud_id", None), user.pk)
+        if prefetch is not None and not catalog.is_fresh:
+            projects = prefetch.peek("projects")
+            if projects is not None:
+                catalog.load(_project_list(projects))
+        return catalog
+
+    def _can_see_project(self, jira, user, project_key: str, prefetch=None) -> bool:
+        """Whether the project is in the user's own (permission-filtered) catalog, so site-wide data about it may be shared"""
+        return self._catalog(jira, user, prefetch).get(project_key) is not None
+
+    def _project_details_result(self, project: Dict, total_issues: int) -> str:
+        result = _project_record(project)
+        result["total_issues"] = total_issues
+        return compact_tool_result({"project": result}, self.tool_result_budget)
+
+    def _boards_result(self, boards) -> str:
+        board_list = boards.get("values", []) if isinstance(boards, dict) else boards
+        result = [
+            _board_record(board) for board in board_list[:10]
+        ]  # Limit to 10 boards
+        return compact_tool_result({"boards": result}, self.tool_result_budget)
+
+    def build_messages(self, messages: List[Dict]) -> List[Dict]:
+        """Prepend the system prompt with Jira context to the conversation"""
+        return [{"role": "system", "content": SYSTEM_PROMPT}] + messages
+
     def chat_with_jira_context(self, user, messages: List[Dict], stream: bool = False):
         """Handle chat with Jira function calling capability"""
-        
-        # Add system prompt with Jira context
-        system_message = {
-            "role": "system",
-            "content": """You are Ask Pulse, an AI assistant for project management and Jira analytics. You help users understand their projects, track issues, and get insights from their Jira data.
+        # Every OpenAI and Jira call of the turn takes its timeout from this deadline
+        with (
+            deadlines.deadline(self.deadline),
+            tracing.span("chat.turn", stream=stream),
+        ):
+            return self._chat_turn(user, messages, stream)
 
-You have access to the following Jira functions:
-- get_projects: Get all projects in user's Jira instance
-- get_user_issues: Get issues assigned to the current user (can filter by status)
-- search_issues: Search issues using JQL queries
-- get_project_details: Get detailed info about a specific project
-- get_boards: Get agile boards (can filter by project)
+    def _chat_turn(self, user, messages: List[Dict], stream: bool):
+        intent = self._local_intent(messages)
+        if intent is not None:
+            with (
+                deadlines.reserve(self.answer_reserve),
+                tracing.span("chat.tool", function=intent.function_name, intent=True),
+            ):
+                result = self.execute_jira_function(
+                    user, intent.function_name, intent.arguments
+                )
+            reply = self._intent_reply(intent, result)
+            if reply is not None:
+                return reply
 
-When users ask about their work, projects, or issues, use these functions to provide accurate, up-to-date information. Always be helpful and provide actionable insights.
+        chat_messages = self.build_messages(messages)
 
-Some example queries you can help with:
-- "What issues are assigned to me?"
-- "Show me projects I'm working on"
-- "Find all high priority bugs"
-- "What's the status of project XYZ?"
-- "Show me all issues in progress"
+        # Pick model, limits and Jira function tools for this kind of turn
+        route = route_turn(messages)
+        tools = route.select_tools(self.get_jira_tools())
+
+        started = time.monotonic()
+        try:
+            if stream:
+                return self._handle_streaming_chat(user, chat_messages, tools, route)
+            else:
+                return self._handle_regular_chat(user, chat_messages, tools, route)
+        finally:
+            record_turn(route, time.monotonic() - started)
+
+    def _local_intent(self, messages: List[Dict]) -> Optional[Intent]:
+        """Listing function answering the turn on its own, if the intent matcher is sure of one"""
+        if not self.local_intents_enabled:
+            return None
+        return match_intent(last_user_message(messages), self.local_intent_threshold)
+
+    def _intent_reply(self, intent: Intent, result: str) -> Optional[Dict]:
+        """Reply rendered from the intent's Jira result, or None to ask the model after all"""
+        reply = render_tool_result(intent.function_name, intent.arguments, result)
+        if reply is None:
+            return None
+        chat_turns.inc(path="intent")
+        logger.info(
+            "Chat turn answered locally (%s, confidence %.2f)",
+            intent.function_name,
+            intent.confidence,
+        )
+        return {"content": reply, "function_calls": 1}
+
+    def _call_tool(
+        self, user, function_name: str, arguments: Dict, prefetch=None
+    ) -> str:
+        """Run one tool call in the time left for tools, leaving the rest for the answer"""
+        with (
+            deadlines.reserve(self.answer_reserve),
+            tracing.span("chat.tool", function=function_name),
+        ):
+            if deadlines.expired():
+                return _timed_out_result(function_name)
+            return _tool_result(
+                function_name,
+                self.execute_jira_function(user, function_name, arguments, prefetch),
+            )
 
-Be conversational and provide context with your responses. If you need to use JQL for searches, explain what you're doing."""
+    def _assistant_message(self, message) -> Dict:
+        """Assistant message with tool calls, as it is added back to the conversation"""
+        return {
+            "role": "assistant",
+            "content": message.content,
+            "tool_calls": [
+                {
+                    "id": tc.id,
+                    "type": "function",
+                    "function": {
+                        "name": tc.function.name,
+                        "arguments": tc.function.arguments,
+                    },
+                }
+                for tc in message.tool_calls
+            ],
         }
-        
-        # Prepare messages with system prompt
-        chat_messages = [system_message] + messages
-        
-        # Get Jira function tools
-        tools = self.get_jira_tools()
-        
-        if stream:
-            return self._handle_streaming_chat(user, chat_messages, tools)
-        else:
-            return self._handle_regular_chat(user, chat_messages, tools)
-    
-    def _handle_regular_chat(self, user, messages, tools):
+
+    def _fast_path_reply(
+        self, messages: List[Dict], tool_calls, results: List[str]
+    ) -> Optional[str]:
+        """Reply rendered from a single listing tool result, skipping the second completion"""
+        if not self.fast_path_enabled or len(tool_calls) != 1:
+            return None
+        user_message = last_user_message(messages)
+        tool_call = tool_calls[0]
+        reply = render_fast_path(
+            tool_call.function.name,
+            fastjson.loads(tool_call.function.arguments),
+            user_message,
+            results[0],
+        )
+        if reply is not None:
+            logger.info(
+                "Chat turn answered via fast path (%s), fast path ratio %.2f",
+                tool_call.function.name,
+                fast_path_ratio(),
+            )
+        return reply
+
+    def _handle_regular_chat(self, user, messages, tools, route: Route):
         """Handle non-streaming chat"""
+        # Warm the Jira data the route's tool calls usually need while the model is thinking
+        reads = (
+            route.prefetch_for(last_user_message(messages))
+            if self.prefetch_enabled
+            else ()
+        )
+        prefetch = JiraPrefetch(user).start(reads) if reads else None
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                tools=tools,
-                tool_choice="auto",
-                temperature=0.7,
-                max_tokens=2000
-            )
-            
+            with completion_call(route.model):
+                response = self.client.chat.completions.create(
+                    model=route.model,
+                    messages=messages,
+                    tools=tools,
+                    tool_choice="auto",
+                    temperature=route.temperature,
+                    max_tokens=route.max_tokens,
+                    timeout=_completion_timeout(),
+                )
+            record_usage(route, response)
+
             message = response.choices[0].message
-            
+
             # Handle function calls
             if message.tool_calls:
                 # Add assistant's message with tool calls to conversation
-                messages.append({
-                    "role": "assistant",
-                    "content": message.content,
-                    "tool_calls": [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.function.name,
-                                "arguments": tc.function.arguments
-                            }
-                        } for tc in message.tool_calls
-                    ]
-                })
-                
+                messages.append(self._assistant_message(message))
+
                 # Execute function calls
+                results = []
                 for tool_call in message.tool_calls:
                     function_name = tool_call.function.name
-                    arguments = json.loads(tool_call.function.arguments)
-                    
-                    result = self.execute_jira_function(user, function_name, arguments)
-                    
+                    arguments = fastjson.loads(tool_call.function.arguments)
+
+                    result = self._call_tool(user, function_name, arguments, prefetch)
+                    results.append(result)
+
                     # Add function result to conversation
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": result
-                    })
-                
+                    messages.append(
+                        {
+                            "role": "tool",
+                            "tool_call_id": tool_call.id,
+                            "content": result,
+                        }
+                    )
+
+                reply = self._fast_path_reply(messages, message.tool_calls, results)
+                if reply is not None:
+                    chat_turns.inc(path="fast_path")
+                    return {"content": reply, "function_calls": len(message.tool_calls)}
+
                 # Get final response with function results
-                final_response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=messages,
-                    tools=tools,
-                    temperature=0.7,
-                    max_tokens=2000
-                )
-                
+                with completion_call(route.model):
+                    final_response = self.client.chat.completions.create(
+                        model=route.model,
+                        messages=messages,
+                        tools=tools,
+                        temperature=route.temperature,
+                        max_tokens=route.max_tokens,
+                        timeout=_completion_timeout(),
+                    )
+                record_usage(route, final_response)
+
+                chat_turns.inc(path="llm")
                 return {
                     "content": final_response.choices[0].message.content,
-                    "function_calls": len(message.tool_calls)
+                    "function_calls": len(message.tool_calls),
                 }
             else:
-                return {
-                    "content": message.content,
-                    "function_calls": 0
-                }
-                
+                chat_turns.inc(path="direct")
+                return {"content": message.content, "function_calls": 0}
+
+        except _timeout_errors():
+            chat_turns.inc(path="timeout")
+            return {"content": TIMEOUT_REPLY, "function_calls": 0}
         except Exception as e:
+            chat_turns.inc(path="error")
             return {
                 "content": f"Sorry, I encountered an error: {str(e)}",
-                "function_calls": 0
+                "function_calls": 0,
             }
-    
-    def _handle_streaming_chat(self, user, messages, tools):
+        finally:
+            if prefetch is not None:
+                prefetch.cancel()
+
+    def _handle_streaming_chat(self, user, messages, tools, route: Route):
         """Handle streaming chat (to be implemented)"""
         # For now, fall back to regular chat
-        return self._handle_regular_chat(user, messages, tools)
\ No newline at end of file
+        return self._handle_regular_chat(user, messages, tools, route)
+
+
+class AsyncChatService(ChatService):
+    """
+    Non-blocking variant of ChatService for async views under ASGI.
+
+    Uses AsyncOpenAI and AsyncOAuthJira, so a chat turn only holds the event
+    loop while it is doing work, not while it waits on OpenAI or Jira. Tool
+    calls of one turn run concurrently over a shared HTTP client.
+    """
+
+    def create_client(self):
+        # Opened per turn by chat_with_jira_context, which closes it again
+        return None
+
+    def _openai_client(self):
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+
+    async def aexecute_jira_function(
+        self,
+        user,
+        jira,
+        function_name: str,
+        arguments: Dict,
+        prefetch: Optional[AsyncJiraPrefetch] = None,
+    ) -> str:
+        """Execute a Jira function call with an AsyncOAuthJira client"""
+        try:
+            if function_name == "get_projects":
+                projects = await prefetched(prefetch, "projects", jira.projects)
+                # The catalog's shared tier is a database table
+                await sync_to_async(self._catalog(jira, user).load)(
+                    _project_list(projects)
+                )
+                return self._projects_result(projects)
+
+            elif function_name == "get_user_issues":
+                status = arguments.get("status")
+                limit = arguments.get("limit") or DEFAULT_ISSUE_LIMIT
+                current_user = await prefetched(prefetch, "myself", jira.myself)
+
+                def fetch():
+                    return jira.jql(
+                        user_issues_jql(current_user, status),
+                        limit=limit,
+                        fields=ISSUE_FIELDS,
+                    )
+
+                if status is None and limit == DEFAULT_ISSUE_LIMIT:
+                    issues = await prefetched(prefetch, "user_issues", fetch)
+                else:
+                    issues = await fetch()
+                await sync_to_async(self._index_issues, thread_sensitive=False)(
+                    jira, user, issues
+                )
+                return self._issues_result(issues, with_total=True)
+
+            elif function_name == "search_issues":
+                limit = arguments.get("limit") or DEFAULT_ISSUE_LIMIT
+                issues = await jira.jql(
+                    arguments["jql"], limit=limit, fields=ISSUE_FIELDS
+                )
+                await sync_to_async(self._index_issues, thread_sensitive=False)(
+                    jira, user, issues
+                )
+                return self._issues_result(issues, with_assignee=True, with_total=True)
+
+            elif function_name == "find_issues":
+                if not await sync_to_async(self._index_size, thread_sensitive=False)(
+                    jira, user
+                ):
+                    seed = await jira.jql(
+                        "ORDER BY updated DESC",
+                        limit=INDEX_SEED_LIMIT,
+                        fields=ISSUE_FIELDS,
+                    )
+                    await sync_to_async(self._index_issues, thread_sensitive=False)(
+                        jira, user, seed
+                    )
+                # Loading the index reads its file
+                return await sync_to_async(
+                    self._found_issues_result, thread_sensitive=False
+                )(jira, user, arguments)
+
+            elif function_name == "get_project_details":
+                project_key = arguments["project_key"]
+                catalog = await sync_to_async(self._catalog)(jira, user, prefetch)
+                project = await sync_to_async(catalog.get)(project_key)
+                if project is None:
+                    try:
+                        project = await jira.project(project_key)
+                    except Exception as e:
+                        if _is_not_found(e):
+                            return fastjson.dumps(
+                                {"error": f"Project {project_key} not found"}
+                            )
+                        raise
+                    await sync_to_async(catalog.add)(project)
+
+                total_issues = await sync_to_async(catalog.total)(project["key"])
+                if total_issues is None:
+                    try:
+                        total_issues = (
+                            await jira.jql(
+                                f'project = "{project["key"]}"', limit=0, fields="key"
+                            )
+                        ).get("total", 0)
+                        await sync_to_async(catalog.set_total)(
+                            project["key"], total_issues
+                        )
+                    except Exception:
+                        total_issues = 0
+                return self._project_details_result(project, total_issues)
+
+            elif function_name == "get_boards":
+                project_key = arguments.get("project_key")
+
+                try:
+                    if project_key and await sync_to_async(self._can_see_project)(
+                        jira, user, project_key, prefetch
+                    ):
+                        boards = await site_metadata.aboards(jira, project_key)
+                    else:
+                        boards = await (
+                            jira.boards(projectKeyOrId=project_key)
+                            if project_key
+                            else jira.boards()
+                        )
+                    return self._boards_result(boards)
+                except Exception as e:
+                    return fastjson.dumps(
+                        {"error": f"Could not fetch boards: {str(e)}"}
+                    )
+
+            else:
+                return fastjson.dumps({"error": f"Unknown function: {function_name}"})
+
+        except Exception as e:
+            return fastjson.dumps(
+                {"error": f"Error executing {function_name}: {str(e)}"}
+            )
+
+    async def chat_with_jira_context(
+        self, user, messages: List[Dict], stream: bool = False
+    ):
+        """Handle chat with Jira function calling capability"""
+        with (
+            deadlines.deadline(self.deadline),
+            tracing.span("chat.turn", stream=stream),
+        ):
+            # All Jira calls of the turn share one connection pool; it and the
+            # OpenAI client's are closed with the turn
+            async with async_client() as http, self._openai_client() as self.client:
+                return await self._chat_turn(user, messages, stream, http)
+
+    async def _chat_turn(self, user, messages: List[Dict], stream: bool, http):
+        intent = self._local_intent(messages)
+        if intent is not None:
+            reply = await self._answer_intent(user, intent, http)
+            if reply is not None:
+                return reply
+
+        route = route_turn(messages)
+        tools = route.select_tools(self.get_jira_tools())
+
+        started = time.monotonic()
+        try:
+            return await self._handle_regular_chat(
+                user, self.build_messages(messages), tools, route, http
+            )
+        finally:
+            record_turn(route, time.monotonic() - started)
+
+    async def _answer_intent(self, user, intent: Intent, http) -> Optional[Dict]:
+        try:
+            integration = await aget_integration(user, active_only=True)
+            jira = await JiraOAuthService.get_async_jira_client(
+                integration, client=http
+            )
+        except Exception:
+            # Let the model explain a missing or broken integration
+            return None
+        with (
+            deadlines.reserve(self.answer_reserve),
+            tracing.span("chat.tool", function=intent.function_name, intent=True),
+        ):
+            result = await self.aexecute_jira_function(
+                user, jira, intent.function_name, intent.arguments
+            )
+        return self._intent_reply(intent, result)
+
+    async def _execute_tool_calls(
+        self, user, tool_calls, http, prefetch=None
+    ) -> List[str]:
+        """Run all tool calls of a turn concurrently, in tool call order"""
+        try:
+            if prefetch is not None:
+                jira = await prefetch.client()
+            else:
+                integration = await aget_integration(user, active_only=True)
+                jira = await JiraOAuthService.get_async_jira_client(
+                    integration, client=http
+                )
+        except JiraIntegration.DoesNotExist:
+            return [NO_INTEGRATION_ERROR] * len(tool_calls)
+        except Exception as e:
+            return [
+                fastjson.dumps(
+                    {"error": f"Error executing {tc.function.name}: {str(e)}"}
+                )
+                for tc in tool_calls
+            ]
+
+        # Tools still running when the tool budget runs out are cancelled
+        with deadlines.reserve(self.answer_reserve):
+            tasks = [
+                asyncio.ensure_future(
+                    self._traced_tool(
+                        user,
+                        jira,
+                        tc.function.name,
+                        fastjson.loads(tc.function.arguments),
+                        prefetch,
+                    )
+                )
+                for tc in tool_calls
+            ]
+            done, pending = await asyncio.wait(tasks, timeout=deadlines.remaining())
+            for task in pending:
+                task.cancel()
+            return [
+                _tool_result(tc.function.name, task.result())
+                if task in done
+                else _timed_out_result(tc.function.name)
+                for tc, task in zip(tool_calls, tasks, strict=True)
+            ]
+
+    async def _traced_tool(
+        self, user, jira, function_name: str, arguments: Dict, prefetch=None
+    ) -> str:
+        # Opened inside the task so concurrent tool calls get sibling spans
+        with tracing.span("chat.tool", function=function_name):
+            return await self.aexecute_jira_function(
+                user, jira, function_name, arguments, prefetch
+            )
+
+    async def _handle_regular_chat(self, user, messages, tools, route: Route, http):
+        """Handle non-streaming chat"""
+        reads = (
+            route.prefetch_for(last_user_message(messages))
+            if self.prefetch_enabled
+            else ()
+        )
+        prefetch = AsyncJiraPrefetch(user, http).start(reads) if reads else None
+        try:
+            return await self._complete_turn(
+                user, messages, tools, route, http, prefetch
+            )
+        finally:
+            if prefetch is not None:
+                prefetch.cancel()
+
+    async def _complete_turn(self, user, messages, tools, route, http, prefetch):
+        try:
+            with completion_call(route.model):
+                response = await self.client.chat.completions.create(
+                    model=route.model,
+                    messages=messages,
+                    tools=tools,
+                    tool_choice="auto",
+                    temperature=route.temperature,
+                    max_tokens=route.max_tokens,
+                    timeout=_completion_timeout(),
+                )
+            record_usage(route, response)
+
+            message = response.choices[0].message
+
+            if not message.tool_calls:
+                chat_turns.inc(path="direct")
+                return {"content": message.content, "function_calls": 0}
+
+            messages.append(self._assistant_message(message))
+            results = await self._execute_tool_calls(
+                user, message.tool_calls, http, prefetch
+            )
+            for tool_call, result in zip(message.tool_calls, results, strict=True):
+                messages.append(
+                    {"role": "tool", "tool_call_id": tool_call.id, "content": result}
+                )
+
+            reply = self._fast_path_reply(messages, message.tool_calls, results)
+            if reply is not None:
+                chat_turns.inc(path="fast_path")
+                return {"content": reply, "function_calls": len(message.tool_calls)}
+
+            with completion_call(route.model):
+                final_response = await self.client.chat.completions.create(
+                    model=route.model,
+                    messages=messages,
+                    tools=tools,
+                    temperature=route.temperature,
+                    max_tokens=route.max_tokens,
+                    timeout=_completion_timeout(),
+                )
+            record_usage(route, final_response)
+
+            chat_turns.inc(path="llm")
+            return {
+                "content": final_response.choices[0].message.content,
+                "function_calls": len(message.tool_calls),
+            }
+
+        except _timeout_errors():
+            chat_turns.inc(path="timeout")
+            return {"content": TIMEOUT_REPLY, "function_calls": 0}
+        except Exception as e:
+            chat_turns.inc(path="error")
+            return {
+                "content": f"Sorry, I encountered an error: {str(e)}",
+                "function_calls": 0,
+            }
@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from . import deadlines, metrics
+from .executors import get_executor
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+breaker_transitions = metrics.counter(
+    "jira_breaker_transitions_total", "Jira circuit breaker state changes", ("state",)
+)
+breaker_rejections = metrics.counter(
+    "jira_breaker_rejections_total", "Jira calls failed fast by an open circuit breaker"
+)
+
+
+class CircuitOpenError(ValueError):
+    """Raised instead of calling Jira while an integration's circuit is open"""
+
+
+def is_site_failure(error: Exception) -> bool:
+    """Whether error says the integration's Jira is unhealthy, rather than blaming the caller"""
+    if isinstance(error, (deadlines.DeadlineExceeded, CircuitOpenError, DatabaseError)):
+        return False
+    # A timeout cut short by the caller's own time budget
+    scope = deadlines.current()
+    if scope is not None and scope.expired:
+        return False
+    # Jira answered; a missing issue or a bad query is the request's fault
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is None or status >= 500 or status in (401, 403, 429)
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one Jira integration.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail at once with the last error. Once reset_timeout has passed, the next
+    call starts a probe in the background (half-open) and still fails fast;
+    the circuit closes when the probe succeeds and opens again when it fails.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error: str | None = None
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        if state != self.state:
+            logger.info("Jira circuit %s: %s -> %s", self.name, self.state, state)
+            breaker_transitions.inc(state=state)
+            self.state = state
+
+    def before_call(self, probe: Callable | None = None):
+        """Raise CircuitOpenError unless the circuit is closed"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if (
+                self.state == OPEN
+                and probe is not None
+                and time.monotonic() - self.opened_at >= self.reset_timeout
+            ):
+                self._transition(HALF_OPEN)
+                get_executor("jira-breaker-probe", 2).submit(self._probe, probe)
+            error = self.last_error
+        breaker_rejections.inc()
+        raise CircuitOpenError(f"Jira is unavailable for this integration: {error}")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.last_error = None
+            self._transition(CLOSED)
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def _probe(self, probe: Callable):
+        try:
+            probe()
+        except Exception as e:
+            self.record_failure(e)
+        else:
+            self.record_success()
+        finally:
+            # The probe thread must not keep its own database connection open
+            connection.close()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(integration) -> CircuitBreaker:
+    """The process-wide circuit breaker of a JiraIntegration"""
+    name = f"{integration.cloud_id}:{integration.pk}"
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                settings.JIRA_BREAKER_FAILURE_THRESHOLD,
+                settings.JIRA_BREAKER_RESET_TIMEOUT,
+            )
+        return breaker
+
+
+def reset_breaker(integration):
+    """Forget the failures of an integration, e.g. after the user reconnected it"""
+    with _breakers_lock:
+        _breakers.pop(f"{integration.cloud_id}:{integration.pk}", None)
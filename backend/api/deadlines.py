@@ -0,0 +1,85 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request ran out of its time budget before an outbound call"""
+
+
+class Deadline:
+    """Point in (monotonic) time by which a request must be answered"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+_current: contextvars.ContextVar[Deadline | None] = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+def current() -> Deadline | None:
+    return _current.get()
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    Run the block under a deadline seconds from now.
+
+    Nested deadlines never extend the one around them. The deadline follows
+    the context into asyncio tasks and sync_to_async calls; thread pool work
+    has to be submitted with contextvars.copy_context().run to see it.
+    """
+    scope = Deadline(seconds)
+    outer = _current.get()
+    if outer is not None and outer.expires_at < scope.expires_at:
+        scope = outer
+    token = _current.set(scope)
+    try:
+        yield scope
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def reserve(seconds: float):
+    """Run the block under the current deadline minus seconds kept for what follows it"""
+    scope = _current.get()
+    if scope is None:
+        yield None
+        return
+    with deadline(scope.remaining() - seconds) as inner:
+        yield inner
+
+
+def remaining() -> float | None:
+    """Seconds left before the current deadline, or None without one"""
+    scope = _current.get()
+    return scope.remaining() if scope is not None else None
+
+
+def expired() -> bool:
+    scope = _current.get()
+    return scope is not None and scope.expired
+
+
+def timeout(default: float) -> float:
+    """
+    Timeout for one outbound call: the time left before the current deadline,
+    at most default. Raises DeadlineExceeded when none is left.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded()
+    return min(default, left)
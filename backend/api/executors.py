@@ -0,0 +1,23 @@
+"""Process-wide thread pools for work that runs off the request thread"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_executors: dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """
+    The pool called name, started with max_workers threads on first use.
+
+    Pools are created lazily so that gunicorn workers each start their own
+    after forking.
+    """
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=name
+            )
+        return executor
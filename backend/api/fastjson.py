@@ -0,0 +1,37 @@
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Same types as DRF's JSONEncoder (Decimal, lazy strings, querysets, ...)
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    # Dates and times are left to DRF's encoder so both backends format them alike
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps_bytes(obj) -> bytes:
+        """Compact UTF-8 JSON for obj"""
+        return orjson.dumps(obj, default=_encoder.default, option=_OPTIONS)
+
+    def loads(data):
+        return orjson.loads(data)
+
+else:
+
+    def dumps_bytes(obj) -> bytes:
+        """Compact UTF-8 JSON for obj"""
+        return json.dumps(
+            obj, cls=JSONEncoder, separators=(",", ":"), ensure_ascii=False
+        ).encode()
+
+    def loads(data):
+        return json.loads(data)
+
+
+def dumps(obj) -> str:
+    return dumps_bytes(obj).decode()
@@ -0,0 +1,182 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from django.conf import settings
+
+from . import metrics
+from .executors import get_executor
+
+hedges_sent = metrics.counter(
+    "jira_hedges_sent_total", "Hedged (duplicate) Jira GETs sent", ("site",)
+)
+hedges_won = metrics.counter(
+    "jira_hedges_won_total", "Hedged Jira GETs that answered first", ("site",)
+)
+
+
+class SiteLatency:
+    """
+    Recent GET latencies and the hedge budget of one Jira site.
+
+    The budget is a token bucket: every request adds budget_ratio tokens and
+    every hedge takes one, so hedges stay below that fraction of the site's
+    traffic even when the whole site is slow.
+    """
+
+    def __init__(self, window: int, budget_ratio: float, max_tokens: float = 10.0):
+        self.samples = deque(maxlen=window)
+        self.budget_ratio = budget_ratio
+        self.max_tokens = max_tokens
+        self.tokens = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def hedge_delay(self, percentile: float, min_samples: int) -> float | None:
+        """Latency at percentile of the recent requests, or None without enough of them"""
+        with self._lock:
+            if len(self.samples) < min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.budget_ratio)
+
+    def withdraw(self) -> bool:
+        """Take a token for one hedge; False when the budget is spent"""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+_sites: dict[str, SiteLatency] = {}
+_sites_lock = threading.Lock()
+
+
+def get_site(site: str) -> SiteLatency:
+    with _sites_lock:
+        latency = _sites.get(site)
+        if latency is None:
+            latency = _sites[site] = SiteLatency(
+                settings.JIRA_HEDGE_WINDOW, settings.JIRA_HEDGE_BUDGET
+            )
+        return latency
+
+
+def _hedge_delay(site: str | None):
+    """The site's latency tracker and hedge delay, or (None, None) when not hedging"""
+    if not settings.JIRA_HEDGING_ENABLED or not site:
+        return None, None
+    latency = get_site(site)
+    latency.deposit()
+    return latency, latency.hedge_delay(
+        settings.JIRA_HEDGE_PERCENTILE, settings.JIRA_HEDGE_MIN_SAMPLES
+    )
+
+
+def _timed(latency: SiteLatency, fetch: Callable):
+    started = time.monotonic()
+    result = fetch()
+    latency.record(time.monotonic() - started)
+    return result
+
+
+def _submit(fn, *args):
+    # Run in a copy of the caller's context so the request deadline applies
+    return get_executor("jira-hedge", settings.JIRA_HEDGE_WORKERS).submit(
+        contextvars.copy_context().run, fn, *args
+    )
+
+
+def hedged(site: str | None, fetch: Callable, isolated_fetch: Callable | None = None):
+    """
+    Call fetch(), an idempotent Jira read, with hedging for site.
+
+    Without enough latency samples for site, fetch runs on the calling thread.
+    Otherwise the read runs in the hedge pool, and when it hasn't answered
+    within JIRA_HEDGE_PERCENTILE of the site's recent latency and the site's
+    hedge budget allows it, a second copy is sent; whichever succeeds first
+    wins and the other is abandoned. Both copies call isolated_fetch(), the
+    same read over a session of its own (fetch by default), since the loser
+    may still be running after this returns.
+    """
+    latency, delay = _hedge_delay(site)
+    if latency is None:
+        return fetch()
+    if delay is None:
+        return _timed(latency, fetch)
+
+    isolated_fetch = isolated_fetch or fetch
+    futures = [_submit(_timed, latency, isolated_fetch)]
+    try:
+        done, _ = wait(futures, timeout=delay)
+        if done or not latency.withdraw():
+            return futures[0].result()
+
+        hedges_sent.inc(site=site)
+        futures.append(_submit(_timed, latency, isolated_fetch))
+        pending, error = set(futures), None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is futures[1]:
+                        hedges_won.inc(site=site)
+                    return future.result()
+                error = future.exception()
+        raise error
+    finally:
+        # Drops a hedge still queued; a running loser finishes unobserved
+        for future in futures:
+            future.cancel()
+
+
+async def _atimed(latency: SiteLatency, fetch: Callable[[], Awaitable]):
+    started = time.monotonic()
+    result = await fetch()
+    latency.record(time.monotonic() - started)
+    return result
+
+
+async def ahedged(site: str | None, fetch: Callable[[], Awaitable]):
+    """hedged() for the async client; the losing request is cancelled"""
+    latency, delay = _hedge_delay(site)
+    if latency is None:
+        return await fetch()
+    if delay is None:
+        return await _atimed(latency, fetch)
+
+    tasks = [asyncio.ensure_future(_atimed(latency, fetch))]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or not latency.withdraw():
+            return await tasks[0]
+
+        hedges_sent.inc(site=site)
+        tasks.append(asyncio.ensure_future(_atimed(latency, fetch)))
+        pending, error = set(tasks), None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is tasks[1]:
+                        hedges_won.inc(site=site)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
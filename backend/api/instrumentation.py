@@ -0,0 +1,220 @@
+import re
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from . import metrics, tracing, transport
+
+# Buckets (seconds) for calls that leave the process
+UPSTREAM_BUCKETS = (
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    1.5,
+    2.5,
+    5.0,
+    10.0,
+    15.0,
+    30.0,
+)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+jira_request_seconds = metrics.histogram(
+    "jira_request_seconds",
+    "Jira REST calls by endpoint, site and HTTP status",
+    ("endpoint", "cloud_id", "status"),
+    buckets=UPSTREAM_BUCKETS,
+)
+jira_response_bytes = metrics.counter(
+    "jira_response_bytes_total",
+    "Bytes of Jira REST response bodies",
+    ("endpoint", "cloud_id"),
+)
+token_refresh_seconds = metrics.histogram(
+    "jira_token_refresh_seconds",
+    "Jira OAuth token refreshes",
+    ("status",),
+    buckets=UPSTREAM_BUCKETS,
+)
+completion_seconds = metrics.histogram(
+    "openai_completion_seconds",
+    "OpenAI chat completions by model",
+    ("model", "status"),
+    buckets=UPSTREAM_BUCKETS,
+)
+db_query_seconds = metrics.histogram(
+    "db_query_seconds",
+    "Database queries by statement type",
+    ("operation",),
+    buckets=DB_BUCKETS,
+)
+
+# Path segments that identify one object rather than an endpoint: numbers,
+# issue keys (ABC-123) and project keys (ABC)
+_ID_SEGMENT_RE = re.compile(r"^(?:\d+|[A-Z][A-Z0-9_]*-\d+|[A-Z][A-Z0-9_]+)$")
+_CLOUD_PREFIX_RE = re.compile(r"^/ex/jira/[^/]+")
+
+
+def endpoint_label(url: str) -> str:
+    """
+    Low-cardinality label for a Jira URL or path:
+    https://api.atlassian.com/ex/jira/<cloud>/rest/api/2/project/ABC -> /rest/api/2/project/{id}
+    """
+    segments = _CLOUD_PREFIX_RE.sub("", urlsplit(url).path).strip("/").split("/")
+    # rest/<api>/<version> names the API, not an object
+    keep = 3 if segments[0] == "rest" else 0
+    segments[keep:] = [
+        "{id}" if _ID_SEGMENT_RE.match(segment) else segment
+        for segment in segments[keep:]
+    ]
+    return "/" + "/".join(segments)
+
+
+@contextmanager
+def jira_call(url: str, cloud_id):
+    """
+    Time one Jira REST call. Pass the response to record_response so its
+    status and size are recorded; an HTTPError's status is picked up as well.
+    """
+    endpoint = endpoint_label(url)
+    with (
+        metrics.span(
+            jira_request_seconds, endpoint=endpoint, cloud_id=cloud_id or ""
+        ) as span,
+        tracing.span("jira.request", endpoint=endpoint, cloud_id=cloud_id),
+    ):
+        try:
+            yield span
+        except Exception as e:
+            response = getattr(e, "response", None)
+            if response is not None and getattr(response, "status_code", None):
+                span.labels["status"] = response.status_code
+            raise
+
+
+def record_response(span, response):
+    size = len(response.content or b"")
+    span.labels["status"] = response.status_code
+    jira_response_bytes.inc(
+        size, endpoint=span.labels["endpoint"], cloud_id=span.labels["cloud_id"]
+    )
+    tracing.annotate(status=response.status_code, bytes=size)
+
+
+@contextmanager
+def completion_call(model: str):
+    """Time one OpenAI chat completion"""
+    with (
+        metrics.span(completion_seconds, model=model),
+        tracing.span("openai.completion", model=model) as span,
+    ):
+        yield span
+
+
+def _operation(sql) -> str:
+    word = sql.lstrip()[:8].split(None, 1)
+    operation = word[0].upper() if word else ""
+    return (
+        operation if operation in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+    )
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper (connection.execute_wrapper) timing every query"""
+    operation = _operation(sql)
+    started = time.perf_counter()
+    try:
+        with tracing.span("db.query", operation=operation):
+            return execute(sql, params, many, context)
+    finally:
+        db_query_seconds.observe(time.perf_counter() - started, operation=operation)
+
+
+def _pool_values(field: str):
+    values = {}
+    for pool in transport.pool_stats():
+        key = (pool["host"],)
+        values[key] = values.get(key, 0) + (pool[field] or 0)
+    return values
+
+
+metrics.gauge(
+    "http_pool_connections",
+    "Connections opened by the outbound HTTP pools",
+    ("host",),
+    callback=lambda: _pool_values("connections"),
+)
+metrics.gauge(
+    "http_pool_idle_connections",
+    "Idle keep-alive connections in the outbound HTTP pools",
+    ("host",),
+    callback=lambda: _pool_values("idle"),
+)
+
+
+def db_pools() -> dict:
+    """The psycopg connection pools this process has opened, by database alias"""
+    from django.db.backends.postgresql.base import DatabaseWrapper
+
+    # Read the pools Django keeps instead of DatabaseWrapper.pool, which would create one
+    return dict(DatabaseWrapper._connection_pools)
+
+
+def _pool_stats(value):
+    return {(alias,): value(pool.get_stats()) for alias, pool in db_pools().items()}
+
+
+metrics.gauge(
+    "db_pool_connections",
+    "Connections held by the database pool",
+    ("alias",),
+    callback=lambda: _pool_stats(lambda stats: stats.get("pool_size", 0)),
+)
+metrics.gauge(
+    "db_pool_connections_in_use",
+    "Pool connections lent to a request",
+    ("alias",),
+    callback=lambda: _pool_stats(
+        lambda stats: stats.get("pool_size", 0) - stats.get("pool_available", 0)
+    ),
+)
+metrics.gauge(
+    "db_pool_max_connections",
+    "Size limit of the database pool",
+    ("alias",),
+    callback=lambda: _pool_stats(lambda stats: stats.get("pool_max", 0)),
+)
+metrics.gauge(
+    "db_pool_waiting",
+    "Requests waiting for a pool connection",
+    ("alias",),
+    callback=lambda: _pool_stats(lambda stats: stats.get("requests_waiting", 0)),
+)
+metrics.counter(
+    "db_pool_requests_total",
+    "Connections requested from the database pool",
+    ("alias",),
+    callback=lambda: _pool_stats(lambda stats: stats.get("requests_num", 0)),
+)
+metrics.counter(
+    "db_pool_wait_seconds_total",
+    "Time requests spent waiting for a pool connection",
+    ("alias",),
+    callback=lambda: _pool_stats(lambda stats: stats.get("requests_wait_ms", 0) / 1000),
+)
+metrics.counter(
+    "db_pool_errors_total",
+    "Pool connection requests that timed out or were refused (queue full)",
+    ("alias",),
+    callback=lambda: _pool_stats(lambda stats: stats.get("requests_errors", 0)),
+)
+metrics.counter(
+    "db_pool_connections_lost_total",
+    "Pool connections found broken by the health check",
+    ("alias",),
+    callback=lambda: _pool_stats(lambda stats: stats.get("connections_lost", 0)),
+)
@@ -0,0 +1,153 @@
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+from .chat_formatters import ANALYTICAL_WORDS, TEMPLATE_PATTERNS, normalize
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+EXAMPLES_PATH = DATA_DIR / "intent_examples.json"
+MODEL_PATH = DATA_DIR / "intent_model.json"
+
+# Label of the training examples that must go to the model
+OTHER = "other"
+
+_STATUS_PATTERNS = [
+    (re.compile(r"\bin progress\b"), "In Progress"),
+    (
+        re.compile(r"\b(to do|todo) (issues|tickets|tasks)\b|\bin (to do|todo)\b"),
+        "To Do",
+    ),
+]
+# Anything naming a specific issue, project or filter is not a plain listing
+_SPECIFIC_WORDS = re.compile(
+    r"\b([a-z][a-z0-9]+-\d+|bugs?|priority|created|updated|yesterday|week|sprint|done|closed)\b"
+)
+
+
+@dataclass(frozen=True)
+class Intent:
+    """A Jira function that answers a user message on its own"""
+
+    function_name: str
+    arguments: dict = field(default_factory=dict)
+    confidence: float = 1.0
+
+
+def features(text: str) -> list[str]:
+    """Unigrams and bigrams of normalized text"""
+    words = normalize(text).split()
+    return words + [
+        f"{first} {second}" for first, second in zip(words, words[1:], strict=False)
+    ]
+
+
+def train(examples: dict[str, list[str]]) -> dict:
+    """Multinomial naive Bayes model (log probabilities) from labelled messages"""
+    vocabulary = {
+        feature
+        for messages in examples.values()
+        for message in messages
+        for feature in features(message)
+    }
+    total_messages = sum(len(messages) for messages in examples.values())
+    classes = {}
+    for label, messages in examples.items():
+        counts = Counter(
+            feature for message in messages for feature in features(message)
+        )
+        denominator = sum(counts.values()) + len(vocabulary)
+        classes[label] = {
+            "prior": math.log(len(messages) / total_messages),
+            "unknown": math.log(1 / denominator),
+            "features": {
+                feature: round(math.log((count + 1) / denominator), 5)
+                for feature, count in sorted(counts.items())
+            },
+        }
+    return {"classes": classes}
+
+
+class IntentClassifier:
+    """Naive Bayes over message n-grams, loaded from a trained model file"""
+
+    def __init__(self, model: dict):
+        self.classes = model["classes"]
+        self.vocabulary = {
+            feature for entry in self.classes.values() for feature in entry["features"]
+        }
+
+    @classmethod
+    def load(cls, path=MODEL_PATH) -> "IntentClassifier":
+        return cls(json.loads(Path(path).read_text()))
+
+    def probabilities(self, text: str) -> dict[str, float]:
+        # Features never seen in training would only add the same noise to every class
+        known = [feature for feature in features(text) if feature in self.vocabulary]
+        if not known:
+            return {}
+        scores = {
+            label: entry["prior"]
+            + sum(entry["features"].get(feature, entry["unknown"]) for feature in known)
+            for label, entry in self.classes.items()
+        }
+        best = max(scores.values())
+        exponents = {label: math.exp(score - best) for label, score in scores.items()}
+        total = sum(exponents.values())
+        return {label: value / total for label, value in exponents.items()}
+
+    def predict(self, text: str):
+        """(label, probability) of the most likely intent, or (None, 0.0)"""
+        probabilities = self.probabilities(text)
+        if not probabilities:
+            return None, 0.0
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+
+@lru_cache(maxsize=1)
+def get_classifier() -> IntentClassifier | None:
+    try:
+        return IntentClassifier.load()
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _arguments(function_name: str, text: str) -> dict:
+    if function_name == "get_user_issues":
+        for pattern, status in _STATUS_PATTERNS:
+            if pattern.search(text):
+                return {"status": status}
+    return {}
+
+
+def match_intent(user_message: str, threshold: float = 0.9) -> Intent | None:
+    """
+    The listing function that answers user_message without the model.
+
+    Known phrasings match directly; other messages go through the classifier
+    and only count when it is at least threshold sure. Questions asking for
+    analysis or naming something specific never match.
+    """
+    text = normalize(user_message)
+    if (
+        not text
+        or len(text.split()) > 15
+        or ANALYTICAL_WORDS.search(text)
+        or _SPECIFIC_WORDS.search(text)
+    ):
+        return None
+    for function_name, patterns in TEMPLATE_PATTERNS.items():
+        if any(pattern.search(text) for pattern in patterns):
+            return Intent(function_name, _arguments(function_name, text))
+
+    classifier = get_classifier()
+    if classifier is None:
+        return None
+    label, probability = classifier.predict(text)
+    if label is None or label == OTHER or probability < threshold:
+        return None
+    return Intent(label, _arguments(label, text), round(probability, 3))
@@ -0,0 +1,51 @@
+import copy
+
+from atlassian import Jira
+
+from . import deadlines, transport
+from .hedging import hedged
+from .instrumentation import jira_call, record_response
+
+
+class DeadlineJira(Jira):
+    """
+    atlassian-python-api Jira client whose request timeout follows the current
+    deadline. GETs are hedged (see api.hedging) when that is enabled.
+    """
+
+    cloud_id = None
+
+    def request(self, method="GET", path="/", *args, **kwargs):
+        if method != "GET":
+            return self._send(method, path, *args, **kwargs)
+        return hedged(
+            self.cloud_id,
+            lambda: self._send(method, path, *args, **kwargs),
+            lambda: self.isolated_client()._send(method, path, *args, **kwargs),
+        )
+
+    def isolated_client(self):
+        """A copy of this client with a session of its own, for use on another thread"""
+        # requests sessions aren't thread-safe; hedged reads and prefetches run
+        # on pool threads, and may outlive the call that started them
+        hedge = copy.copy(self)
+        hedge._session = transport.new_session()
+        for prefix, adapter in self._session.adapters.items():
+            hedge._session.mount(prefix, adapter)
+        hedge._session.headers.update(self._session.headers)
+        hedge._session.auth = self._session.auth
+        return hedge
+
+    def _send(self, method, path, *args, **kwargs):
+        with jira_call(path, self.cloud_id) as span:
+            response = super().request(method, path, *args, **kwargs)
+            record_response(span, response)
+            return response
+
+    @property
+    def timeout(self):
+        return deadlines.timeout(self._timeout)
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value
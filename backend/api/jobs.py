@@ -0,0 +1,253 @@
+"""
+Background jobs kept in the jobs table, for Jira work that should not run
+on the request path.
+
+enqueue() adds a row. `manage.py jobworker` processes claim due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers share the queue
+without a broker. Higher priorities run first. A job that raises is retried
+with exponential backoff until it has run max_attempts times, then marked
+failed. Handlers are registered with @job and must be idempotent: a job whose
+worker dies is run again once JOB_TIMEOUT has passed.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from collections.abc import Callable
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import deadlines, metrics
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+jobs_processed = metrics.counter(
+    "jobs_processed_total",
+    "Jobs run by this worker by name and outcome (done, retry, failed)",
+    ("name", "status"),
+)
+job_seconds = metrics.histogram(
+    "job_seconds", "Run time of background jobs", ("name", "status")
+)
+
+PENDING = (Job.Status.QUEUED, Job.Status.RUNNING)
+
+_handlers: dict[str, Callable] = {}
+
+
+def job(name: str):
+    """Register the decorated function as the handler of jobs called name; the payload is passed as keyword arguments"""
+
+    def register(func: Callable) -> Callable:
+        _handlers[name] = func
+        return func
+
+    return register
+
+
+def enqueue(
+    name: str,
+    payload: dict | None = None,
+    *,
+    priority: int = 0,
+    dedup_key: str | None = None,
+    delay: float = 0,
+    max_attempts: int | None = None,
+) -> Job:
+    """
+    Queue a job to run after delay seconds.
+
+    With a dedup_key, a job with the same key that is still queued or running
+    is returned instead of adding another.
+    """
+    fields = {
+        "name": name,
+        "payload": payload or {},
+        "priority": priority,
+        "dedup_key": dedup_key,
+        "run_at": timezone.now() + timedelta(seconds=delay),
+        "max_attempts": max_attempts or settings.JOB_MAX_ATTEMPTS,
+    }
+    if dedup_key is None:
+        return Job.objects.create(**fields)
+    while True:
+        try:
+            with transaction.atomic():
+                return Job.objects.create(**fields)
+        except IntegrityError:
+            existing = Job.objects.filter(
+                dedup_key=dedup_key, status__in=PENDING
+            ).first()
+            # Otherwise it finished in between; try again
+            if existing is not None:
+                return existing
+
+
+def claim(worker: str, limit: int = 1) -> list[Job]:
+    """Mark up to limit due jobs as running for worker; rows other workers hold are skipped"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED, run_at__lte=now)
+            .order_by("-priority", "run_at", "id")[:limit]
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[claimed.pk for claimed in jobs]).update(
+                status=Job.Status.RUNNING,
+                locked_by=worker,
+                locked_at=now,
+                attempts=F("attempts") + 1,
+            )
+    for claimed in jobs:
+        claimed.status, claimed.locked_by, claimed.locked_at = (
+            Job.Status.RUNNING,
+            worker,
+            now,
+        )
+        claimed.attempts += 1
+    return jobs
+
+
+def run(claimed: Job) -> str:
+    """Run a claimed job and record the outcome: done, retry or failed"""
+    started = time.monotonic()
+    try:
+        handler = _handlers.get(claimed.name)
+        if handler is None:
+            raise LookupError(f"No handler registered for job {claimed.name!r}")
+        # Jira calls give up when the job runs out of time rather than the worker being presumed dead
+        with deadlines.deadline(settings.JOB_TIMEOUT):
+            handler(**claimed.payload)
+    except Exception:
+        logger.warning(
+            "Job %s failed (attempt %s/%s)",
+            claimed,
+            claimed.attempts,
+            claimed.max_attempts,
+            exc_info=True,
+        )
+        status = _record_failure(claimed, traceback.format_exc())
+    else:
+        status = "done"
+        _mine(claimed).update(
+            status=Job.Status.DONE, finished_at=timezone.now(), last_error=""
+        )
+    jobs_processed.inc(name=claimed.name, status=status)
+    job_seconds.observe(time.monotonic() - started, name=claimed.name, status=status)
+    return status
+
+
+def backoff(attempts: int) -> float:
+    """Seconds before retrying a job that failed attempts times"""
+    delay = min(
+        settings.JOB_RETRY_MAX_DELAY,
+        settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+    )
+    # Jitter so jobs failing together don't retry together
+    return delay * random.uniform(0.5, 1)
+
+
+def _record_failure(claimed: Job, error: str) -> str:
+    if claimed.attempts < claimed.max_attempts:
+        _mine(claimed).update(
+            status=Job.Status.QUEUED,
+            run_at=timezone.now() + timedelta(seconds=backoff(claimed.attempts)),
+            last_error=error,
+        )
+        return "retry"
+    _mine(claimed).update(
+        status=Job.Status.FAILED, finished_at=timezone.now(), last_error=error
+    )
+    return "failed"
+
+
+def _mine(claimed: Job):
+    # A job requeued as stale may already be running elsewhere; leave it alone then
+    return Job.objects.filter(
+        pk=claimed.pk, status=Job.Status.RUNNING, locked_by=claimed.locked_by
+    )
+
+
+def requeue_stale() -> int:
+    """Queue again the jobs whose worker has held them longer than JOB_TIMEOUT (it most likely died)"""
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT),
+    )
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED, finished_at=timezone.now(), last_error="Worker lost"
+    )
+    return failed + stale.update(status=Job.Status.QUEUED, run_at=timezone.now())
+
+
+def retry_failed(failed) -> tuple[int, int]:
+    """
+    Queue failed jobs (a queryset) to run again now; returns how many were
+    queued and how many were skipped because a job with their dedup_key is
+    queued or running already.
+    """
+    retried = skipped = 0
+    for pk in failed.filter(status=Job.Status.FAILED).values_list("pk", flat=True):
+        try:
+            with transaction.atomic():
+                retried += Job.objects.filter(pk=pk, status=Job.Status.FAILED).update(
+                    status=Job.Status.QUEUED,
+                    run_at=timezone.now(),
+                    attempts=0,
+                    finished_at=None,
+                )
+        except IntegrityError:
+            skipped += 1
+    return retried, skipped
+
+
+def purge_finished() -> int:
+    """Delete done and failed jobs older than JOB_RETENTION_DAYS"""
+    deleted, _ = Job.objects.filter(
+        status__in=(Job.Status.DONE, Job.Status.FAILED),
+        finished_at__lt=timezone.now() - timedelta(days=settings.JOB_RETENTION_DAYS),
+    ).delete()
+    return deleted
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def work(stop: threading.Event, burst: bool = False, worker: str | None = None) -> int:
+    """
+    Run due jobs one at a time until stop is set, or with burst until none
+    is due. Returns the number of jobs run.
+    """
+    worker = worker or worker_name()
+    processed = 0
+    last_maintenance = float("-inf")
+    while not stop.is_set():
+        # Like the request cycle: drop broken connections between jobs
+        close_old_connections()
+        if time.monotonic() - last_maintenance > settings.JOB_MAINTENANCE_INTERVAL:
+            requeue_stale()
+            purge_finished()
+            last_maintenance = time.monotonic()
+
+        claimed = claim(worker)
+        if not claimed:
+            if burst:
+                break
+            stop.wait(settings.JOB_POLL_INTERVAL)
+            continue
+        for next_job in claimed:
+            run(next_job)
+            processed += 1
+    close_old_connections()
+    return processed
@@ -0,0 +1,27 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from api import jobs, tasks  # noqa: F401 (registers the job handlers)
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the jobs table until stopped (SIGTERM lets the current job finish)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--burst", action="store_true", help="exit once no job is due"
+        )
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+
+        worker = jobs.worker_name()
+        self.stdout.write(f"Job worker {worker} started")
+        processed = jobs.work(stop, burst=options["burst"], worker=worker)
+        self.stdout.write(
+            self.style.SUCCESS(f"Job worker {worker} stopped after {processed} job(s)")
+        )
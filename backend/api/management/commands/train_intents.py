@@ -0,0 +1,28 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.intents import EXAMPLES_PATH, MODEL_PATH, IntentClassifier, train
+
+
+class Command(BaseCommand):
+    help = "Train the local chat intent classifier from api/data/intent_examples.json"
+
+    def handle(self, *args, **options):
+        examples = json.loads(EXAMPLES_PATH.read_text())
+        model = train(examples)
+        MODEL_PATH.write_text(json.dumps(model, indent=1, sort_keys=True) + "\n")
+
+        # Training accuracy, as a sanity check of the examples
+        classifier = IntentClassifier(model)
+        total = sum(len(messages) for messages in examples.values())
+        correct = sum(
+            classifier.predict(message)[0] == label
+            for label, messages in examples.items()
+            for message in messages
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {MODEL_PATH} ({len(model['classes'])} intents, {correct}/{total} examples recognized)"
+            )
+        )
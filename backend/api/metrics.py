@@ -0,0 +1,348 @@
+"""
+In-process metrics exported in the Prometheus text format.
+
+Every process keeps its own registry. Exported samples carry a pid label, so
+the series of different gunicorn workers never mix. Given a directory
+(METRICS_DIR), each worker also writes its samples there as <pid>.json
+(start_flusher, and on every scrape), and a scrape of any worker exports
+those of all of them.
+"""
+
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Seconds; suits both local work (ms) and slow upstream calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """
+    Monotonic in-process counter with optional labels, or one read from a
+    callback on export (for totals another component keeps)
+    """
+
+    type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable | None = None,
+    ):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        # callback() returns {label values tuple: value}
+        self.callback = callback
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> dict[tuple[str, ...], float]:
+        if self.callback is not None:
+            return dict(self.callback())
+        with self._lock:
+            return dict(self._values)
+
+    def expose(
+        self, samples: dict | None = None, labels: tuple[tuple[str, str], ...] = ()
+    ) -> list[str]:
+        """Text format lines for samples (this metric's own by default), with the (name, value) labels added"""
+        samples = self.samples() if samples is None else samples
+        names = tuple(name for name, _ in labels) + self.labelnames
+        values = tuple(value for _, value in labels)
+        return [
+            f"{self.name}{_labels(names, values + key)} {_number(value)}"
+            for key, value in samples.items()
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, set directly or read from a callback on export"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Counter):
+    """Distribution of observed values (e.g. durations) in cumulative buckets"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last one is +Inf), sum]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def sum(self, **labels) -> float:
+        entry = self._values.get(self._key(labels))
+        return entry[1] if entry else 0.0
+
+    def samples(self):
+        with self._lock:
+            return {
+                key: (list(counts), total)
+                for key, (counts, total) in self._values.items()
+            }
+
+    def expose(
+        self, samples: dict | None = None, labels: tuple[tuple[str, str], ...] = ()
+    ) -> list[str]:
+        samples = self.samples() if samples is None else samples
+        names = tuple(name for name, _ in labels) + self.labelnames
+        values = tuple(value for _, value in labels)
+        lines = []
+        bounds = [_number(bound) for bound in self.buckets] + ["+Inf"]
+        for key, (counts, total) in samples.items():
+            key = values + key
+            cumulative = 0
+            for bound, count in zip(bounds, counts, strict=True):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(names + ('le',), key + (bound,))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(names, key)} {cumulative}")
+        return lines
+
+
+class Span:
+    """
+    Times a block into a histogram.
+
+    Labels can be filled in inside the block (span.labels["status"] = 200);
+    a "status" label left empty becomes "ok", or "error" when the block raised.
+    """
+
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._started
+        if "status" in self.histogram.labelnames and not self.labels.get("status"):
+            self.labels["status"] = "error" if exc_type else "ok"
+        self.histogram.observe(self.seconds, **self.labels)
+        return False
+
+
+def span(histogram: Histogram, **labels) -> Span:
+    return Span(histogram, labels)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return (
+        "{"
+        + ",".join(
+            f'{name}="{_escape(str(value))}"'
+            for name, value in zip(names, values, strict=True)
+        )
+        + "}"
+    )
+
+
+def _number(value: float) -> str:
+    return (
+        repr(float(value))
+        if isinstance(value, float) and not value.is_integer()
+        else str(int(value))
+    )
+
+
+_registry: dict[str, object] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric_class, name, description, labelnames, **options):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = metric_class(
+                name, description, labelnames, **options
+            )
+        return metric
+
+
+def counter(
+    name: str,
+    description: str,
+    labelnames: tuple[str, ...] = (),
+    callback: Callable | None = None,
+) -> Counter:
+    """Get or create the process-wide counter called name"""
+    return _register(Counter, name, description, labelnames, callback=callback)
+
+
+def gauge(
+    name: str,
+    description: str,
+    labelnames: tuple[str, ...] = (),
+    callback: Callable | None = None,
+) -> Gauge:
+    return _register(Gauge, name, description, labelnames, callback=callback)
+
+
+def histogram(
+    name: str,
+    description: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: Iterable[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return _register(Histogram, name, description, labelnames, buckets=buckets)
+
+
+def registry() -> dict[str, object]:
+    with _registry_lock:
+        return dict(_registry)
+
+
+_TYPES = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+
+
+def snapshot() -> dict:
+    """The samples of every metric of this process, as JSON-serializable data"""
+    data = {}
+    for name, metric in registry().items():
+        try:
+            samples = metric.samples()
+        except Exception:
+            # A failing gauge callback must not take the whole endpoint down
+            continue
+        data[name] = {
+            "type": metric.type,
+            "description": metric.description,
+            "labelnames": list(metric.labelnames),
+            "buckets": list(getattr(metric, "buckets", ())),
+            "samples": [[list(key), value] for key, value in samples.items()],
+        }
+    return data
+
+
+def write_snapshot(directory, data: dict | None = None):
+    """Write this process's snapshot to directory as <pid>.json"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    data = snapshot() if data is None else data
+    # Write to a temporary file and rename so readers never see half a file
+    with tempfile.NamedTemporaryFile(
+        "w", dir=directory, suffix=".tmp", delete=False
+    ) as handle:
+        json.dump(data, handle, separators=(",", ":"))
+    os.replace(handle.name, directory / f"{os.getpid()}.json")
+
+
+def read_snapshots(directory) -> dict[str, dict]:
+    """Snapshots in directory by pid"""
+    snapshots = {}
+    for path in Path(directory).glob("*.json"):
+        try:
+            snapshots[path.stem] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def remove_snapshot(directory, pid: int):
+    (Path(directory) / f"{pid}.json").unlink(missing_ok=True)
+
+
+def start_flusher(directory, interval: float) -> threading.Thread:
+    """Write this process's snapshot to directory every interval seconds"""
+
+    def flush():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot(directory)
+            except OSError:
+                logger.warning(
+                    "Could not write metrics to %s", directory, exc_info=True
+                )
+
+    thread = threading.Thread(target=flush, name="metrics-flush", daemon=True)
+    thread.start()
+    return thread
+
+
+def exposition(directory=None) -> str:
+    """
+    Metrics in the Prometheus text format (0.0.4), with a pid label: those of
+    this process, or with directory those of every process writing there
+    """
+    pid = str(os.getpid())
+    processes = {pid: snapshot()}
+    if directory:
+        write_snapshot(directory, processes[pid])
+        processes.update(read_snapshots(directory))
+    lines = []
+    for name in sorted({name for data in processes.values() for name in data}):
+        exported = [
+            (pid, data[name]) for pid, data in sorted(processes.items()) if name in data
+        ]
+        meta = exported[0][1]
+        options = {"buckets": meta["buckets"]} if meta["type"] == "histogram" else {}
+        metric = _TYPES[meta["type"]](
+            name, meta["description"], tuple(meta["labelnames"]), **options
+        )
+        lines.append(f"# HELP {name} {metric.description}")
+        lines.append(f"# TYPE {name} {metric.type}")
+        for pid, data in exported:
+            samples = {tuple(key): value for key, value in data["samples"]}
+            lines.extend(metric.expose(samples, labels=(("pid", pid),)))
+    return "\n".join(lines) + "\n"
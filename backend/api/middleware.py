@@ -0,0 +1,184 @@
+import logging
+import random
+import secrets
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import OperationalError
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+from psycopg_pool import PoolTimeout, TooManyRequests
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import tracing
+from .authentication import CachedJWTAuthentication
+from .models import RequestProfile
+from .profiling import SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+
+class TracingMiddleware:
+    """
+    Traces a sample of requests (TRACE_SAMPLE_RATE) through the views,
+    services and upstream calls.
+
+    Finished traces are appended to TRACE_FILE when that is set. With
+    TRACE_DEBUG_HEADER on, a request sending "X-Trace: 1" is always traced and
+    gets its span tree back as JSON in the X-Trace response header.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _requested(self, request) -> bool:
+        return settings.TRACE_DEBUG_HEADER and request.headers.get("X-Trace") == "1"
+
+    def _sampled(self, request) -> bool:
+        rate = settings.TRACE_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def _finish(self, request, trace, response, requested: bool):
+        trace.root.set(status=response.status_code)
+        response["X-Trace-Id"] = trace.trace_id
+        if requested:
+            response["X-Trace"] = tracing.header_value(trace)
+        if settings.TRACE_FILE:
+            try:
+                tracing.write(trace, settings.TRACE_FILE)
+            except OSError as e:
+                logger.warning("Could not write trace %s: %s", trace.trace_id, e)
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        requested = self._requested(request)
+        if not (requested or self._sampled(request)):
+            return self.get_response(request)
+        with tracing.trace(f"{request.method} {request.path}") as trace:
+            response = self.get_response(request)
+        return self._finish(request, trace, response, requested)
+
+    async def __acall__(self, request):
+        requested = self._requested(request)
+        if not (requested or self._sampled(request)):
+            return await self.get_response(request)
+        with tracing.trace(f"{request.method} {request.path}") as trace:
+            response = await self.get_response(request)
+        return self._finish(request, trace, response, requested)
+
+
+class DatabasePoolMiddleware(MiddlewareMixin):
+    """
+    Answers 503 when no database connection could be had in time, instead of
+    a 500: the pool stayed exhausted for DATABASE_POOL_TIMEOUT seconds or
+    already had DATABASE_POOL_MAX_WAITING requests queued.
+    """
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, OperationalError) and isinstance(
+            exception.__cause__, (PoolTimeout, TooManyRequests)
+        ):
+            logger.warning(
+                "Database pool exhausted on %s %s: %s",
+                request.method,
+                request.path,
+                exception,
+            )
+            response = JsonResponse(
+                {"detail": "The service is busy, please retry."}, status=503
+            )
+            response["Retry-After"] = "1"
+            return response
+        return None
+
+
+class ProfilerMiddleware:
+    """
+    Runs a sample of requests (PROFILE_SAMPLE_RATE), and requests of staff
+    users sending "X-Profile: 1", under the sampling profiler and stores the
+    result as a RequestProfile, browsable in the admin.
+
+    Requests that are neither sampled nor asked for by staff run untouched.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _sampled(self) -> bool:
+        rate = settings.PROFILE_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def _staff(self, request) -> bool:
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+        # API clients authenticate with a JWT, which only the views check
+        try:
+            result = CachedJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return bool(result and result[0].is_staff)
+
+    def _start(self) -> SamplingProfiler:
+        return SamplingProfiler(settings.PROFILE_INTERVAL / 1000).start()
+
+    def _save(self, request, response, profiler: SamplingProfiler, requested: bool):
+        trace = tracing.current_trace()
+        user = getattr(request, "user", None)
+        profile = RequestProfile(
+            request_id=trace.trace_id if trace is not None else secrets.token_hex(8),
+            user=user if user is not None and user.is_authenticated else None,
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            status_code=response.status_code,
+            duration_ms=profiler.seconds * 1000,
+            interval_ms=settings.PROFILE_INTERVAL,
+            samples=profiler.samples,
+            folded=profiler.folded(),
+        )
+        profile.save()
+        if requested:
+            response["X-Profile-Id"] = profile.request_id
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        requested = request.headers.get("X-Profile") == "1" and self._staff(request)
+        if not (requested or self._sampled()):
+            return self.get_response(request)
+        profiler = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        self._save(request, response, profiler, requested)
+        return response
+
+    async def __acall__(self, request):
+        requested = request.headers.get("X-Profile") == "1" and await sync_to_async(
+            self._staff
+        )(request)
+        if not (requested or self._sampled()):
+            return await self.get_response(request)
+        profiler = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.stop()
+        # request.user may be a lazy session lookup; resolve it off the event loop
+        await sync_to_async(self._save)(request, response, profiler, requested)
+        return response
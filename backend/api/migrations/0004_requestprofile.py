@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0003_jiraintegration_scopes_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "request_id",
+                    models.CharField(
+                        max_length=32, unique=True, verbose_name="request id"
+                    ),
+                ),
+                ("method", models.CharField(max_length=10, verbose_name="method")),
+                ("path", models.CharField(max_length=2048, verbose_name="path")),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(
+                        null=True, verbose_name="status code"
+                    ),
+                ),
+                ("duration_ms", models.FloatField(verbose_name="duration (ms)")),
+                (
+                    "interval_ms",
+                    models.FloatField(verbose_name="sampling interval (ms)"),
+                ),
+                ("samples", models.PositiveIntegerField(verbose_name="samples")),
+                ("folded", models.TextField(blank=True, verbose_name="folded stacks")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="created at"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="request_profiles",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "request profile",
+                "verbose_name_plural": "request profiles",
+                "db_table": "request_profiles",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
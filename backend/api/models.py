@@ -22,92 +22,179 @@ class User(AbstractUser):
 
 class JiraIntegration(models.Model):
     """Model to store Jira OAuth integration data for users"""
+
     user = models.OneToOneField(
-        User,
-        on_delete=models.CASCADE,
-        related_name='jira_integration'
+        User, on_delete=models.CASCADE, related_name="jira_integration"
     )
-    
+
     # OAuth token data (encrypted)
     _access_token = models.TextField(_("encrypted access token"))
     _refresh_token = models.TextField(_("encrypted refresh token"))
     token_type = models.CharField(_("token type"), max_length=50, default="Bearer")
     expires_at = models.DateTimeField(_("token expires at"))
-    
+
     # Jira instance data
     cloud_id = models.CharField(_("cloud id"), max_length=255)
     site_url = models.URLField(_("site url"))
     site_name = models.CharField(_("site name"), max_length=255)
-    
+
     # Integration status
     is_active = models.BooleanField(_("is active"), default=True)
     last_sync_at = models.DateTimeField(_("last sync at"), null=True, blank=True)
-    scopes_version = models.IntegerField(_("scopes version"), default=1)  # Track scope updates
-    
+    scopes_version = models.IntegerField(
+        _("scopes version"), default=1
+    )  # Track scope updates
+
     # Timestamps
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
-    
+
     class Meta:
         db_table = "jira_integrations"
         verbose_name = _("jira integration")
         verbose_name_plural = _("jira integrations")
-    
+
     def __str__(self):
         return f"{self.user.username} - {self.site_name}"
-    
+
     @property
     def is_token_expired(self):
         """Check if the access token has expired"""
         return timezone.now() >= self.expires_at
-    
+
     @property
     def has_outdated_scopes(self):
         """Check if the integration was created with older scopes"""
         # Current scopes version is 2 (includes Jira Software scopes)
         return self.scopes_version < 2
-    
+
     @property
     def access_token(self):
         """Decrypt and return the access token"""
         return self._decrypt_token(self._access_token)
-    
+
     @access_token.setter
     def access_token(self, value):
         """Encrypt and store the access token"""
         self._access_token = self._encrypt_token(value)
-    
+
     @property
     def refresh_token(self):
         """Decrypt and return the refresh token"""
         return self._decrypt_token(self._refresh_token)
-    
+
     @refresh_token.setter
     def refresh_token(self, value):
         """Encrypt and store the refresh token"""
         self._refresh_token = self._encrypt_token(value)
-    
+
     def _get_encryption_key(self):
         """Get or generate encryption key from settings"""
         # In production, this should come from environment variable
-        key = getattr(settings, 'JIRA_TOKEN_ENCRYPTION_KEY', None)
+        key = getattr(settings, "JIRA_TOKEN_ENCRYPTION_KEY", None)
         if not key:
             # Generate a key for development (should be set in production)
             key = Fernet.generate_key()
         if isinstance(key, str):
             key = key.encode()
         return key
-    
+
     def _encrypt_token(self, token):
         """Encrypt a token using Fernet symmetric encryption"""
         if not token:
             return ""
         fernet = Fernet(self._get_encryption_key())
         return fernet.encrypt(token.encode()).decode()
-    
+
     def _decrypt_token(self, encrypted_token):
         """Decrypt a token using Fernet symmetric encryption"""
         if not encrypted_token:
             return ""
         fernet = Fernet(self._get_encryption_key())
         return fernet.decrypt(encrypted_token.encode()).decode()
+
+
+class RequestProfile(models.Model):
+    """Sampled stacks of one profiled request (see api.middleware.ProfilerMiddleware)"""
+
+    request_id = models.CharField(_("request id"), max_length=32, unique=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="request_profiles",
+    )
+    method = models.CharField(_("method"), max_length=10)
+    path = models.CharField(_("path"), max_length=2048)
+    status_code = models.PositiveSmallIntegerField(_("status code"), null=True)
+    duration_ms = models.FloatField(_("duration (ms)"))
+    interval_ms = models.FloatField(_("sampling interval (ms)"))
+    samples = models.PositiveIntegerField(_("samples"))
+    # Folded stacks ("root;...;leaf count" per line), ready for flamegraph.pl or speedscope
+    folded = models.TextField(_("folded stacks"), blank=True)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "request_profiles"
+        ordering = ["-created_at"]
+        verbose_name = _("request profile")
+        verbose_name_plural = _("request profiles")
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.request_id})"
+
+
+class Job(models.Model):
+    """A unit of background work, run by `manage.py jobworker` (see api.jobs)"""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", _("queued")
+        RUNNING = "running", _("running")
+        DONE = "done", _("done")
+        FAILED = "failed", _("failed")
+
+    name = models.CharField(_("name"), max_length=100)
+    payload = models.JSONField(_("payload"), default=dict, blank=True)
+    status = models.CharField(
+        _("status"), max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    # Higher runs first
+    priority = models.SmallIntegerField(_("priority"), default=0)
+    # At most one queued or running job per key
+    dedup_key = models.CharField(
+        _("deduplication key"), max_length=200, null=True, blank=True
+    )
+    attempts = models.PositiveSmallIntegerField(_("attempts"), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_("max attempts"), default=5)
+    run_at = models.DateTimeField(_("run at"), default=timezone.now)
+    locked_by = models.CharField(_("locked by"), max_length=100, blank=True)
+    locked_at = models.DateTimeField(_("locked at"), null=True, blank=True)
+    last_error = models.TextField(_("last error"), blank=True)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+    finished_at = models.DateTimeField(_("finished at"), null=True, blank=True)
+
+    class Meta:
+        db_table = "jobs"
+        ordering = ["-created_at"]
+        verbose_name = _("job")
+        verbose_name_plural = _("jobs")
+        indexes = [
+            # The queue: what workers claim next
+            models.Index(
+                fields=["-priority", "run_at"],
+                name="jobs_queue_idx",
+                condition=models.Q(status="queued"),
+            ),
+            models.Index(fields=["status", "locked_at"], name="jobs_status_locked_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                name="jobs_unique_pending_dedup_key",
+                condition=models.Q(status__in=["queued", "running"]),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,213 @@
+import asyncio
+import contextvars
+import threading
+from collections.abc import Callable
+
+from django.conf import settings
+from django.db import connection
+
+from .authentication import aget_integration, get_integration
+from .executors import get_executor
+from .services import JiraOAuthService
+
+# Fields the chat tools and the issue index read from an issue; asking Jira
+# for only these keeps search responses small
+ISSUE_FIELDS = "summary,status,priority,project,assignee,updated,labels,components"
+
+DEFAULT_ISSUE_LIMIT = 20
+
+# What a prefetch can load, in start order; every read needs the client
+PREFETCHES = ("client", "myself", "projects", "user_issues")
+
+
+def user_issues_jql(current_user: dict, status=None) -> str:
+    """JQL for the issues assigned to current_user, as used by get_user_issues"""
+    status_filter = (
+        f' AND status != "{status}"'
+        if status == "Done"
+        else f' AND status = "{status}"'
+        if status
+        else ""
+    )
+    return f'assignee = "{current_user["emailAddress"]}"{status_filter} ORDER BY updated DESC'
+
+
+class PrefetchCancelled(Exception):
+    pass
+
+
+def _plan(names) -> set:
+    wanted = set(names)
+    if "user_issues" in wanted:
+        wanted.add("myself")
+    if wanted:
+        wanted.add("client")
+    return wanted
+
+
+class JiraPrefetch:
+    """
+    Speculative Jira reads for one chat turn.
+
+    Started right before the first completion with the reads the turn's route
+    is likely to need (some of connecting the Jira client, the current user,
+    the project list and the user's open issues), it runs them while the model
+    is thinking. Tool calls then take those results instead of fetching them
+    again. Whatever is still queued when the turn no longer needs it is
+    cancelled and never sent to Jira. Each read runs on a copy of the client
+    with its own session, since the turn's tool calls use the client meanwhile.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._futures = {}
+        self._cancelled = threading.Event()
+
+    def start(self, names=PREFETCHES):
+        """Start loading names (see PREFETCHES) and what they depend on"""
+        wanted = _plan(names)
+        if "client" in wanted:
+            self._futures["client"] = self._submit(self._connect)
+        if "myself" in wanted:
+            self._futures["myself"] = self._submit(
+                self._guard, lambda: self._isolated_client().myself()
+            )
+        if "projects" in wanted:
+            self._futures["projects"] = self._submit(
+                self._guard, lambda: self._isolated_client().projects()
+            )
+        if "user_issues" in wanted:
+            self._futures["user_issues"] = self._submit(self._guard, self._user_issues)
+        return self
+
+    def _submit(self, fn, *args):
+        # Run in a copy of the caller's context so Jira calls see the turn's deadline
+        return get_executor("jira-prefetch", settings.CHAT_PREFETCH_WORKERS).submit(
+            contextvars.copy_context().run, fn, *args
+        )
+
+    def _guard(self, fetch: Callable):
+        if self._cancelled.is_set():
+            raise PrefetchCancelled()
+        return fetch()
+
+    def _connect(self):
+        try:
+            integration = get_integration(self.user, active_only=True)
+            return JiraOAuthService.get_jira_client(integration)
+        finally:
+            # The worker thread must not keep its own database connection open
+            connection.close()
+
+    def _user_issues(self):
+        current_user = self._futures["myself"].result()
+        return self._isolated_client().jql(
+            user_issues_jql(current_user),
+            limit=DEFAULT_ISSUE_LIMIT,
+            fields=ISSUE_FIELDS,
+        )
+
+    def client(self):
+        """The connected Jira client; raises what connecting raised"""
+        return self._futures["client"].result()
+
+    def _isolated_client(self):
+        return self.client().isolated_client()
+
+    def take(self, name: str, fallback: Callable):
+        """Prefetched result for name, or fallback() when it is missing or failed"""
+        future = self._futures.get(name)
+        if future is not None and not future.cancelled():
+            try:
+                return future.result()
+            except Exception:
+                pass
+        return fallback()
+
+    def peek(self, name: str):
+        """Prefetched result for name if it has already arrived, else None"""
+        future = self._futures.get(name)
+        if (
+            future is None
+            or not future.done()
+            or future.cancelled()
+            or future.exception()
+        ):
+            return None
+        return future.result()
+
+    def cancel(self):
+        """Drop everything that hasn't been sent yet"""
+        self._cancelled.set()
+        for future in self._futures.values():
+            future.cancel()
+
+
+def _retrieve_exception(future):
+    # Failures of unused prefetches are expected; don't let asyncio log them
+    if not future.cancelled():
+        future.exception()
+
+
+class AsyncJiraPrefetch(JiraPrefetch):
+    """JiraPrefetch for the async chat path, running as tasks on the event loop"""
+
+    def __init__(self, user, http):
+        super().__init__(user)
+        self.http = http
+
+    def start(self, names=PREFETCHES):
+        wanted = _plan(names)
+        if "client" in wanted:
+            self._futures["client"] = asyncio.ensure_future(self._connect())
+        if "myself" in wanted:
+            self._futures["myself"] = asyncio.ensure_future(self._fetch("myself"))
+        if "projects" in wanted:
+            self._futures["projects"] = asyncio.ensure_future(self._fetch("projects"))
+        if "user_issues" in wanted:
+            self._futures["user_issues"] = asyncio.ensure_future(self._user_issues())
+        for future in self._futures.values():
+            future.add_done_callback(_retrieve_exception)
+        return self
+
+    async def _connect(self):
+        integration = await aget_integration(self.user, active_only=True)
+        return await JiraOAuthService.get_async_jira_client(
+            integration, client=self.http
+        )
+
+    async def _fetch(self, method: str):
+        jira = await self.client()
+        return await getattr(jira, method)()
+
+    async def _user_issues(self):
+        current_user = await self._futures["myself"]
+        jira = await self.client()
+        return await jira.jql(
+            user_issues_jql(current_user),
+            limit=DEFAULT_ISSUE_LIMIT,
+            fields=ISSUE_FIELDS,
+        )
+
+    async def client(self):
+        return await asyncio.shield(self._futures["client"])
+
+    async def take(self, name: str, fallback: Callable):
+        future = self._futures.get(name)
+        if future is not None and not future.cancelled():
+            try:
+                return await asyncio.shield(future)
+            except Exception:
+                pass
+        return await fallback()
+
+    def cancel(self):
+        for future in self._futures.values():
+            future.cancel()
+
+
+def prefetched(prefetch, name: str, fallback: Callable):
+    """prefetch.take(name, fallback), or just fallback() without a prefetch"""
+    if prefetch is None:
+        return fallback()
+    return prefetch.take(name, fallback)
@@ -0,0 +1,85 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    # ";" separates frames in the folded format
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}".replace(";", ",")
+
+
+def _stack(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread: a helper thread records the thread's
+    stack every interval seconds.
+
+    The result is in the folded ("collapsed") stack format read by
+    flamegraph.pl, speedscope and inferno: one "root;...;leaf count" line per
+    distinct stack. An async request shares its thread with the event loop,
+    so its profile includes whatever else the loop ran meanwhile.
+    """
+
+    def __init__(self, interval: float, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self.started
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_stack(frame)] += 1
+                self.samples += 1
+            del frame
+
+    def folded(self) -> str:
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self.stacks.most_common()
+        )
+
+
+def hot_functions(folded: str, limit: int = 25) -> list[tuple[str, int, int]]:
+    """(function, self samples, total samples) of the busiest functions of a folded profile"""
+    own, total = Counter(), Counter()
+    for line in folded.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if not stack:
+            continue
+        frames = stack.split(";")
+        own[frames[-1]] += int(count)
+        for function in set(frames):
+            total[function] += int(count)
+    busiest = sorted(
+        total, key=lambda function: (own[function], total[function]), reverse=True
+    )
+    return [(function, own[function], total[function]) for function in busiest[:limit]]
@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import re
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from .renderers import FastJSONRenderer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 512
+
+_ACCEPT_ENCODING_RE = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*")
+
+
+def accepted_encodings(request) -> dict:
+    """Content codings of the Accept-Encoding header with their q values"""
+    encodings = {}
+    for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        match = _ACCEPT_ENCODING_RE.fullmatch(part)
+        if match:
+            try:
+                encodings[match.group(1).lower()] = float(match.group(2) or 1)
+            except ValueError:
+                continue
+    return encodings
+
+
+def negotiate_encoding(request) -> str:
+    """Coding to send: br, gzip or identity, whichever the client accepts and we support"""
+    accepted = accepted_encodings(request)
+    wildcard = accepted.get("*", 0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return "identity"
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY)
+    # mtime=0 keeps the output, like the ETag, a function of the content alone
+    return gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+def _matches(request, digest: str) -> bool:
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    for etag in parse_etags(header):
+        if etag == "*":
+            return True
+        # If-None-Match compares weakly; any representation of the same content matches
+        tag = etag[2:] if etag.startswith("W/") else etag
+        if tag.strip('"').split("-")[0] == digest:
+            return True
+    return False
+
+
+def conditional_json_response(request, data) -> HttpResponse:
+    """
+    JSON response for data with a strong ETag, 304 handling and compression.
+
+    The ETag is a hash of the rendered JSON; compressed representations get
+    the coding appended ("<hash>-br") so each stays a strong validator. A
+    request whose If-None-Match holds any of them gets an empty 304.
+    """
+    body = FastJSONRenderer().render(data)
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    encoding = (
+        negotiate_encoding(request) if len(body) >= MIN_COMPRESS_SIZE else "identity"
+    )
+    etag = f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+
+    if _matches(request, digest):
+        response = HttpResponseNotModified()
+    else:
+        if encoding != "identity":
+            body = _compress(body, encoding)
+        response = HttpResponse(body, content_type="application/json")
+        response["Content-Length"] = str(len(body))
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+
+    response["ETag"] = etag
+    # Per-user data: browsers may keep it but must revalidate every time
+    response["Cache-Control"] = "private, no-cache"
+    patch_vary_headers(response, ("Accept-Encoding", "Authorization"))
+    return response
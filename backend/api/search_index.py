@@ -0,0 +1,404 @@
+import fcntl
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable
+from pathlib import Path
+
+from django.conf import settings
+
+# Extra term frequency given to the fields an issue is usually looked up by
+FIELD_WEIGHTS = {"key": 3, "labels": 2, "components": 2, "summary": 1}
+
+STOP_WORDS = frozenset(
+    "a an and any anything are as at be by for from has have in is it of on or "
+    "the there this to was what with about".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[0-9]+)?")
+
+
+def _stem(token: str) -> str:
+    # Plural folding is enough for short issue summaries
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased terms of text; issue keys (ABC-12) also yield their parts"""
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if "-" in token:
+            terms.append(token)
+            terms.extend(token.split("-"))
+        elif token not in STOP_WORDS:
+            terms.append(_stem(token))
+    return terms
+
+
+def issue_document(issue: dict) -> dict | None:
+    """Flatten a Jira REST issue into the fields the index keeps, or None"""
+    fields = issue.get("fields") or {}
+    if "summary" not in fields:
+        return None
+    return {
+        "key": issue["key"],
+        "summary": fields.get("summary") or "",
+        "status": (fields.get("status") or {}).get("name"),
+        "priority": (fields.get("priority") or {}).get("name"),
+        "project": (fields.get("project") or {}).get("name"),
+        "assignee": (fields.get("assignee") or {}).get("displayName"),
+        "updated": fields.get("updated"),
+        "labels": fields.get("labels") or [],
+        "components": [
+            component.get("name", "") for component in fields.get("components") or []
+        ],
+    }
+
+
+class IssueIndex:
+    """
+    Inverted index with BM25 ranking over the issues of one Jira site.
+
+    Postings are kept as two parallel arrays per term (document numbers and
+    term frequencies). Updating an issue appends a new document and marks the
+    old one deleted; deleted documents are dropped when they make up a
+    quarter of the index. Changes since the last checkpoint are kept in
+    changed (key -> document, None when removed) so they can be merged into
+    what other processes saved meanwhile.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.changed: dict[str, dict | None] = {}
+        self._clear()
+
+    def _clear(self):
+        self.documents: list[dict | None] = []
+        self.numbers: dict[str, int] = {}
+        self.lengths = array("I")
+        self.postings: dict[str, tuple[array, array]] = {}
+        self.total_length = 0
+        self.deleted = 0
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def _terms(self, document: dict) -> dict[str, int]:
+        frequencies: dict[str, int] = {}
+        values = {
+            "key": [document["key"]],
+            "summary": [document["summary"]],
+            "labels": document["labels"],
+            "components": document["components"],
+        }
+        for field, texts in values.items():
+            for text in texts:
+                for term in tokenize(text):
+                    frequencies[term] = frequencies.get(term, 0) + FIELD_WEIGHTS[field]
+        return frequencies
+
+    def add(self, document: dict):
+        """Add a document, replacing an earlier version with the same key"""
+        with self._lock:
+            document.setdefault("indexed_at", int(time.time()))
+            self._remove(document["key"])
+            number = len(self.documents)
+            frequencies = self._terms(document)
+            for term, frequency in frequencies.items():
+                numbers, counts = self.postings.setdefault(
+                    term, (array("I"), array("H"))
+                )
+                numbers.append(number)
+                counts.append(min(frequency, 65535))
+            length = sum(frequencies.values())
+            self.documents.append(document)
+            self.numbers[document["key"]] = number
+            self.lengths.append(length)
+            self.total_length += length
+            self.dirty = True
+
+    def add_issues(self, issues: Iterable[dict]) -> int:
+        """Index Jira REST issues; returns how many were indexed"""
+        count = 0
+        now = int(time.time())
+        with self._lock:
+            for issue in issues:
+                document = issue_document(issue)
+                if document is not None:
+                    document["indexed_at"] = now
+                    self.add(document)
+                    self.changed[document["key"]] = document
+                    count += 1
+            self._compact_if_needed()
+        return count
+
+    def remove(self, key: str):
+        with self._lock:
+            self._remove(key)
+            self.changed[key] = None
+            self._compact_if_needed()
+
+    def expire(self, cutoff: float) -> int:
+        """Drop documents last indexed before cutoff (a Unix time); returns how many"""
+        with self._lock:
+            stale = [
+                document["key"]
+                for document in self.documents
+                if document is not None and document["indexed_at"] < cutoff
+            ]
+            for key in stale:
+                self._remove(key)
+                self.changed.pop(key, None)
+            self._compact_if_needed()
+        return len(stale)
+
+    def merge(self, documents: list[dict]):
+        """Replace the documents with another process's save, keeping the changes made here since"""
+        with self._lock:
+            saved = {document["key"]: document for document in documents}
+            self._rebuild(documents)
+            for key, document in self.changed.items():
+                if document is None:
+                    self._remove(key)
+                elif (
+                    key not in saved
+                    or saved[key]["indexed_at"] <= document["indexed_at"]
+                ):
+                    self.add(document)
+            self.dirty = bool(self.changed)
+            self._compact_if_needed()
+
+    def _remove(self, key: str):
+        number = self.numbers.pop(key, None)
+        if number is None:
+            return
+        self.documents[number] = None
+        self.total_length -= self.lengths[number]
+        self.deleted += 1
+        self.dirty = True
+
+    def _compact_if_needed(self):
+        if self.deleted and self.deleted * 4 >= len(self.documents):
+            self._rebuild(
+                [document for document in self.documents if document is not None]
+            )
+            self.dirty = True
+
+    def _rebuild(self, documents: list[dict]):
+        self._clear()
+        for document in documents:
+            self.add(document)
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[float, dict]]:
+        """Best matching documents for query, highest BM25 score first"""
+        with self._lock:
+            count = len(self.numbers)
+            if not count:
+                return []
+            # BM25 length normalization, k1 * (1 - b + b * length / average), as base + slope * length
+            base = self.k1 * (1 - self.b)
+            slope = (
+                self.k1 * self.b * count / self.total_length
+                if self.total_length
+                else 0.0
+            )
+            lengths = self.lengths
+            scores: dict[int, float] = {}
+            get = scores.get
+            for term in set(tokenize(query)):
+                posting = self.postings.get(term)
+                if posting is None:
+                    continue
+                numbers, frequencies = posting
+                weight = (self.k1 + 1) * math.log(
+                    1 + (count - len(numbers) + 0.5) / (len(numbers) + 0.5)
+                )
+                for number, frequency in zip(numbers, frequencies, strict=True):
+                    scores[number] = get(number, 0.0) + weight * frequency / (
+                        frequency + base + slope * lengths[number]
+                    )
+            documents = self.documents
+            best = heapq.nlargest(
+                limit,
+                (
+                    (score, number)
+                    for number, score in scores.items()
+                    if documents[number] is not None
+                ),
+            )
+            return [(score, documents[number]) for score, number in best]
+
+    def dumps(self) -> bytes:
+        """Serialized documents; postings are rebuilt on load"""
+        with self._lock:
+            documents = [
+                document for document in self.documents if document is not None
+            ]
+        return gzip.compress(json.dumps(documents, separators=(",", ":")).encode())
+
+    def checkpoint(self) -> bytes:
+        """dumps(), marking the index as saved"""
+        with self._lock:
+            data = self.dumps()
+            self.changed = {}
+            self.dirty = False
+        return data
+
+    @staticmethod
+    def load_documents(data: bytes) -> list[dict]:
+        documents = json.loads(gzip.decompress(data))
+        # Saved before documents were stamped; count them as indexed now
+        now = int(time.time())
+        for document in documents:
+            document.setdefault("indexed_at", now)
+        return documents
+
+    @classmethod
+    def loads(cls, data: bytes) -> "IssueIndex":
+        index = cls()
+        index._rebuild(cls.load_documents(data))
+        index.dirty = False
+        return index
+
+
+class IndexStore:
+    """
+    Indexes of this process, persisted to ISSUE_INDEX_DIR.
+
+    There is one index per Jira site and user: issues only get in when Jira
+    returned them to that user, so searching never shows issues of projects
+    the user can't browse. Every worker keeps its own copy of the indexes it
+    used last (at most max_loaded); a copy is reloaded when another worker
+    saved the file since, and saving merges with the file under a lock, so
+    workers don't overwrite each other's updates. Issues not returned by Jira
+    again within max_age seconds (deleted, moved, no longer visible) are
+    dropped.
+    """
+
+    def __init__(
+        self,
+        directory,
+        save_interval: float = 30,
+        max_age: float = 14 * 86400,
+        max_loaded: int = 256,
+    ):
+        self.directory = Path(directory)
+        self.save_interval = save_interval
+        self.max_age = max_age
+        self.max_loaded = max_loaded
+        self._indexes: OrderedDict[tuple[str, int], IssueIndex] = OrderedDict()
+        self._saved_at: dict[tuple[str, int], float] = {}
+        # Modification time of each index file when it was last read or written here
+        self._mtimes: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, cloud_id: str, user_id: int) -> Path:
+        return (
+            self.directory
+            / re.sub(r"[^A-Za-z0-9_-]", "_", cloud_id)
+            / f"{int(user_id)}.json.gz"
+        )
+
+    def get(self, cloud_id: str, user_id: int) -> IssueIndex:
+        key = (cloud_id, user_id)
+        evicted = []
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+            else:
+                index = self._indexes[key] = IssueIndex()
+                # Nothing written yet by this process; the first change is saved right away
+                self._saved_at[key] = float("-inf")
+                while len(self._indexes) > self.max_loaded:
+                    evicted.append(self._indexes.popitem(last=False))
+        for old_key, old_index in evicted:
+            if old_index.dirty:
+                self._write(old_key, old_index)
+            self._saved_at.pop(old_key, None)
+            self._mtimes.pop(old_key, None)
+        self._sync(key, index)
+        return index
+
+    def _sync(self, key: tuple[str, int], index: IssueIndex):
+        """Merge the saved file into index when it changed since this process last saw it"""
+        path = self._path(*key)
+        try:
+            mtime = path.stat().st_mtime_ns
+            if mtime == self._mtimes.get(key):
+                return
+            documents = IssueIndex.load_documents(path.read_bytes())
+        except (OSError, ValueError):
+            return
+        index.merge(documents)
+        index.expire(time.time() - self.max_age)
+        self._mtimes[key] = mtime
+
+    def save(self, cloud_id: str, user_id: int, force: bool = False):
+        """Write the index to disk if it changed and wasn't saved recently"""
+        key = (cloud_id, user_id)
+        index = self.get(cloud_id, user_id)
+        now = time.monotonic()
+        if not index.dirty or (
+            not force
+            and now - self._saved_at.get(key, float("-inf")) < self.save_interval
+        ):
+            return
+        self._write(key, index)
+        self._saved_at[key] = now
+
+    def _write(self, key: tuple[str, int], index: IssueIndex):
+        path = self._path(*key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Other workers save the same file; take in what they wrote before replacing it
+        with open(path.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._sync(key, index)
+            index.expire(time.time() - self.max_age)
+            data = index.checkpoint()
+            # Write to a temporary file and rename so readers never see half a file
+            with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as handle:
+                handle.write(data)
+            os.replace(handle.name, path)
+            self._mtimes[key] = path.stat().st_mtime_ns
+
+    def index_issues(
+        self, cloud_id: str | None, user_id: int, issues: Iterable[dict]
+    ) -> int:
+        if not cloud_id:
+            return 0
+        count = self.get(cloud_id, user_id).add_issues(issues)
+        if count:
+            self.save(cloud_id, user_id)
+        return count
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> IndexStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = IndexStore(
+                settings.ISSUE_INDEX_DIR,
+                settings.ISSUE_INDEX_SAVE_INTERVAL,
+                settings.ISSUE_INDEX_MAX_AGE,
+                settings.ISSUE_INDEX_MAX_LOADED,
+            )
+        return _store
@@ -44,11 +44,14 @@ INSTALLED_APPS = [
 # Middleware
 ######################################################################
 MIDDLEWARE = [
+    "api.middleware.TracingMiddleware",
+    "api.middleware.DatabasePoolMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.middleware.ProfilerMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -83,12 +86,65 @@ DATABASES = {
         "NAME": environ.get("DATABASE_NAME", "db"),
         "HOST": environ.get("DATABASE_HOST", "db"),
         "PORT": "5432",
+        # Pooled connections are checked before they are handed out
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
         "TEST": {
             "NAME": "test",
         },
     }
 }
 
+# psycopg connection pool per process. Keep DATABASE_POOL_MAX_SIZE near the
+# threads per worker (GUNICORN_THREADS) and workers x max size below the
+# server's max_connections. A request waits up to DATABASE_POOL_TIMEOUT seconds
+# for a connection, and at most DATABASE_POOL_MAX_WAITING requests wait at
+# once; beyond either the request gets a 503 (see api.middleware)
+DATABASE_POOL_ENABLED = os.getenv("DATABASE_POOL_ENABLED", "1") == "1"
+if DATABASE_POOL_ENABLED:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "name": "default",
+        "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", "8")),
+        "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "5")),
+        "max_waiting": int(os.getenv("DATABASE_POOL_MAX_WAITING", "32")),
+        # Close idle connections above min_size after this many seconds, and
+        # replace every connection after max_lifetime
+        "max_idle": float(os.getenv("DATABASE_POOL_MAX_IDLE", "300")),
+        "max_lifetime": float(os.getenv("DATABASE_POOL_MAX_LIFETIME", "1800")),
+    }
+
+######################################################################
+# Cache
+######################################################################
+# Shared tier (L2) of api.cache: the api_cache table in the main database
+# (created by migration 0005), or a directory when CACHE_DIR is set.
+# Entries beyond CACHE_MAX_ENTRIES are culled
+CACHE_DIR = os.getenv("CACHE_DIR", "")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache"
+        if CACHE_DIR
+        else "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": CACHE_DIR or "api_cache",
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "50000"))},
+    }
+}
+
+# Entries each process keeps in its in-process tier (L1), per cache
+CACHE_L1_MAXSIZE = int(os.getenv("CACHE_L1_MAXSIZE", "2048"))
+
+# Seconds a process trusts its copy of a scope's version; invalidations from
+# other processes take effect after at most this long
+CACHE_VERSION_TTL = float(os.getenv("CACHE_VERSION_TTL", "5"))
+
+# Stampede protection: the lock on a value being computed expires after
+# CACHE_LOCK_TIMEOUT seconds, and other processes poll for the value for up
+# to CACHE_LOCK_WAIT seconds before computing it themselves
+CACHE_LOCK_TIMEOUT = float(os.getenv("CACHE_LOCK_TIMEOUT", "30"))
+CACHE_LOCK_WAIT = float(os.getenv("CACHE_LOCK_WAIT", "10"))
+CACHE_LOCK_POLL_INTERVAL = float(os.getenv("CACHE_LOCK_POLL_INTERVAL", "0.05"))
+
 ######################################################################
 # Authentication
 ######################################################################
@@ -135,12 +191,30 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
 }
 
+# Compression of the dashboard-data and projects responses
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+
+# Seconds the users and jira_integrations rows of recent requests are reused
+# in process by read-only requests (changes in this process invalidate them)
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+AUTH_INTEGRATION_CACHE_TTL = float(os.getenv("AUTH_INTEGRATION_CACHE_TTL", "30"))
+
 ######################################################################
 # Jira Integration
 ######################################################################
@@ -149,10 +223,168 @@ JIRA_CLIENT_SECRET = os.getenv("JIRA_CLIENT_SECRET")
 JIRA_REDIRECT_URI = os.getenv("JIRA_REDIRECT_URI")
 JIRA_TOKEN_ENCRYPTION_KEY = os.getenv("JIRA_TOKEN_ENCRYPTION_KEY")
 
+# Upper bound (seconds) for one call to Atlassian; within a request deadline
+# calls get at most the time that is left
+ATLASSIAN_HTTP_TIMEOUT = float(os.getenv("ATLASSIAN_HTTP_TIMEOUT", "15"))
+
+# Circuit breaker per integration: after this many consecutive failures to
+# connect, Jira calls fail fast with the last error; a background probe is
+# tried every JIRA_BREAKER_RESET_TIMEOUT seconds until one succeeds
+JIRA_BREAKER_FAILURE_THRESHOLD = int(os.getenv("JIRA_BREAKER_FAILURE_THRESHOLD", "3"))
+JIRA_BREAKER_RESET_TIMEOUT = float(os.getenv("JIRA_BREAKER_RESET_TIMEOUT", "60"))
+
+# Process-wide keep-alive pools for outbound HTTP (see api/transport.py):
+# connections kept per host, and how many hosts keep a pool
+ATLASSIAN_API_POOL_SIZE = int(os.getenv("ATLASSIAN_API_POOL_SIZE", "32"))
+ATLASSIAN_AUTH_POOL_SIZE = int(os.getenv("ATLASSIAN_AUTH_POOL_SIZE", "4"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "8"))
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "32"))
+
+# Hedged Jira GETs: when a read hasn't answered within JIRA_HEDGE_PERCENTILE of
+# the site's last JIRA_HEDGE_WINDOW latencies, send it again and take whichever
+# answers first. The sync client runs hedged reads on JIRA_HEDGE_WORKERS
+# threads per process, so size it for the reads in flight across all request
+# threads. Hedges stay below JIRA_HEDGE_BUDGET of a site's requests
+JIRA_HEDGING_ENABLED = os.getenv("JIRA_HEDGING_ENABLED", "0") == "1"
+JIRA_HEDGE_PERCENTILE = float(os.getenv("JIRA_HEDGE_PERCENTILE", "0.95"))
+JIRA_HEDGE_BUDGET = float(os.getenv("JIRA_HEDGE_BUDGET", "0.05"))
+JIRA_HEDGE_WINDOW = int(os.getenv("JIRA_HEDGE_WINDOW", "200"))
+JIRA_HEDGE_MIN_SAMPLES = int(os.getenv("JIRA_HEDGE_MIN_SAMPLES", "20"))
+JIRA_HEDGE_WORKERS = int(os.getenv("JIRA_HEDGE_WORKERS", "32"))
+
+# Overall time budget (seconds) of a dashboard request
+DASHBOARD_DEADLINE = float(os.getenv("DASHBOARD_DEADLINE", "30"))
+
+# Seconds a user's dashboard snapshot is served before it is fetched again.
+# Logins and new integrations queue a job that fills it ahead of the first
+# dashboard request; "?refresh=1" bypasses it
+DASHBOARD_SNAPSHOT_TTL = int(os.getenv("DASHBOARD_SNAPSHOT_TTL", "120"))
+
 ######################################################################
 # OpenAI Configuration
 ######################################################################
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+
+# Overall time budget (seconds) of a chat turn. Tool calls must finish
+# CHAT_ANSWER_RESERVE seconds before it so the model can still answer; tools
+# still running then are cancelled and reported to the model as timed out
+CHAT_DEADLINE = float(os.getenv("CHAT_DEADLINE", "45"))
+CHAT_ANSWER_RESERVE = float(os.getenv("CHAT_ANSWER_RESERVE", "10"))
+
+# Chat turns are classified (listing / lookup / full); simple classes use the
+# fast model with smaller limits and fewer tools. The full route keeps what
+# every turn used before routing: CHAT_MODEL, 2000 tokens, temperature 0.7
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-4o-mini")
+CHAT_ROUTER_ENABLED = os.getenv("CHAT_ROUTER_ENABLED", "1") == "1"
+CHAT_ROUTE_FAST_MODEL = os.getenv("CHAT_ROUTE_FAST_MODEL", CHAT_MODEL)
+CHAT_ROUTE_FULL_MODEL = os.getenv("CHAT_ROUTE_FULL_MODEL", CHAT_MODEL)
+
+# Maximum size (characters) of one encoded tool result sent back to the model
+CHAT_TOOL_RESULT_BUDGET = int(os.getenv("CHAT_TOOL_RESULT_BUDGET", "8000"))
+
+# Answer plain listing questions ("show my projects") straight from the tool
+# result instead of a second completion
+CHAT_FAST_PATH_ENABLED = os.getenv("CHAT_FAST_PATH_ENABLED", "1") == "1"
+
+# Answer common listing questions ("what issues are assigned to me?") straight
+# from Jira when the local intent matcher is at least this sure of them
+CHAT_LOCAL_INTENTS_ENABLED = os.getenv("CHAT_LOCAL_INTENTS_ENABLED", "1") == "1"
+CHAT_LOCAL_INTENT_THRESHOLD = float(os.getenv("CHAT_LOCAL_INTENT_THRESHOLD", "0.9"))
+
+# Load the Jira data a chat route's tools usually need (client, current user,
+# projects, open issues; see Route.prefetch) concurrently with the first
+# completion of a turn
+CHAT_PREFETCH_ENABLED = os.getenv("CHAT_PREFETCH_ENABLED", "1") == "1"
+CHAT_PREFETCH_WORKERS = int(os.getenv("CHAT_PREFETCH_WORKERS", "8"))
+
+# Local full-text index of the issues each user has seen per Jira site (find_issues tool)
+ISSUE_INDEX_DIR = Path(os.getenv("ISSUE_INDEX_DIR", BASE_DIR / "var" / "issue_index"))
+ISSUE_INDEX_SAVE_INTERVAL = int(os.getenv("ISSUE_INDEX_SAVE_INTERVAL", "30"))
+# Issues Jira hasn't returned again for this many seconds are dropped from the index
+ISSUE_INDEX_MAX_AGE = int(os.getenv("ISSUE_INDEX_MAX_AGE", str(14 * 24 * 3600)))
+# Indexes each worker keeps in memory (least recently used are unloaded)
+ISSUE_INDEX_MAX_LOADED = int(os.getenv("ISSUE_INDEX_MAX_LOADED", "256"))
+
+# Seconds a user's project catalog (and per-project issue totals) stays fresh
+JIRA_PROJECT_CATALOG_TTL = int(os.getenv("JIRA_PROJECT_CATALOG_TTL", "300"))
+
+# Seconds the boards of a project and the sprints of a board stay cached for
+# all users of a Jira site (api.site_metadata)
+JIRA_SITE_METADATA_TTL = int(os.getenv("JIRA_SITE_METADATA_TTL", "300"))
+
+######################################################################
+# Background jobs
+######################################################################
+# Run by `manage.py jobworker` (api.jobs). Idle workers check for due jobs
+# every JOB_POLL_INTERVAL seconds
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+
+# Runs of a failing job before it is marked failed; retry n waits about
+# JOB_RETRY_BASE_DELAY * 2^(n-1) seconds, at most JOB_RETRY_MAX_DELAY
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", "10"))
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", "600"))
+
+# Time budget of one job; a job running longer is presumed to have lost its
+# worker and is queued again
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "300"))
+
+# Finished jobs are deleted after JOB_RETENTION_DAYS; workers look for stale
+# and old jobs every JOB_MAINTENANCE_INTERVAL seconds
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+JOB_MAINTENANCE_INTERVAL = float(os.getenv("JOB_MAINTENANCE_INTERVAL", "60"))
+
+# A request that finds its Jira token expiring within JIRA_TOKEN_REFRESH_WINDOW
+# seconds queues a job to refresh it just before expiry; tokens of idle users
+# are left to expire and are refreshed by their next request
+JIRA_TOKEN_REFRESH_WINDOW = int(os.getenv("JIRA_TOKEN_REFRESH_WINDOW", "1200"))
+
+######################################################################
+# Logging and metrics
+######################################################################
+# Level of the api.* loggers; DEBUG adds per-call detail of the Jira client
+API_LOG_LEVEL = os.getenv("API_LOG_LEVEL", "INFO")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "default": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "default"},
+    },
+    "loggers": {
+        "api": {"handlers": ["console"], "level": API_LOG_LEVEL, "propagate": False},
+    },
+}
+
+# Bearer token required by the /metrics endpoint. Without one the endpoint is
+# closed unless METRICS_PUBLIC is set (the default with DEBUG); keep a public
+# endpoint off the public ingress
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "1" if DEBUG else "0") == "1"
+
+# Metrics are kept per process, and exported with a pid label. Processes that
+# share METRICS_DIR (gunicorn.conf.py sets one for its workers) write their
+# samples there every METRICS_FLUSH_INTERVAL seconds, and a scrape of any of
+# them exports all of them
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+# Request tracing (span tree of views, services, Jira, OpenAI and DB calls):
+# the share of requests traced, a JSON lines file the traces are appended to,
+# and whether "X-Trace: 1" requests get their trace in the X-Trace header
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_DEBUG_HEADER = os.getenv("TRACE_DEBUG_HEADER", "1" if DEBUG else "0") == "1"
+
+# Request profiling: the share of requests run under the sampling profiler
+# (staff can ask for any request with "X-Profile: 1") and the sampling
+# interval in milliseconds. Profiles are kept as RequestProfile rows
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "5"))
 
 ######################################################################
 # Unfold
@@ -183,6 +415,16 @@ UNFOLD = {
                         "icon": "link",
                         "link": reverse_lazy("admin:api_jiraintegration_changelist"),
                     },
+                    {
+                        "title": _("Request Profiles"),
+                        "icon": "speed",
+                        "link": reverse_lazy("admin:api_requestprofile_changelist"),
+                    },
+                    {
+                        "title": _("Jobs"),
+                        "icon": "schedule",
+                        "link": reverse_lazy("admin:api_job_changelist"),
+                    },
                 ],
             },
         ],
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .cache import scope
+from .catalog import invalidate_catalog
+from .instrumentation import time_query
+from .models import JiraIntegration
+from .services import dashboard_cache
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=JiraIntegration)
+def invalidate_cached_integration(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_delete, sender=JiraIntegration)
+def invalidate_cached_jira_data(sender, instance, **kwargs):
+    # A reconnected site starts from fresh data
+    invalidate_catalog(instance.cloud_id, instance.user_id)
+    dashboard_cache.invalidate(scope(instance.cloud_id, instance.user_id))
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Fired again when the same connection object reconnects
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
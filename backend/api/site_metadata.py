@@ -0,0 +1,52 @@
+"""
+Jira metadata that is the same for every user of a site, cached per cloud_id.
+
+The boards of a project and the sprints of a board are fetched once per site
+and served to all its users. Visibility is checked by the callers: they only
+ask for projects from the user's own project listing or catalog, which Jira
+has already filtered by the user's permissions, and for boards returned for
+such a project. Issues (sprint contents, counts) are still fetched per user.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .cache import TieredCache, scope
+
+site_cache = TieredCache("site", settings.JIRA_SITE_METADATA_TTL)
+
+
+def boards(jira, project_key: str):
+    """Boards of a project the user can see"""
+    return _cached(
+        jira, f"boards:{project_key}", lambda: jira.boards(projectKeyOrId=project_key)
+    )
+
+
+def sprints(jira, board_id, state=None):
+    """Sprints of a board returned by boards()"""
+    return _cached(
+        jira,
+        f"sprints:{board_id}:{state or 'all'}",
+        lambda: jira.sprints(board_id, state=state),
+    )
+
+
+async def aboards(jira, project_key: str):
+    """boards() for an AsyncOAuthJira client"""
+    cloud_id = getattr(jira, "cloud_id", None)
+    if cloud_id is None:
+        return await jira.boards(projectKeyOrId=project_key)
+    site, key = scope(cloud_id), f"boards:{project_key}"
+    result = await sync_to_async(site_cache.get)(site, key)
+    if result is None:
+        result = await jira.boards(projectKeyOrId=project_key)
+        await sync_to_async(site_cache.set)(site, key, result)
+    return result
+
+
+def _cached(jira, key: str, fetch):
+    cloud_id = getattr(jira, "cloud_id", None)
+    if cloud_id is None:
+        return fetch()
+    return site_cache.get_or_set(scope(cloud_id), key, fetch)
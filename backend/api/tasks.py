@@ -0,0 +1,76 @@
+"""Handlers of background jobs (see api.jobs); the jobworker command imports this module"""
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import TTLCache
+from .jobs import enqueue, job
+from .models import JiraIntegration
+from .services import JiraOAuthService
+
+# Seconds before expiry to refresh a token: inside ensure_fresh_token's five
+# minute window, so requests find it already refreshed
+TOKEN_REFRESH_LEAD = 240
+
+# Refreshes this process already queued, by dedup key
+_scheduled_refreshes = TTLCache("token_refresh_scheduled", ttl=3600, maxsize=10000)
+
+
+@job("jira.refresh_token")
+def refresh_token(integration_id: int):
+    integration = JiraIntegration.objects.filter(
+        pk=integration_id, is_active=True
+    ).first()
+    if integration is not None:
+        JiraOAuthService.ensure_fresh_token(integration)
+
+
+def schedule_token_refresh(integration: JiraIntegration):
+    """
+    Queue the refresh of the integration's access token for shortly before it
+    expires, once it expires within JIRA_TOKEN_REFRESH_WINDOW.
+
+    Called whenever a request uses the integration, so only tokens of users
+    active in the last few minutes of a token's life are refreshed ahead; an
+    idle integration refreshes on its next request instead.
+    """
+    remaining = (integration.expires_at - timezone.now()).total_seconds()
+    if not integration.is_active or remaining > settings.JIRA_TOKEN_REFRESH_WINDOW:
+        return
+    # One job per token
+    dedup_key = (
+        f"jira.refresh_token:{integration.pk}:{int(integration.expires_at.timestamp())}"
+    )
+    if _scheduled_refreshes.get(dedup_key, None):
+        return
+    enqueue(
+        "jira.refresh_token",
+        {"integration_id": integration.pk},
+        priority=10,
+        dedup_key=dedup_key,
+        delay=max(0, remaining - TOKEN_REFRESH_LEAD),
+    )
+    _scheduled_refreshes.set(dedup_key, True, ttl=max(remaining, 1))
+
+
+@job("jira.warm_dashboard")
+def warm_dashboard(user_id: int):
+    """Fill the user's dashboard snapshot, and with it the catalog and site caches the chat tools use"""
+    integration = JiraIntegration.objects.filter(
+        user_id=user_id, is_active=True
+    ).first()
+    if integration is not None:
+        JiraOAuthService.get_dashboard_snapshot(integration)
+
+
+def schedule_dashboard_warmup(user):
+    """Queue warm_dashboard for the user; a warmup already queued or running for them is reused"""
+    enqueue(
+        "jira.warm_dashboard",
+        {"user_id": user.pk},
+        # Ahead of other work: the user is waiting for the dashboard
+        priority=20,
+        dedup_key=f"jira.warm_dashboard:{user.pk}",
+        # A retry minutes later would be too late to help
+        max_attempts=1,
+    )
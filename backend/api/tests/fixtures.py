@@ -10,3 +10,11 @@ def api_client():
 @pytest.fixture
 def regular_user(user_factory):
     return user_factory.create(is_active=False)
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    from api.authentication import integration_cache, user_cache
+
+    user_cache.clear()
+    integration_cache.clear()
@@ -1,6 +1,7 @@
 import pytest
 from django.urls import reverse
 from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
 
 
 @pytest.mark.django_db
@@ -14,3 +15,58 @@ def test_api_users_me_authorized(api_client, regular_user):
     api_client.force_authenticate(user=regular_user)
     response = api_client.get(reverse("api-users-me"))
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_api_chat_message_async_unauthorized(client):
+    response = client.post(reverse("api-chat-message-async"), {"message": "hi"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_api_chat_message_async_requires_message(client, user_factory):
+    user = user_factory.create(is_active=True)
+    token = RefreshToken.for_user(user).access_token
+    response = client.post(
+        reverse("api-chat-message-async"),
+        {},
+        content_type="application/json",
+        HTTP_AUTHORIZATION=f"Bearer {token}",
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("body", ["[]", '"hi"', "null"])
+def test_api_chat_message_async_rejects_non_object_bodies(client, user_factory, body):
+    user = user_factory.create(is_active=True)
+    token = RefreshToken.for_user(user).access_token
+    response = client.post(
+        reverse("api-chat-message-async"),
+        body,
+        content_type="application/json",
+        HTTP_AUTHORIZATION=f"Bearer {token}",
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_api_jira_status_reuses_cached_rows(
+    client, user_factory, django_assert_num_queries
+):
+    user = user_factory.create(is_active=True)
+    token = RefreshToken.for_user(user).access_token
+    url = reverse("api-jira-integration-status")
+
+    response = client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    # User and (missing) integration come from the in-process cache
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    # Saving the user drops the cached row
+    user.save()
+    with django_assert_num_queries(2):
+        client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
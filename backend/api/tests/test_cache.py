@@ -0,0 +1,165 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from api import metrics
+from api.cache import TieredCache, TTLCache, scope
+from api.catalog import get_catalog, invalidate_catalog
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def unique_scope(user_id=None):
+    return scope(uuid.uuid4().hex, user_id)
+
+
+def test_ttl_cache_expires_and_evicts():
+    cache = TTLCache("test", ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=0)
+    assert cache.get("a", None) == 1
+    assert cache.get("b", None) is None
+
+    cache.set("c", 3)
+    cache.get("a")
+    cache.set("d", 4)
+    # "c" was the least recently used
+    assert cache.get("c", None) is None
+    assert cache.get("a", None) == 1
+    assert len(cache) == 2
+
+
+@pytest.mark.django_db
+def test_values_are_shared_between_processes():
+    site = unique_scope()
+    # Two instances of the same cache stand in for two worker processes
+    first, second = TieredCache("shared", ttl=60), TieredCache("shared", ttl=60)
+    first.set(site, "projects", ["ALPHA"])
+
+    assert second.get(site, "projects") == ["ALPHA"]
+    assert second.get(site, "projects") == ["ALPHA"]
+    lookups = metrics.registry()["cache_lookups_total"].samples()
+    assert lookups[("shared", "l2", "hit")] == 1
+    assert lookups[("shared", "l1", "hit")] >= 1
+    assert second.get(site, "boards", "none") == "none"
+
+
+@pytest.mark.django_db
+def test_scopes_are_separate():
+    cache = TieredCache("scopes", ttl=60)
+    alice, bob = unique_scope(1), unique_scope(2)
+    cache.set(alice, "projects", ["ALPHA"])
+
+    assert cache.get(bob, "projects") is None
+    assert cache.get(alice, "projects") == ["ALPHA"]
+
+
+@pytest.mark.django_db
+def test_invalidate_drops_the_whole_scope():
+    site, other = unique_scope(), unique_scope()
+    first, second = TieredCache("versioned", ttl=60), TieredCache("versioned", ttl=60)
+    first.set(site, "projects", ["ALPHA"])
+    first.set(site, "boards", ["Board"])
+    first.set(other, "projects", ["BETA"])
+    assert second.get(site, "projects") == ["ALPHA"]
+
+    first.invalidate(site)
+
+    assert first.get(site, "projects") is None
+    assert first.get(site, "boards") is None
+    assert first.get(other, "projects") == ["BETA"]
+    # The other process picks up the new version once its copy expires
+    assert second.get(site, "projects") == ["ALPHA"]
+    second._versions.clear()
+    assert second.get(site, "projects") is None
+
+
+@pytest.mark.django_db
+def test_l1_copy_does_not_outlive_the_shared_entry():
+    site = unique_scope()
+    cache = TieredCache("short", ttl=60)
+    cache.set(site, "projects", ["ALPHA"], ttl=0.05)
+    time.sleep(0.1)
+
+    assert cache.get(site, "projects") is None
+
+
+def test_get_or_set_computes_once_per_process(settings):
+    settings.CACHES = LOCMEM
+    cache = TieredCache("stampede", ttl=60)
+    site = unique_scope()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"total": 42}
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_set(site, "total", compute))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == [{"total": 42}] * 8
+    assert cache._fill_locks == {}
+
+
+def test_get_or_set_waits_for_another_process(settings):
+    settings.CACHES = LOCMEM
+    settings.CACHE_LOCK_POLL_INTERVAL = 0.01
+    site = unique_scope()
+    cache, other = TieredCache("waiting", ttl=60), TieredCache("waiting", ttl=60)
+    # The other process holds the lock while it computes the value
+    assert cache.shared.add(f"{cache._key(site, 'total')}:lock", 1)
+    threading.Timer(0.1, lambda: other.set(site, "total", 7)).start()
+
+    assert cache.get_or_set(site, "total", lambda: pytest.fail("computed twice")) == 7
+
+
+def test_get_or_set_computes_when_the_holder_gives_up(settings):
+    settings.CACHES = LOCMEM
+    settings.CACHE_LOCK_POLL_INTERVAL = 0.01
+    site = unique_scope()
+    cache = TieredCache("abandoned", ttl=60)
+    lock_key = f"{cache._key(site, 'total')}:lock"
+    cache.shared.add(lock_key, 1)
+    threading.Timer(0.05, lambda: cache.shared.delete(lock_key)).start()
+
+    assert cache.get_or_set(site, "total", lambda: 3) == 3
+    assert cache.get(site, "total") == 3
+
+
+@pytest.mark.django_db
+def test_project_catalog():
+    cloud_id = uuid.uuid4().hex
+    catalog = get_catalog(cloud_id, 1)
+    assert not catalog.is_fresh
+
+    catalog.load([{"id": "10000", "key": "ALPHA", "name": "Alpha"}, {"name": "No key"}])
+    catalog.add({"id": "10001", "key": "BETA", "name": "Beta"})
+    catalog.set_total("ALPHA", 12)
+
+    # Catalogs are views of the shared cache, not per-object state
+    catalog = get_catalog(cloud_id, 1)
+    assert catalog.is_fresh
+    assert catalog.get("ALPHA")["name"] == "Alpha"
+    assert catalog.get("10000")["key"] == "ALPHA"
+    assert catalog.get("10001")["key"] == "BETA"
+    assert catalog.get("GAMMA") is None
+    assert catalog.total("ALPHA") == 12
+    assert get_catalog(cloud_id, 2).get("ALPHA") is None
+
+    invalidate_catalog(cloud_id, 1)
+    assert not catalog.is_fresh
+    assert catalog.get("BETA") is None
+    assert catalog.total("ALPHA") is None
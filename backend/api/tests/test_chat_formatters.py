@@ -0,0 +1,66 @@
+from api.chat_formatters import matches_template, render_fast_path
+from api.tool_results import compact_tool_result
+
+
+def test_matches_template():
+    assert matches_template("get_user_issues", "What issues are assigned to me?")
+    assert matches_template("get_projects", "Show me projects I'm working on")
+    assert not matches_template("get_projects", "Which projects are at risk?")
+    assert not matches_template("get_boards", "Show me projects I'm working on")
+
+
+def test_render_fast_path_issues():
+    result = compact_tool_result(
+        {
+            "issues": [
+                {
+                    "key": "DEMO-1",
+                    "summary": "Fix login",
+                    "status": "To Do",
+                    "priority": "High",
+                    "project": "Demo",
+                    "updated": "2025-10-01",
+                },
+            ]
+        }
+    )
+
+    reply = render_fast_path(
+        "get_user_issues",
+        {"status": None, "limit": None},
+        "What issues are assigned to me?",
+        result,
+    )
+
+    assert reply == (
+        "You have 1 issue assigned to you:\n\n"
+        "- **DEMO-1** Fix login — To Do, High priority (Demo)"
+    )
+
+
+def test_render_fast_path_skips_errors():
+    result = '{"error": "No Jira integration found."}'
+    assert render_fast_path("get_projects", {}, "list my projects", result) is None
+
+
+def test_render_fast_path_says_when_only_a_page_is_shown():
+    issues = [
+        {"key": f"DEMO-{n}", "summary": "Task", "status": "To Do", "project": "Demo"}
+        for n in range(2)
+    ]
+    result = compact_tool_result({"issues": issues, "total": 30})
+    reply = render_fast_path(
+        "get_user_issues",
+        {"status": None, "limit": None},
+        "What issues are assigned to me?",
+        result,
+    )
+    assert reply.startswith(
+        "You have 30 issues assigned to you; here are the 2 most recently updated:"
+    )
+
+    result = compact_tool_result(
+        {"projects": [{"key": "DEMO", "name": "Demo"}], "total": 12}
+    )
+    reply = render_fast_path("get_projects", {}, "list my projects", result)
+    assert reply.startswith("You have 12 projects; here are the first 1:")
@@ -0,0 +1,101 @@
+from api.chat_router import (
+    classify,
+    default_routes,
+    record_turn,
+    route_seconds,
+    route_turn,
+)
+from api.prefetch import JiraPrefetch
+
+
+def test_classify():
+    assert classify("What issues are assigned to me?") == "listing"
+    assert classify("Show me projects I'm working on") == "listing"
+    assert classify("What's the status of DEMO-12?") == "lookup"
+    assert classify("Anything about the login bug?") == "lookup"
+    assert classify("Which of my projects are at risk and why?") == "full"
+    assert classify("Hello!") == "full"
+
+
+def test_route_turn_selects_tools(settings):
+    settings.CHAT_ROUTER_ENABLED = True
+    route = route_turn([{"role": "user", "content": "list my boards"}])
+    tools = [{"function": {"name": name}} for name in ("get_boards", "search_issues")]
+
+    assert route.name == "listing"
+    assert route.max_tokens < 2000
+    assert route.select_tools(tools) == [{"function": {"name": "get_boards"}}]
+
+
+class FakeJira:
+    def __init__(self, calls=None, sessions=None):
+        self.calls = [] if calls is None else calls
+        self.sessions = [] if sessions is None else sessions
+        self.session = object()
+
+    def isolated_client(self):
+        return FakeJira(self.calls, self.sessions)
+
+    def myself(self):
+        self.calls.append("myself")
+        self.sessions.append(self.session)
+        return {"emailAddress": "sample@example.com"}
+
+    def projects(self):
+        self.calls.append("projects")
+        self.sessions.append(self.session)
+        return []
+
+    def jql(self, jql, **kwargs):
+        self.calls.append("jql")
+        self.sessions.append(self.session)
+        return {"issues": []}
+
+
+def test_routes_prefetch_only_what_their_tools_use(monkeypatch):
+    jira = FakeJira()
+    monkeypatch.setattr(JiraPrefetch, "_connect", lambda self: jira)
+    routes = default_routes()
+
+    lookup = JiraPrefetch(None).start(
+        routes["lookup"].prefetch_for("What's the status of DEMO-12?")
+    )
+    assert lookup.client() is jira
+    assert set(lookup._futures) == {"client"}
+
+    # A listing turn loads the one listing it asks for
+    issues = JiraPrefetch(None).start(
+        routes["listing"].prefetch_for("What issues are assigned to me?")
+    )
+    assert issues.take("user_issues", lambda: None) == {"issues": []}
+    assert set(issues._futures) == {"client", "myself", "user_issues"}
+    projects = JiraPrefetch(None).start(
+        routes["listing"].prefetch_for("Show me projects I'm working on")
+    )
+    assert projects.take("projects", lambda: None) == []
+    assert set(projects._futures) == {"client", "projects"}
+    assert set(
+        JiraPrefetch(None)
+        .start(routes["listing"].prefetch_for("list my boards"))
+        ._futures
+    ) == {"client"}
+    assert sorted(jira.calls) == ["jql", "myself", "projects"]
+
+    # Prefetches don't share a session with each other or with the turn's tool calls
+    assert len(set(map(id, jira.sessions))) == 3
+    assert jira.session not in jira.sessions
+
+    # Open-ended turns often need no Jira at all
+    assert routes["full"].prefetch_for("Hello!") == ()
+
+
+def test_routes_are_built_once_and_timed(settings):
+    settings.CHAT_ROUTER_ENABLED = True
+    messages = [{"role": "user", "content": "Hello!"}]
+    route = route_turn(messages)
+    assert route is route_turn(messages)
+    assert route.model == settings.CHAT_MODEL
+
+    before = route_seconds.count(route="full")
+    record_turn(route, 1.5)
+    assert route_seconds.count(route="full") == before + 1
@@ -0,0 +1,139 @@
+import asyncio
+import time
+import uuid
+
+import httpx
+import pytest
+import requests
+
+from api import deadlines
+from api.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    get_breaker,
+    is_site_failure,
+)
+from api.models import JiraIntegration
+from api.services import AsyncOAuthJira, JiraOAuthService
+
+
+def _wait_for(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_breaker_opens_and_fails_fast():
+    breaker = CircuitBreaker("site:1", failure_threshold=2, reset_timeout=60)
+    breaker.before_call()
+    breaker.record_failure(ValueError("token revoked"))
+    assert breaker.state == CLOSED
+    breaker.record_failure(ValueError("token revoked"))
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError, match="token revoked"):
+        breaker.before_call(
+            probe=lambda: pytest.fail("probed before the reset timeout")
+        )
+
+
+def test_background_probe_closes_breaker():
+    breaker = CircuitBreaker("site:2", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure(ValueError("site down"))
+    probes = []
+
+    # The call that starts the probe still fails fast
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(probe=lambda: probes.append(1))
+
+    assert breaker.state in (HALF_OPEN, CLOSED)
+    assert _wait_for(lambda: breaker.state == CLOSED)
+    assert probes == [1]
+    breaker.before_call()
+
+
+def test_async_connect_failures_open_the_breaker(settings, monkeypatch):
+    settings.JIRA_BREAKER_FAILURE_THRESHOLD = 2
+    integration = JiraIntegration(
+        pk=1, cloud_id=uuid.uuid4().hex, site_url="https://example.atlassian.net"
+    )
+
+    def ensure_fresh_token(cls, integration):
+        raise ValueError("Token refresh failed. User needs to re-authenticate.")
+
+    monkeypatch.setattr(
+        JiraOAuthService, "ensure_fresh_token", classmethod(ensure_fresh_token)
+    )
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="re-authenticate"):
+            asyncio.run(
+                JiraOAuthService.get_async_jira_client(integration, client=None)
+            )
+
+    assert get_breaker(integration).state == OPEN
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(JiraOAuthService.get_async_jira_client(integration, client=None))
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def test_only_site_failures_count():
+    assert is_site_failure(requests.ConnectionError("connection refused"))
+    assert is_site_failure(_http_error(503))
+    assert is_site_failure(_http_error(401))
+    assert not is_site_failure(_http_error(404))
+    assert not is_site_failure(deadlines.DeadlineExceeded())
+    with deadlines.deadline(0):
+        # The caller's own budget ran out, not Jira
+        assert not is_site_failure(requests.ReadTimeout("read timed out"))
+
+
+def test_async_jira_calls_feed_the_breaker(settings):
+    settings.JIRA_HEDGING_ENABLED = False
+    breaker = CircuitBreaker("site:async", failure_threshold=2, reset_timeout=60)
+    answers = []
+
+    def handler(request):
+        answer = answers.pop(0) if answers else 200
+        if answer == "down":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(answer, json={"accountId": "1"})
+
+    async def call():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            jira = AsyncOAuthJira(
+                "https://example.atlassian.net",
+                "token",
+                "cloud",
+                client,
+                breaker=breaker,
+            )
+            try:
+                return await jira.myself()
+            except Exception:
+                return None
+
+    # Not found on both URLs: Jira is up, the request was wrong
+    answers[:] = [404, 404]
+    asyncio.run(call())
+    assert breaker.failures == 0
+
+    answers[:] = ["down", "down"]
+    asyncio.run(call())
+    assert breaker.failures == 1 and breaker.state == CLOSED
+    assert asyncio.run(call()) == {"accountId": "1"}
+    assert breaker.failures == 0
+
+    answers[:] = ["down"] * 4
+    asyncio.run(call())
+    asyncio.run(call())
+    assert breaker.state == OPEN
@@ -0,0 +1,123 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import api, jobs
+from api.catalog import get_catalog
+from api.models import JiraIntegration, Job
+from api.services import JiraOAuthService
+
+DASHBOARD = {
+    "projects": [{"id": "10000", "key": "ALPHA", "name": "Alpha"}],
+    "stats": {"total_projects": 1},
+}
+
+
+def _connect_jira(user):
+    return JiraIntegration.objects.create(
+        user=user,
+        expires_at=timezone.now() + timedelta(hours=1),
+        cloud_id=uuid.uuid4().hex,
+        site_url="https://example.atlassian.net",
+        site_name="Example",
+    )
+
+
+@pytest.mark.django_db
+def test_token_obtain_queues_dashboard_warmup(client, user_factory):
+    user = user_factory.create()
+    user.set_password("correct horse")
+    user.save()
+    _connect_jira(user)
+    url = reverse("token_obtain_pair")
+
+    response = client.post(
+        url, {"username": user.username, "password": "correct horse"}
+    )
+    assert response.status_code == 200
+    assert "access" in response.json()
+    # Logging in again while the warmup is queued doesn't add another
+    client.post(url, {"username": user.username, "password": "correct horse"})
+    assert (
+        client.post(url, {"username": user.username, "password": "wrong"}).status_code
+        == 401
+    )
+
+    warmup = Job.objects.get(name="jira.warm_dashboard")
+    assert warmup.payload == {"user_id": user.pk}
+    assert warmup.priority == 20
+
+
+@pytest.mark.django_db
+def test_login_skips_the_warmup_without_jira_and_survives_queue_errors(
+    client, user_factory, monkeypatch
+):
+    user = user_factory.create()
+    user.set_password("correct horse")
+    user.save()
+    url = reverse("token_obtain_pair")
+
+    assert (
+        client.post(
+            url, {"username": user.username, "password": "correct horse"}
+        ).status_code
+        == 200
+    )
+    assert not Job.objects.exists()
+
+    _connect_jira(user)
+
+    def schedule_dashboard_warmup(user):
+        raise RuntimeError("queue unavailable")
+
+    monkeypatch.setattr(api, "schedule_dashboard_warmup", schedule_dashboard_warmup)
+    assert (
+        client.post(
+            url, {"username": user.username, "password": "correct horse"}
+        ).status_code
+        == 200
+    )
+
+
+@pytest.mark.django_db
+def test_connecting_jira_queues_dashboard_warmup(user):
+    JiraOAuthService.create_or_update_integration(
+        user,
+        {"access_token": "access", "refresh_token": "refresh", "expires_in": 3600},
+        [{"id": "cloud-1", "url": "https://example.atlassian.net", "name": "Example"}],
+    )
+
+    assert Job.objects.get(name="jira.warm_dashboard").payload == {"user_id": user.pk}
+
+
+@pytest.mark.django_db
+def test_dashboard_is_served_from_the_warmed_snapshot(client, user, monkeypatch):
+    cloud_id = _connect_jira(user).cloud_id
+    fetches = []
+
+    def get_dashboard_data(cls, integration):
+        fetches.append(integration.pk)
+        return DASHBOARD
+
+    monkeypatch.setattr(
+        JiraOAuthService, "get_dashboard_data", classmethod(get_dashboard_data)
+    )
+
+    jobs.enqueue("jira.warm_dashboard", {"user_id": user.pk}, priority=20)
+    assert jobs.run(jobs.claim("worker")[0]) == "done"
+    assert len(fetches) == 1
+    assert get_catalog(cloud_id, user.pk).get("ALPHA")["name"] == "Alpha"
+
+    url = reverse("api-jira-integration-dashboard-data")
+    token = RefreshToken.for_user(user).access_token
+    response = client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert response.status_code == 200
+    assert response.json() == DASHBOARD
+    assert len(fetches) == 1
+
+    client.get(f"{url}?refresh=1", HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert len(fetches) == 2
@@ -0,0 +1,51 @@
+import json
+import os
+
+import pytest
+from django.db import OperationalError, connection
+from django.test import RequestFactory
+from psycopg_pool import PoolTimeout
+
+from api import metrics
+from api.instrumentation import db_pools
+from api.middleware import DatabasePoolMiddleware
+
+
+@pytest.mark.django_db
+def test_queries_use_the_pool():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+    pool = db_pools()["default"]
+    assert pool.get_stats()["pool_max"] == 8
+    assert (
+        f'db_pool_connections_in_use{{pid="{os.getpid()}",alias="default"}}'
+        in metrics.exposition()
+    )
+    assert metrics.registry()["db_pool_requests_total"].samples()[("default",)] >= 1
+
+
+def test_exhausted_pool_answers_503():
+    middleware = DatabasePoolMiddleware(lambda request: None)
+    request = RequestFactory().get("/api/users/me/")
+    try:
+        try:
+            raise PoolTimeout("couldn't get a connection after 5.00 sec")
+        except PoolTimeout as e:
+            raise OperationalError(str(e)) from e
+    except OperationalError as e:
+        response = middleware.process_exception(request, e)
+
+    assert response.status_code == 503
+    assert response["Retry-After"] == "1"
+    assert json.loads(response.content) == {
+        "detail": "The service is busy, please retry."
+    }
+
+    # Other database errors stay 500s
+    assert (
+        middleware.process_exception(
+            request, OperationalError("server closed the connection")
+        )
+        is None
+    )
@@ -0,0 +1,53 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from api import deadlines
+from api.chat_service import AsyncChatService
+
+
+def test_timeout_follows_deadline():
+    assert deadlines.timeout(15) == 15
+    with deadlines.deadline(5):
+        assert 4 < deadlines.timeout(15) <= 5
+        # A nested deadline never extends the outer one
+        with deadlines.deadline(60):
+            assert deadlines.timeout(15) <= 5
+        with deadlines.reserve(10):
+            assert deadlines.expired()
+            with pytest.raises(deadlines.DeadlineExceeded):
+                deadlines.timeout(15)
+    assert deadlines.remaining() is None
+
+
+def test_slow_tool_calls_are_reported_as_timed_out(settings):
+    settings.OPENAI_API_KEY = "test"
+    service = AsyncChatService()
+    service.answer_reserve = 0
+
+    async def execute(user, jira, function_name, arguments, prefetch=None):
+        if function_name == "get_boards":
+            await asyncio.sleep(10)
+        return json.dumps({"projects": []})
+
+    async def client():
+        return None
+
+    service.aexecute_jira_function = execute
+    tool_calls = [
+        SimpleNamespace(function=SimpleNamespace(name=name, arguments="{}"))
+        for name in ("get_projects", "get_boards")
+    ]
+
+    async def run():
+        with deadlines.deadline(0.2):
+            return await service._execute_tool_calls(
+                None, tool_calls, None, SimpleNamespace(client=client)
+            )
+
+    projects, boards = asyncio.run(run())
+
+    assert json.loads(projects) == {"projects": []}
+    assert json.loads(boards)["timed_out"] is True
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api import hedging
+
+
+def _prime(site, settings, samples=100):
+    settings.JIRA_HEDGING_ENABLED = True
+    settings.JIRA_HEDGE_BUDGET = 1.0
+    latency = hedging.get_site(site)
+    for _ in range(samples):
+        latency.record(0.01)
+    return latency
+
+
+def test_slow_get_is_answered_by_the_hedge(settings):
+    _prime("hedge-slow", settings)
+    calls = []
+
+    def fetch():
+        calls.append(threading.current_thread())
+        if len(calls) == 1:
+            # The primary does answer, but only after a long stall
+            time.sleep(1.0)
+            return "primary"
+        return "hedge"
+
+    started = time.monotonic()
+    assert (
+        hedging.hedged(
+            "hedge-slow", lambda: pytest.fail("read on the calling thread"), fetch
+        )
+        == "hedge"
+    )
+    assert time.monotonic() - started < 0.5
+    assert threading.current_thread() not in calls
+    assert hedging.hedges_sent.value(site="hedge-slow") == 1
+    assert hedging.hedges_won.value(site="hedge-slow") == 1
+
+
+def test_failing_slow_get_is_answered_by_the_hedge(settings):
+    _prime("hedge-sync", settings)
+    calls = []
+
+    def fetch():
+        calls.append(None)
+        if len(calls) == 1:
+            # The primary hangs until its read timeout
+            time.sleep(0.2)
+            raise ConnectionError("Read timed out")
+        return "hedge"
+
+    assert hedging.hedged("hedge-sync", fetch) == "hedge"
+    assert hedging.hedges_sent.value(site="hedge-sync") == 1
+    assert hedging.hedges_won.value(site="hedge-sync") == 1
+
+
+def test_fast_get_is_not_hedged(settings):
+    _prime("hedge-fast", settings)
+
+    calls = []
+
+    def fetch():
+        calls.append(None)
+        return "ok"
+
+    def fail():
+        calls.append(None)
+        return int("not found")
+
+    assert hedging.hedged("hedge-fast", fetch) == "ok"
+    with pytest.raises(ValueError):
+        hedging.hedged("hedge-fast", fail)
+    time.sleep(0.05)
+    assert len(calls) == 2
+    assert hedging.hedges_sent.value(site="hedge-fast") == 0
+
+
+def test_hedges_stay_within_budget(settings):
+    latency = _prime("hedge-budget", settings)
+    settings.JIRA_HEDGE_BUDGET = 0.5
+    latency.budget_ratio = 0.5
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        return [await hedging.ahedged("hedge-budget", fetch) for _ in range(4)]
+
+    assert asyncio.run(run()) == ["ok"] * 4
+    assert hedging.hedges_sent.value(site="hedge-budget") == 2
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+# SDKs only chat turns and Jira connects need; a worker must not load them to boot
+DEFERRED_PACKAGES = ("openai", "atlassian", "httpx", "pydantic")
+
+# Import time (ms) of the URLconf beyond Django itself: every module a worker
+# loads before it can serve /api/users/me/
+URLCONF_IMPORT_BUDGET_MS = 300
+
+
+def import_times(statement: str, **env) -> dict:
+    """Cumulative import time (us) per module, from python -X importtime"""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import django; django.setup(); {statement}",
+        ],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "api.settings", **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_urlconf_import_budget():
+    times = import_times("import api.urls")
+
+    assert [
+        module for module in times if module.split(".")[0] in DEFERRED_PACKAGES
+    ] == []
+    assert times["api.urls"] / 1000 < URLCONF_IMPORT_BUDGET_MS
+
+
+def test_deferred_imports_still_load():
+    times = import_times(
+        "from api.chat_service import ChatService; ChatService(); from api.jira_client import DeadlineJira",
+        OPENAI_API_KEY="test",
+    )
+
+    assert "openai" in times
+    assert "atlassian" in times
@@ -0,0 +1,50 @@
+from api.chat_service import ChatService
+from api.intents import match_intent
+from api.tool_results import compact_tool_result
+
+
+def test_match_intent():
+    assert (
+        match_intent("What issues are assigned to me?").function_name
+        == "get_user_issues"
+    )
+    assert (
+        match_intent("Show me projects I'm working on").function_name == "get_projects"
+    )
+    assert match_intent("what's on my plate").function_name == "get_user_issues"
+    assert match_intent("show me my in progress tasks").arguments == {
+        "status": "In Progress"
+    }
+    assert match_intent("Find all high priority bugs") is None
+    assert match_intent("Which projects are at risk?") is None
+    assert match_intent("hello") is None
+
+
+def test_chat_answers_intent_without_openai(settings, monkeypatch):
+    settings.OPENAI_API_KEY = "test"
+    settings.CHAT_LOCAL_INTENTS_ENABLED = True
+    service = ChatService()
+    calls = []
+
+    def execute(user, function_name, arguments, prefetch=None):
+        calls.append(function_name)
+        return compact_tool_result(
+            {
+                "boards": [
+                    {"id": 1, "name": "Demo board", "type": "scrum", "location": None}
+                ]
+            }
+        )
+
+    monkeypatch.setattr(service, "execute_jira_function", execute)
+    monkeypatch.setattr(service, "client", None)
+
+    reply = service.chat_with_jira_context(
+        None, [{"role": "user", "content": "list my boards"}]
+    )
+
+    assert calls == ["get_boards"]
+    assert reply == {
+        "content": "Here are your boards (1):\n\n- **Demo board** (scrum)",
+        "function_calls": 1,
+    }
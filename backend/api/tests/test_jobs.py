@@ -0,0 +1,195 @@
+import threading
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api import jobs
+from api.models import JiraIntegration, Job
+from api.services import JiraOAuthService
+
+calls = []
+
+
+@jobs.job("test.record")
+def record(value):
+    calls.append(value)
+
+
+@jobs.job("test.fail")
+def fail():
+    raise RuntimeError("Jira is down")
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db
+def test_enqueue_deduplicates_pending_jobs():
+    first = jobs.enqueue("test.record", {"value": 1}, dedup_key="sync:1")
+    assert jobs.enqueue("test.record", {"value": 2}, dedup_key="sync:1") == first
+    assert jobs.enqueue("test.record", {"value": 3}) != first
+
+    assert jobs.run(jobs.claim("worker")[0]) == "done"
+    # Once it ran, the key is free again
+    assert jobs.enqueue("test.record", {"value": 4}, dedup_key="sync:1") != first
+
+
+@pytest.mark.django_db
+def test_claim_takes_due_jobs_by_priority():
+    low = jobs.enqueue("test.record", {"value": "low"})
+    high = jobs.enqueue("test.record", {"value": "high"}, priority=10)
+    jobs.enqueue("test.record", {"value": "later"}, priority=20, delay=60)
+
+    claimed = jobs.claim("worker", limit=5)
+
+    assert claimed == [high, low]
+    assert claimed[0].status == Job.Status.RUNNING
+    assert claimed[0].attempts == 1
+    assert jobs.claim("worker") == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_claim_skips_jobs_locked_by_another_worker():
+    held = jobs.enqueue("test.record", {"value": 1})
+    free = jobs.enqueue("test.record", {"value": 2})
+    locked, release = threading.Event(), threading.Event()
+
+    def other_worker():
+        with transaction.atomic():
+            Job.objects.select_for_update().get(pk=held.pk)
+            locked.set()
+            release.wait(5)
+        connection.close()
+
+    thread = threading.Thread(target=other_worker)
+    thread.start()
+    locked.wait(5)
+    try:
+        assert jobs.claim("worker", limit=2) == [free]
+    finally:
+        release.set()
+        thread.join()
+
+
+@pytest.mark.django_db
+def test_failed_jobs_are_retried_with_backoff(settings):
+    settings.JOB_RETRY_BASE_DELAY = 10
+    job = jobs.enqueue("test.fail", max_attempts=2)
+
+    assert jobs.run(jobs.claim("worker")[0]) == "retry"
+    job.refresh_from_db()
+    assert job.status == Job.Status.QUEUED
+    assert timedelta(seconds=4) < job.run_at - timezone.now() <= timedelta(seconds=10)
+    assert "Jira is down" in job.last_error
+
+    Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+    assert jobs.run(jobs.claim("worker")[0]) == "failed"
+    job.refresh_from_db()
+    assert job.status == Job.Status.FAILED
+    assert job.attempts == 2
+
+
+@pytest.mark.django_db
+def test_retrying_failed_jobs_skips_keys_already_pending():
+    failed = [
+        jobs.enqueue("test.record", {"value": value}, dedup_key=f"sync:{value}")
+        for value in (1, 2)
+    ]
+    Job.objects.update(status=Job.Status.FAILED, finished_at=timezone.now())
+    pending = jobs.enqueue("test.record", {"value": 3}, dedup_key="sync:1")
+
+    assert jobs.retry_failed(Job.objects.all()) == (1, 1)
+    statuses = dict(Job.objects.values_list("pk", "status"))
+    assert statuses == {
+        failed[0].pk: Job.Status.FAILED,
+        failed[1].pk: Job.Status.QUEUED,
+        pending.pk: Job.Status.QUEUED,
+    }
+
+
+def test_backoff_grows_up_to_the_maximum(settings):
+    settings.JOB_RETRY_BASE_DELAY = 10
+    settings.JOB_RETRY_MAX_DELAY = 600
+
+    assert 5 <= jobs.backoff(1) <= 10
+    assert 20 <= jobs.backoff(3) <= 40
+    assert 300 <= jobs.backoff(20) <= 600
+
+
+@pytest.mark.django_db
+def test_jobs_of_a_lost_worker_run_again(settings):
+    settings.JOB_TIMEOUT = 60
+    job = jobs.enqueue("test.record", {"value": 1})
+    claimed = jobs.claim("dead-worker")[0]
+    Job.objects.filter(pk=job.pk).update(
+        locked_at=timezone.now() - timedelta(seconds=61)
+    )
+
+    assert jobs.requeue_stale() == 1
+    assert jobs.run(jobs.claim("worker")[0]) == "done"
+    # The lost worker can no longer record an outcome
+    jobs.run(claimed)
+    job.refresh_from_db()
+    assert job.locked_by == "worker"
+    assert job.attempts == 2
+
+
+# The worker drops connections between jobs, which a test transaction can't survive
+@pytest.mark.django_db(transaction=True)
+def test_work_runs_due_jobs_in_burst_mode():
+    jobs.enqueue("test.record", {"value": 1})
+    jobs.enqueue("test.record", {"value": 2}, priority=1)
+    jobs.enqueue("test.unknown")
+
+    assert jobs.work(threading.Event(), burst=True, worker="worker") == 3
+    assert calls == [2, 1]
+    unknown = Job.objects.get(name="test.unknown")
+    assert unknown.status == Job.Status.QUEUED
+    assert "No handler registered" in unknown.last_error
+
+
+def _integration(user, expires_in):
+    return JiraIntegration.objects.create(
+        user=user,
+        expires_at=timezone.now() + timedelta(seconds=expires_in),
+        cloud_id=uuid.uuid4().hex,
+        site_url="https://example.atlassian.net",
+        site_name="Example",
+    )
+
+
+@pytest.mark.django_db
+def test_token_refresh_is_scheduled_when_an_expiring_token_is_used(user, monkeypatch):
+    monkeypatch.setattr(
+        JiraOAuthService, "_connect", classmethod(lambda cls, integration: object())
+    )
+    integration = _integration(user, 600)
+
+    JiraOAuthService.get_jira_client(integration)
+    JiraOAuthService.get_jira_client(integration)
+
+    job = Job.objects.get(name="jira.refresh_token")
+    assert job.payload == {"integration_id": integration.pk}
+    assert timedelta(minutes=5) < job.run_at - timezone.now() < timedelta(minutes=6)
+
+
+@pytest.mark.django_db
+def test_token_refresh_is_not_scheduled_for_unused_or_fresh_tokens(user, monkeypatch):
+    monkeypatch.setattr(
+        JiraOAuthService, "_connect", classmethod(lambda cls, integration: object())
+    )
+    # Saving (e.g. by the refresh job itself) doesn't queue the next refresh
+    integration = _integration(user, 600)
+    integration.save()
+    assert not Job.objects.filter(name="jira.refresh_token").exists()
+
+    # A token with most of its life left is refreshed closer to expiry, if still in use
+    integration.expires_at = timezone.now() + timedelta(hours=1)
+    integration.save()
+    JiraOAuthService.get_jira_client(integration)
+    assert not Job.objects.filter(name="jira.refresh_token").exists()
@@ -0,0 +1,126 @@
+import json
+import os
+
+import pytest
+from django.urls import reverse
+
+from api import metrics
+from api.instrumentation import (
+    db_query_seconds,
+    endpoint_label,
+    jira_call,
+    jira_request_seconds,
+    record_response,
+)
+
+
+class FakeResponse:
+    status_code = 404
+    content = b'{"errorMessages": []}'
+
+
+def test_histogram_exposition():
+    histogram = metrics.Histogram(
+        "test_seconds", "Test durations", ("status",), buckets=(0.1, 1.0)
+    )
+    histogram.observe(0.05, status="ok")
+    histogram.observe(0.5, status="ok")
+    histogram.observe(3, status="ok")
+
+    assert histogram.count(status="ok") == 3
+    assert histogram.expose() == [
+        'test_seconds_bucket{status="ok",le="0.1"} 1',
+        'test_seconds_bucket{status="ok",le="1"} 2',
+        'test_seconds_bucket{status="ok",le="+Inf"} 3',
+        'test_seconds_sum{status="ok"} 3.55',
+        'test_seconds_count{status="ok"} 3',
+    ]
+
+
+def test_span_sets_status():
+    histogram = metrics.Histogram("test_span_seconds", "Test spans", ("status",))
+    with metrics.span(histogram):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.span(histogram):
+            raise RuntimeError
+
+    assert histogram.count(status="ok") == 1
+    assert histogram.count(status="error") == 1
+
+
+def test_jira_call_labels():
+    url = (
+        "https://api.atlassian.com/ex/jira/cloud-1/rest/api/2/project/DEMO?expand=lead"
+    )
+    assert endpoint_label(url) == "/rest/api/2/project/{id}"
+    assert (
+        endpoint_label("rest/agile/1.0/board/12/sprint")
+        == "/rest/agile/1.0/board/{id}/sprint"
+    )
+
+    labels = {
+        "endpoint": "/rest/api/2/project/{id}",
+        "cloud_id": "cloud-1",
+        "status": 404,
+    }
+    before = jira_request_seconds.count(**labels)
+    with jira_call(url, "cloud-1") as span:
+        record_response(span, FakeResponse())
+
+    assert jira_request_seconds.count(**labels) == before + 1
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client, settings, user_factory):
+    before = db_query_seconds.count(operation="INSERT")
+    user_factory()
+    assert db_query_seconds.count(operation="INSERT") > before
+
+    # Closed without a token unless made public
+    settings.METRICS_PUBLIC = False
+    assert client.get(reverse("metrics")).status_code == 403
+
+    settings.METRICS_PUBLIC = True
+    response = client.get(reverse("metrics"))
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    assert "# TYPE db_query_seconds histogram" in response.content.decode()
+    assert (
+        f'db_query_seconds_count{{pid="{os.getpid()}",operation="INSERT"}}'
+        in response.content.decode()
+    )
+
+    settings.METRICS_TOKEN = "secret"
+    assert client.get(reverse("metrics")).status_code == 401
+    assert (
+        client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret").status_code
+        == 200
+    )
+
+
+def test_exposition_includes_other_workers(tmp_path):
+    counter = metrics.counter(
+        "test_shared_total", "Test counter shared by workers", ("route",)
+    )
+    counter.inc(2, route="listing")
+    other = {
+        "test_shared_total": {
+            "type": "counter",
+            "description": "Test counter shared by workers",
+            "labelnames": ["route"],
+            "buckets": [],
+            "samples": [[["listing"], 5]],
+        },
+    }
+    (tmp_path / "1.json").write_text(json.dumps(other))
+
+    text = metrics.exposition(tmp_path)
+
+    assert f'test_shared_total{{pid="{os.getpid()}",route="listing"}} 2' in text
+    assert 'test_shared_total{pid="1",route="listing"} 5' in text
+    assert text.count("# TYPE test_shared_total counter") == 1
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+    metrics.remove_snapshot(tmp_path, 1)
+    assert 'pid="1"' not in metrics.exposition(tmp_path)
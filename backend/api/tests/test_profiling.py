@@ -0,0 +1,82 @@
+import time
+
+import pytest
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import RequestProfile
+from api.profiling import SamplingProfiler, hot_functions
+
+
+def busy_loop(seconds):
+    until = time.perf_counter() + seconds
+    while time.perf_counter() < until:
+        pass
+
+
+def test_sampling_profiler_folds_stacks():
+    profiler = SamplingProfiler(0.001).start()
+    busy_loop(0.2)
+    profiler.stop()
+
+    assert profiler.samples > 5
+    assert "test_profiling:busy_loop" in profiler.folded()
+    function, own, total = hot_functions(profiler.folded())[0]
+    assert function == "api.tests.test_profiling:busy_loop"
+    assert own == total
+
+
+def test_hot_functions():
+    folded = "main;handler;query 3\nmain;handler 1\nmain;render 2"
+    assert hot_functions(folded) == [
+        ("query", 3, 3),
+        ("render", 2, 2),
+        ("handler", 1, 4),
+        ("main", 0, 6),
+    ]
+
+
+@pytest.mark.django_db
+def test_staff_requests_are_profiled(client, user_factory):
+    url = reverse("api-jira-integration-status")
+    staff = user_factory.create(is_active=True, is_staff=True)
+    member = user_factory.create(
+        is_active=True, username="member@example.com", email="member@example.com"
+    )
+
+    token = RefreshToken.for_user(member).access_token
+    response = client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}", HTTP_X_PROFILE="1")
+    assert "X-Profile-Id" not in response
+    assert not RequestProfile.objects.exists()
+
+    token = RefreshToken.for_user(staff).access_token
+    response = client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}", HTTP_X_PROFILE="1")
+    profile = RequestProfile.objects.get(request_id=response["X-Profile-Id"])
+    assert profile.user == staff
+    assert profile.status_code == 404
+    assert profile.path == url
+
+
+@pytest.mark.django_db
+def test_admin_folded_download(admin_client):
+    profile = RequestProfile.objects.create(
+        request_id="abc123",
+        method="GET",
+        path="/api/",
+        status_code=200,
+        duration_ms=12.5,
+        interval_ms=5,
+        samples=2,
+        folded="main;handler 2",
+    )
+
+    response = admin_client.get(
+        reverse("admin:api_requestprofile_change", args=[profile.pk])
+    )
+    assert response.status_code == 200
+    assert b"<td>handler</td><td>2</td><td>2</td>" in response.content
+
+    response = admin_client.get(
+        reverse("admin:api_requestprofile_folded", args=[profile.pk])
+    )
+    assert response.content == b"main;handler 2"
@@ -0,0 +1,34 @@
+import io
+import json
+from datetime import UTC, datetime
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONParser, FastJSONRenderer
+
+
+def test_fast_renderer_matches_drf_renderer():
+    data = {
+        "summary": "Line separator ünïcode",
+        "updated": datetime(2025, 10, 1, 12, 30, tzinfo=UTC),
+        "story_points": Decimal("2.5"),
+        "counts": {1: "one"},
+    }
+
+    body = FastJSONRenderer().render(data)
+
+    assert b"\\u2028" in body
+    assert json.loads(body) == json.loads(JSONRenderer().render(data))
+    # Indented output is left to the standard renderer
+    assert FastJSONRenderer().render(
+        data, "application/json; indent=2"
+    ) == JSONRenderer().render(data, "application/json; indent=2")
+
+
+def test_fast_parser_round_trip():
+    body = FastJSONRenderer().render({"message": "hi", "conversation_history": []})
+    assert FastJSONParser().parse(io.BytesIO(body)) == {
+        "message": "hi",
+        "conversation_history": [],
+    }
@@ -0,0 +1,49 @@
+import gzip
+
+from django.test import RequestFactory
+
+from api.responses import conditional_json_response
+
+DATA = {
+    "issues": [
+        {"key": f"DEMO-{n}", "summary": "Fix the login timeout"} for n in range(50)
+    ]
+}
+
+
+def test_etag_and_not_modified():
+    factory = RequestFactory()
+    response = conditional_json_response(factory.get("/"), DATA)
+    etag = response["ETag"]
+
+    assert response.status_code == 200
+    assert etag.startswith('"') and not etag.startswith('"W/')
+    assert response["Cache-Control"] == "private, no-cache"
+
+    repeat = conditional_json_response(factory.get("/", HTTP_IF_NONE_MATCH=etag), DATA)
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+    assert repeat["ETag"] == etag
+
+    changed = conditional_json_response(
+        factory.get("/", HTTP_IF_NONE_MATCH=etag), {"issues": []}
+    )
+    assert changed.status_code == 200
+
+
+def test_gzip_negotiation(settings):
+    factory = RequestFactory()
+    response = conditional_json_response(
+        factory.get("/", HTTP_ACCEPT_ENCODING="gzip;q=1.0, br;q=0"), DATA
+    )
+
+    assert response["Content-Encoding"] == "gzip"
+    assert response["ETag"].endswith('-gzip"')
+    assert b"DEMO-49" in gzip.decompress(response.content)
+    assert "Accept-Encoding" in response["Vary"]
+
+    # Any representation's ETag revalidates the content
+    repeat = conditional_json_response(
+        factory.get("/", HTTP_IF_NONE_MATCH=response["ETag"]), DATA
+    )
+    assert repeat.status_code == 304
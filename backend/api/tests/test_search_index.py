@@ -0,0 +1,116 @@
+import time
+
+from api import search_index
+from api.search_index import IndexStore, IssueIndex
+
+
+def make_issue(key, summary, labels=(), status="To Do"):
+    return {
+        "key": key,
+        "fields": {
+            "summary": summary,
+            "status": {"name": status},
+            "priority": {"name": "High"},
+            "project": {"name": "Demo"},
+            "labels": list(labels),
+            "components": [],
+            "updated": "2025-10-01T16:42:31.512+0000",
+        },
+    }
+
+
+def test_issue_index_ranks_matches():
+    index = IssueIndex()
+    index.add_issues(
+        [
+            make_issue("DEMO-1", "Login button misaligned on mobile"),
+            make_issue(
+                "DEMO-2", "Users cannot login after password reset", labels=["auth"]
+            ),
+            make_issue("DEMO-3", "Export invoices as CSV"),
+        ]
+    )
+
+    keys = [document["key"] for _, document in index.search("login bug")]
+    assert keys[:2] == ["DEMO-1", "DEMO-2"] or keys[:2] == ["DEMO-2", "DEMO-1"]
+    assert "DEMO-3" not in keys
+    assert index.search("demo-3")[0][1]["key"] == "DEMO-3"
+    assert index.search("auth")[0][1]["key"] == "DEMO-2"
+
+
+def test_issue_index_updates_and_persists(tmp_path):
+    store = IndexStore(tmp_path)
+    store.index_issues("cloud-1", 1, [make_issue("DEMO-1", "Login fails")])
+    store.index_issues(
+        "cloud-1", 1, [make_issue("DEMO-1", "Billing export fails", status="Done")]
+    )
+    store.save("cloud-1", 1, force=True)
+
+    reloaded = IndexStore(tmp_path).get("cloud-1", 1)
+
+    assert len(reloaded) == 1
+    assert reloaded.search("login") == []
+    assert reloaded.search("billing")[0][1]["status"] == "Done"
+
+
+def test_issue_index_is_kept_per_user(tmp_path):
+    store = IndexStore(tmp_path)
+    store.index_issues(
+        "cloud-1", 1, [make_issue("HR-1", "Salary review for the platform team")]
+    )
+
+    assert store.get("cloud-1", 1).search("salary")
+    # Another user of the site only finds issues Jira returned to them
+    assert store.get("cloud-1", 2).search("salary") == []
+    assert IndexStore(tmp_path).get("cloud-1", 2).search("salary") == []
+
+
+def test_workers_merge_each_others_updates(tmp_path):
+    first, second = IndexStore(tmp_path), IndexStore(tmp_path)
+    first.index_issues("cloud-1", 1, [make_issue("DEMO-1", "Login fails")])
+    second.index_issues("cloud-1", 1, [make_issue("DEMO-2", "Billing export fails")])
+    first.index_issues("cloud-1", 1, [make_issue("DEMO-3", "Invoice totals are wrong")])
+    first.save("cloud-1", 1, force=True)
+
+    # Neither save dropped the other worker's issues, and both copies pick them up
+    for store in (first, second, IndexStore(tmp_path)):
+        index = store.get("cloud-1", 1)
+        assert {document["key"] for document in index.documents if document} == {
+            "DEMO-1",
+            "DEMO-2",
+            "DEMO-3",
+        }
+
+
+def test_issues_not_seen_again_expire(tmp_path, monkeypatch):
+    store = IndexStore(tmp_path, max_age=3600)
+    store.index_issues(
+        "cloud-1",
+        1,
+        [make_issue("DEMO-1", "Login fails"), make_issue("DEMO-2", "Export fails")],
+    )
+
+    later = time.time() + 7200
+    monkeypatch.setattr(search_index.time, "time", lambda: later)
+    store.index_issues("cloud-1", 1, [make_issue("DEMO-2", "Export fails")])
+    store.save("cloud-1", 1, force=True)
+
+    assert store.get("cloud-1", 1).search("login") == []
+    assert (
+        IndexStore(tmp_path).get("cloud-1", 1).search("export")[0][1]["key"] == "DEMO-2"
+    )
+
+
+def test_least_recently_used_indexes_are_unloaded(tmp_path):
+    store = IndexStore(tmp_path, save_interval=3600, max_loaded=2)
+    for user_id in (1, 2, 3):
+        store.index_issues(
+            "cloud-1", user_id, [make_issue(f"DEMO-{user_id}", "Login fails")]
+        )
+        store.index_issues(
+            "cloud-1", user_id, [make_issue(f"DEMO-{user_id}", "Billing export fails")]
+        )
+
+    assert len(store._indexes) == 2
+    # The unsaved update of the unloaded index was written when it was unloaded
+    assert store.get("cloud-1", 1).search("billing")[0][1]["key"] == "DEMO-1"
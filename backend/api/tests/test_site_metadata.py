@@ -0,0 +1,94 @@
+import uuid
+from collections import Counter
+
+import pytest
+
+from api import site_metadata
+from api.catalog import get_catalog
+from api.chat_service import ChatService
+from api.services import JiraOAuthService
+
+PROJECTS = [{"id": "10000", "key": "ALPHA", "name": "Alpha"}]
+
+
+class FakeJira:
+    """A user's client for a site; calls are counted per site"""
+
+    calls = Counter()
+
+    def __init__(self, cloud_id):
+        self.cloud_id = cloud_id
+
+    def boards(self, projectKeyOrId=None):
+        self.calls[(self.cloud_id, "boards", projectKeyOrId)] += 1
+        return {
+            "values": [{"id": 1, "name": f"{projectKeyOrId} board", "type": "scrum"}]
+        }
+
+    def sprints(self, board_id, state=None):
+        self.calls[(self.cloud_id, "sprints", state)] += 1
+        return {"values": [{"id": 7, "name": "Sprint 7", "state": state}]}
+
+    def sprint_issues(self, sprint_id):
+        self.calls[(self.cloud_id, "sprint_issues", sprint_id)] += 1
+        done = {
+            "fields": {
+                "status": {"statusCategory": {"name": "Done"}},
+                "customfield_10016": 3,
+            }
+        }
+        return {"issues": [done, done]}
+
+
+class FakePrefetch:
+    def __init__(self, jira):
+        self.jira = jira
+
+    def client(self):
+        return self.jira
+
+    def peek(self, name):
+        return None
+
+
+@pytest.mark.django_db
+def test_teammates_share_board_and_sprint_metadata():
+    cloud_id, other_site = uuid.uuid4().hex, uuid.uuid4().hex
+    for jira in (FakeJira(cloud_id), FakeJira(cloud_id), FakeJira(other_site)):
+        assert JiraOAuthService._get_sprint_data(jira, PROJECTS)[0]["done_issues"] == 2
+        assert (
+            JiraOAuthService._get_velocity_data(jira, PROJECTS)[0]["story_points"] == 6
+        )
+
+    calls = FakeJira.calls
+    assert calls[(cloud_id, "boards", "ALPHA")] == 1
+    assert calls[(cloud_id, "sprints", "active")] == 1
+    assert calls[(cloud_id, "sprints", "closed")] == 1
+    assert calls[(other_site, "boards", "ALPHA")] == 1
+    # Issues are permission-filtered, so every user still fetches their own
+    assert calls[(cloud_id, "sprint_issues", 7)] == 4
+
+
+@pytest.mark.django_db
+def test_boards_tool_shares_only_projects_the_user_can_see(user, settings):
+    settings.OPENAI_API_KEY = "test"
+    cloud_id = uuid.uuid4().hex
+    service = ChatService()
+    site_metadata.boards(FakeJira(cloud_id), "SECRET")
+
+    get_catalog(cloud_id, user.pk).load(PROJECTS)
+    jira = FakeJira(cloud_id)
+    for project_key in ("ALPHA", "ALPHA", "SECRET"):
+        service.execute_jira_function(
+            user,
+            "get_boards",
+            {"project_key": project_key},
+            prefetch=FakePrefetch(jira),
+        )
+
+    assert FakeJira.calls[(cloud_id, "boards", "ALPHA")] == 1
+    # Not in the user's catalog: asked of Jira with the user's own token
+    assert FakeJira.calls[(cloud_id, "boards", "SECRET")] == 2
+    assert "ALPHA board" in service.execute_jira_function(
+        user, "get_boards", {"project_key": "ALPHA"}, prefetch=FakePrefetch(jira)
+    )
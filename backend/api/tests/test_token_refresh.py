@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import pytest
+from cryptography.fernet import Fernet
+from django.utils import timezone
+
+from api.authentication import get_integration
+from api.models import JiraIntegration
+from api.services import JiraOAuthService
+
+
+@pytest.fixture
+def integration(user, settings):
+    settings.JIRA_CLIENT_ID = "client"
+    settings.JIRA_CLIENT_SECRET = "secret"
+    settings.JIRA_TOKEN_ENCRYPTION_KEY = Fernet.generate_key()
+    integration = JiraIntegration(
+        user=user,
+        expires_at=timezone.now() + timedelta(minutes=1),
+        cloud_id="cloud-1",
+        site_url="https://example.atlassian.net",
+        site_name="Example",
+    )
+    integration.access_token = "access-1"
+    integration.refresh_token = "refresh-1"
+    integration.save()
+    return integration
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    calls = []
+
+    def refresh_access_token(cls, refresh_token):
+        calls.append(refresh_token)
+        if refresh_token != "refresh-1":
+            raise ValueError("invalid_grant")
+        return {
+            "access_token": "access-2",
+            "refresh_token": "refresh-2",
+            "expires_in": 3600,
+        }
+
+    monkeypatch.setattr(
+        JiraOAuthService, "refresh_access_token", classmethod(refresh_access_token)
+    )
+    return calls
+
+
+@pytest.mark.django_db
+def test_refresh_rotates_tokens(integration, refreshes):
+    JiraOAuthService.ensure_fresh_token(integration)
+
+    assert refreshes == ["refresh-1"]
+    assert integration.access_token == "access-2"
+    stored = JiraIntegration.objects.get(pk=integration.pk)
+    assert (stored.access_token, stored.refresh_token) == ("access-2", "refresh-2")
+    assert stored.expires_at > timezone.now() + timedelta(minutes=59)
+
+
+@pytest.mark.django_db
+def test_stale_copy_picks_up_tokens_refreshed_elsewhere(integration, refreshes):
+    stale = JiraIntegration.objects.get(pk=integration.pk)
+    # Another worker (or the refresh job) rotated the tokens meanwhile
+    JiraOAuthService.ensure_fresh_token(integration)
+
+    JiraOAuthService.ensure_fresh_token(stale)
+
+    # The rotated-out refresh token was never sent, so the integration stays connected
+    assert refreshes == ["refresh-1"]
+    assert stale.access_token == "access-2"
+    assert JiraIntegration.objects.get(pk=integration.pk).is_active
+
+
+@pytest.mark.django_db
+def test_failed_refresh_deactivates_without_touching_tokens(integration, refreshes):
+    JiraIntegration.objects.filter(pk=integration.pk).update(
+        _refresh_token=integration._encrypt_token("revoked")
+    )
+
+    with pytest.raises(ValueError, match="re-authenticate"):
+        JiraOAuthService.ensure_fresh_token(integration)
+
+    stored = JiraIntegration.objects.get(pk=integration.pk)
+    assert not stored.is_active
+    assert stored.refresh_token == "revoked"
+
+
+@pytest.mark.django_db
+def test_refresh_of_a_deleted_integration_does_not_recreate_it(integration, refreshes):
+    copy = get_integration(integration.user, cached=True)
+    integration.delete()
+
+    with pytest.raises(ValueError, match="no longer exists"):
+        JiraOAuthService.ensure_fresh_token(copy)
+
+    assert refreshes == []
+    assert not JiraIntegration.objects.exists()
+
+
+@pytest.mark.django_db
+def test_integration_is_only_cached_when_asked(integration):
+    get_integration(integration.user, cached=True)
+    JiraIntegration.objects.filter(pk=integration.pk).update(site_name="Renamed")
+
+    assert get_integration(integration.user, cached=True).site_name == "Example"
+    assert get_integration(integration.user).site_name == "Renamed"
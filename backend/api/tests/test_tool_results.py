@@ -0,0 +1,68 @@
+import json
+
+from api.tool_results import compact_tool_result
+
+ISSUES = [
+    {
+        "key": f"DEMO-{number}",
+        "summary": "Login fails after token refresh " * (3 if number == 1 else 1),
+        "status": "In Progress" if number % 2 else "To Do",
+        "priority": "High",
+        "project": "Demo",
+        "updated": "2025-10-01T16:42:31.512+0000",
+    }
+    for number in range(1, 41)
+]
+
+
+def test_compact_tool_result_encodes_tables():
+    result = json.loads(compact_tool_result({"issues": ISSUES, "total": 40}))
+
+    table = result["issues"]
+    assert table["columns"] == [
+        "key",
+        "summary",
+        "status",
+        "priority",
+        "project",
+        "updated",
+    ]
+    assert table["values"]["status"] == ["In Progress", "To Do"]
+    assert table["values"]["project"] == ["Demo"]
+    assert table["rows"][1] == [
+        "DEMO-2",
+        "Login fails after token refresh ",
+        1,
+        0,
+        0,
+        "2025-10-01",
+    ]
+    assert len(table["rows"][0][1]) <= 120
+    assert result["total"] == 40
+
+
+def test_compact_tool_result_summarizes_over_budget():
+    encoded = compact_tool_result({"issues": ISSUES}, budget=600)
+    result = json.loads(encoded)
+
+    assert len(encoded) <= 600
+    assert result["truncated"] is True
+    assert result["issues"]["count"] == 40
+    assert result["issues"]["counts"]["status"] == {"In Progress": 20, "To Do": 20}
+    assert 0 < len(result["issues"]["rows"]) < 40
+
+
+def test_compact_tool_result_stays_within_a_tiny_budget():
+    payload = {"issues": ISSUES, "jql": "project = DEMO ORDER BY updated DESC"}
+
+    # Room for the counts, but not for a single row
+    result = json.loads(compact_tool_result(payload, budget=200))
+    assert result["issues"]["rows"] == []
+    assert result["issues"]["counts"]["priority"] == {"High": 40}
+
+    for budget in (100, 60):
+        encoded = compact_tool_result(payload, budget=budget)
+        result = json.loads(encoded)
+        assert len(encoded) <= budget
+        assert result["truncated"] is True
+        assert result["issues"] == {"rows": [], "count": 40}
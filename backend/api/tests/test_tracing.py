@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import tracing
+
+
+def test_span_tree_and_critical_path():
+    with tracing.span("outside") as span:
+        assert span is None
+
+    with tracing.trace("GET /api/chat/") as trace:
+        with tracing.span("openai.completion", model="gpt-4o-mini"):
+            pass
+        with tracing.span("chat.tool", function="get_projects"):
+            with tracing.span("jira.request"):
+                tracing.annotate(status=200)
+        with pytest.raises(ValueError):
+            with tracing.span("openai.completion"):
+                raise ValueError
+
+    data = trace.to_dict()
+    children = data["root"]["children"]
+    assert [child["name"] for child in children] == [
+        "openai.completion",
+        "chat.tool",
+        "openai.completion",
+    ]
+    assert children[1]["children"][0]["attributes"] == {"status": 200}
+    assert children[2]["error"] == "ValueError"
+    assert data["critical_path"] == ["GET /api/chat/", "openai.completion"]
+    assert tracing.current_trace() is None
+
+
+def test_spans_follow_asyncio_tasks():
+    async def tool(name, delay):
+        with tracing.span("chat.tool", function=name):
+            await asyncio.sleep(delay)
+
+    async def turn():
+        with tracing.trace("turn") as trace:
+            await asyncio.gather(tool("slow", 0.02), tool("fast", 0))
+        return trace
+
+    trace = asyncio.run(turn())
+    assert {child.attributes["function"] for child in trace.root.children} == {
+        "slow",
+        "fast",
+    }
+    assert trace.critical_path() == ["turn", "chat.tool"]
+    assert (
+        max(trace.root.children, key=lambda child: child.ended).attributes["function"]
+        == "slow"
+    )
+
+
+@pytest.mark.django_db
+def test_trace_header_and_file(client, settings, user_factory, tmp_path):
+    settings.TRACE_DEBUG_HEADER = True
+    settings.TRACE_FILE = str(tmp_path / "traces.jsonl")
+    user = user_factory.create(is_active=True)
+    token = RefreshToken.for_user(user).access_token
+    url = reverse("api-jira-integration-status")
+
+    response = client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}", HTTP_X_TRACE="1")
+    trace = json.loads(response["X-Trace"])
+    assert trace["trace_id"] == response["X-Trace-Id"]
+    assert trace["root"]["attributes"] == {"status": 404}
+    assert "db.query" in {child["name"] for child in trace["root"]["children"]}
+
+    written = json.loads((tmp_path / "traces.jsonl").read_text())
+    assert written["trace_id"] == trace["trace_id"]
+
+    # Not sampled and not asked for
+    response = client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert "X-Trace" not in response
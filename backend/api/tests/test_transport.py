@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from api import transport
+from api.chat_service import AsyncChatService
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "session=user-a")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_sessions_share_connection_pools():
+    first, second = transport.new_session(), transport.new_session()
+    assert first.get_adapter("https://api.atlassian.com/me") is second.get_adapter(
+        "https://api.atlassian.com/me"
+    )
+    assert first.get_adapter("https://api.atlassian.com/me") is not first.get_adapter(
+        "https://example.atlassian.net/"
+    )
+
+    # Closing a client's session leaves the shared pools usable
+    first.close()
+    assert second.get_adapter("https://api.atlassian.com/me").poolmanager is not None
+
+
+def test_shared_session_keeps_connections_alive_without_cookies():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/"
+        session = transport.get_session()
+        session.get(url, timeout=5)
+        session.get(url, timeout=5)
+    finally:
+        server.shutdown()
+
+    assert not session.cookies
+    (stats,) = [pool for pool in transport.pool_stats() if pool["host"] == "127.0.0.1"]
+    assert stats["connections"] == 1
+    assert stats["requests"] == 2
+
+
+def test_async_chat_turn_closes_its_client(monkeypatch, settings):
+    settings.OPENAI_API_KEY = "test"
+    service = AsyncChatService()
+    clients = []
+
+    async def chat_turn(user, messages, stream, http):
+        clients.append((http, service.client))
+        return {"content": "ok", "function_calls": 0}
+
+    monkeypatch.setattr(service, "_chat_turn", chat_turn)
+
+    asyncio.run(service.chat_with_jira_context(None, []))
+    asyncio.run(service.chat_with_jira_context(None, []))
+
+    # Each turn runs on its own loop under async_to_sync, so it gets its own clients
+    (first, first_openai), (second, second_openai) = clients
+    assert first is not second
+    assert first.is_closed and second.is_closed
+    assert first_openai is not second_openai
+    assert first_openai.is_closed() and second_openai.is_closed()
+
+
+def test_async_client_uses_http2_when_h2_is_installed(monkeypatch):
+    pytest.importorskip("h2")
+    created = []
+    client_class = httpx.AsyncClient
+
+    def async_client(**kwargs):
+        created.append(kwargs)
+        return client_class(**kwargs)
+
+    monkeypatch.setattr(httpx, "AsyncClient", async_client)
+    asyncio.run(transport.async_client().aclose())
+
+    assert transport.HTTP2_AVAILABLE
+    assert created[0]["http2"] is True
@@ -0,0 +1,201 @@
+import re
+from collections import Counter
+from typing import Any
+
+from . import fastjson
+
+# Default size budget for one encoded tool result, in characters (~2k tokens)
+DEFAULT_BUDGET = 8000
+
+# Longer summaries/descriptions are cut to this many characters
+TEXT_MAX_LENGTH = 120
+
+# Columns whose values repeat a lot across rows; they are stored once in a
+# lookup list and referenced by index from each row
+DEDUPED_COLUMNS = (
+    "status",
+    "priority",
+    "project",
+    "assignee",
+    "lead",
+    "type",
+    "projectTypeKey",
+)
+
+# Columns truncated to TEXT_MAX_LENGTH
+TEXT_COLUMNS = ("summary", "description")
+
+# ISO timestamps are reduced to their date part
+DATE_COLUMNS = ("updated", "created")
+
+# Columns that get per-value counts when a result set is summarized
+SUMMARY_COLUMNS = ("status", "priority", "project")
+
+FORMAT_HINT = (
+    "Tool results are compact tables: `columns` names each position of the "
+    "`rows`, and a column listed in `values` holds an index into that lookup list. "
+    "When `truncated` is true only the first rows are included; use the `counts` "
+    "for totals."
+)
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (words and punctuation marks) for a piece of text"""
+    return len(_TOKEN_RE.findall(text))
+
+
+def _dumps(payload: Any) -> str:
+    return fastjson.dumps(payload)
+
+
+def _shorten(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > TEXT_MAX_LENGTH:
+        return value[: TEXT_MAX_LENGTH - 1].rstrip() + "…"
+    return value
+
+
+def _is_table(value: Any) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) > 0
+        and all(isinstance(item, dict) for item in value)
+    )
+
+
+def encode_table(records: list[dict]) -> dict:
+    """Encode a list of flat dicts as a header row plus value rows"""
+    columns: list[str] = []
+    for record in records:
+        for column in record:
+            if column not in columns:
+                columns.append(column)
+
+    lookups: dict[str, list] = {
+        column: [] for column in columns if column in DEDUPED_COLUMNS
+    }
+    positions: dict[str, dict] = {column: {} for column in lookups}
+
+    rows = []
+    for record in records:
+        row = []
+        for column in columns:
+            value = record.get(column)
+            if column in TEXT_COLUMNS:
+                value = _shorten(value)
+            elif column in DATE_COLUMNS and isinstance(value, str):
+                value = value[:10]
+            if column in lookups and value is not None:
+                index = positions[column].get(value)
+                if index is None:
+                    index = positions[column][value] = len(lookups[column])
+                    lookups[column].append(value)
+                value = index
+            row.append(value)
+        rows.append(row)
+
+    table = {"columns": columns, "rows": rows}
+    lookups = {column: values for column, values in lookups.items() if values}
+    if lookups:
+        table["values"] = lookups
+    return table
+
+
+def decode_table(table: dict) -> list[dict]:
+    """Turn a table produced by encode_table back into a list of dicts"""
+    if isinstance(table, list):
+        # Empty lists are passed through unencoded
+        return table
+    columns = table.get("columns", [])
+    lookups = table.get("values", {})
+    records = []
+    for row in table.get("rows", []):
+        record = {}
+        for column, value in zip(columns, row, strict=True):
+            if column in lookups and isinstance(value, int):
+                value = lookups[column][value]
+            record[column] = value
+        records.append(record)
+    return records
+
+
+def summarize_table(records: list[dict]) -> dict:
+    """Per-value counts for the summary columns of a list of records"""
+    counts = {}
+    for column in SUMMARY_COLUMNS:
+        counter = Counter(
+            record[column] for record in records if record.get(column) is not None
+        )
+        if counter:
+            counts[column] = dict(counter.most_common())
+    return counts
+
+
+def _fit_rows(payload: dict, key: str, records: list[dict], budget: int) -> str:
+    """
+    Largest prefix of records whose encoding, with counts, fits the budget.
+
+    When not even the counts fit, only the number of records is kept, and at
+    last nothing else of the payload; that is the smallest result there is.
+    """
+    counts = summarize_table(records)
+    best = None
+    low, high = 1, len(records)
+    while low <= high:
+        middle = (low + high) // 2
+        table = encode_table(records[:middle])
+        table["count"] = len(records)
+        table["counts"] = counts
+        encoded = _dumps({**payload, key: table, "truncated": True})
+        if len(encoded) <= budget:
+            best = encoded
+            low = middle + 1
+        else:
+            high = middle - 1
+    if best is not None:
+        return best
+
+    summary = {"rows": [], "count": len(records)}
+    for candidate in (
+        {**payload, key: {**summary, "counts": counts}, "truncated": True},
+        {**payload, key: summary, "truncated": True},
+    ):
+        encoded = _dumps(candidate)
+        if len(encoded) <= budget:
+            return encoded
+    return _dumps({key: summary, "truncated": True})
+
+
+def compact_tool_result(payload: dict, budget: int | None = None) -> str:
+    """
+    Encode a tool result for the model with as few tokens as possible.
+
+    Lists of records become tables (see encode_table). When the encoded result
+    is larger than the budget, the biggest list is summarized with counts by
+    status/priority/project and only as many rows as fit are kept.
+    """
+    budget = budget or DEFAULT_BUDGET
+
+    compact = {}
+    tables = {}
+    for key, value in payload.items():
+        if _is_table(value):
+            tables[key] = value
+            compact[key] = encode_table(value)
+        elif isinstance(value, dict):
+            compact[key] = {
+                inner_key: _shorten(inner_value)
+                if inner_key in TEXT_COLUMNS
+                else inner_value
+                for inner_key, inner_value in value.items()
+            }
+        else:
+            compact[key] = value
+
+    encoded = _dumps(compact)
+    if len(encoded) <= budget or not tables:
+        return encoded
+
+    largest = max(tables, key=lambda key: len(tables[key]))
+    return _fit_rows(compact, largest, tables[largest], budget)
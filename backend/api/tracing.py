@@ -0,0 +1,157 @@
+import contextvars
+import json
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime
+
+from . import fastjson
+
+
+class Span:
+    """One timed step of a trace; children are the steps it waited for or started"""
+
+    __slots__ = ("name", "attributes", "started", "ended", "children", "error")
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.started = time.perf_counter()
+        self.ended: float | None = None
+        self.children: list[Span] = []
+        self.error: str | None = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self):
+        self.ended = time.perf_counter()
+
+    def to_dict(self, origin: float) -> dict:
+        data = {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 3),
+            "duration_ms": round(
+                ((self.ended or time.perf_counter()) - self.started) * 1000, 3
+            ),
+        }
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.error:
+            data["error"] = self.error
+        if self.ended is None:
+            # e.g. a cancelled tool call that hadn't unwound yet
+            data["unfinished"] = True
+        if self.children:
+            data["children"] = [
+                child.to_dict(origin)
+                for child in sorted(self.children, key=lambda c: c.started)
+            ]
+        return data
+
+
+class Trace:
+    """Span tree of one request"""
+
+    def __init__(self, name: str, attributes: dict):
+        self.trace_id = secrets.token_hex(8)
+        self.started_at = datetime.now(UTC)
+        self.root = Span(name, attributes)
+
+    def critical_path(self) -> list[str]:
+        """Names of the spans the request waited on: at each level, the child that ended last"""
+        span = self.root
+        path = [span.name]
+        while span.children:
+            span = max(span.children, key=lambda child: child.ended or float("inf"))
+            path.append(span.name)
+        return path
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at.isoformat(),
+            "critical_path": self.critical_path(),
+            "root": self.root.to_dict(self.root.started),
+        }
+
+
+_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar(
+    "trace", default=None
+)
+_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "trace_span", default=None
+)
+
+
+def current_trace() -> Trace | None:
+    return _trace.get()
+
+
+@contextmanager
+def trace(name: str, **attributes):
+    """
+    Record the spans opened in the block as one trace.
+
+    Like deadlines, the trace follows the context into asyncio tasks and
+    sync_to_async calls; thread pool work sees it when it is submitted with
+    contextvars.copy_context().run.
+    """
+    current = Trace(name, attributes)
+    trace_token = _trace.set(current)
+    span_token = _span.set(current.root)
+    try:
+        yield current
+    except BaseException as e:
+        current.root.error = type(e).__name__
+        raise
+    finally:
+        current.root.end()
+        _span.reset(span_token)
+        _trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the block as a child of the current span; does nothing outside a trace"""
+    parent = _span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attributes)
+    parent.children.append(child)
+    token = _span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = type(e).__name__
+        raise
+    finally:
+        child.end()
+        _span.reset(token)
+
+
+def annotate(**attributes):
+    """Add attributes to the current span, if there is one"""
+    current = _span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def header_value(current: Trace) -> str:
+    """The trace as compact ASCII JSON, fit for a response header"""
+    return json.dumps(
+        current.to_dict(), separators=(",", ":"), ensure_ascii=True, default=str
+    )
+
+
+_sink_lock = threading.Lock()
+
+
+def write(current: Trace, path) -> None:
+    """Append the trace to a JSON lines file"""
+    line = fastjson.dumps_bytes(current.to_dict()) + b"\n"
+    with _sink_lock:
+        with open(path, "ab") as sink:
+            sink.write(line)
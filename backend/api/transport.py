@@ -0,0 +1,131 @@
+import importlib.util
+import threading
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import TYPE_CHECKING
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# httpx negotiates HTTP/2 when h2 is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class PooledSession(requests.Session):
+    """
+    requests session over the process-wide connection pools.
+
+    Headers and cookies belong to the session, so clients holding a user's
+    token get their own; closing it leaves the shared pools open.
+    """
+
+    def __init__(self):
+        super().__init__()
+        for prefix, adapter in _get_adapters().items():
+            self.mount(prefix, adapter)
+
+    def close(self):
+        pass
+
+
+_adapters: dict[str, HTTPAdapter] = {}
+_adapters_lock = threading.Lock()
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_adapters() -> dict[str, HTTPAdapter]:
+    with _adapters_lock:
+        if not _adapters:
+            default = HTTPAdapter(
+                pool_connections=settings.HTTP_POOL_HOSTS,
+                pool_maxsize=settings.HTTP_POOL_SIZE,
+            )
+            _adapters.update(
+                {
+                    # requests picks the adapter with the longest matching prefix
+                    "https://api.atlassian.com/": HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=settings.ATLASSIAN_API_POOL_SIZE,
+                    ),
+                    "https://auth.atlassian.com/": HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=settings.ATLASSIAN_AUTH_POOL_SIZE,
+                    ),
+                    "https://": default,
+                    "http://": default,
+                }
+            )
+        return dict(_adapters)
+
+
+def _no_cookies() -> CookieJar:
+    # Shared clients serve many users; never carry cookies from one to the next
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+def new_session() -> PooledSession:
+    """Session for one client (e.g. a user's Jira client) over the shared pools"""
+    return PooledSession()
+
+
+def get_session() -> PooledSession:
+    """Process-wide session for calls that pass their credentials per request"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession()
+            _session.cookies = _no_cookies()
+        return _session
+
+
+def async_client() -> "httpx.AsyncClient":
+    """
+    New httpx client for one async chat turn; use it as `async with` so its
+    connections are closed when the turn ends.
+
+    An httpx client is bound to the event loop it first ran on, and under a
+    sync server every async_to_sync call runs on a new loop, so clients can't
+    outlive the turn. The turn's Jira calls and concurrent tool calls still
+    share its pool.
+    """
+    # Only the async chat path needs httpx; keep it out of sync workers
+    import httpx
+
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=settings.ATLASSIAN_API_POOL_SIZE + settings.HTTP_POOL_SIZE,
+            max_keepalive_connections=settings.ATLASSIAN_API_POOL_SIZE,
+        ),
+        cookies=httpx.Cookies(_no_cookies()),
+    )
+
+
+def pool_stats() -> list[dict]:
+    """Connections opened, requests sent and idle connections per host pool"""
+    stats = []
+    seen = set()
+    for adapter in _get_adapters().values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            stats.append(
+                {
+                    "host": pool.host,
+                    "connections": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "idle": sum(1 for conn in list(pool.pool.queue) if conn is not None)
+                    if pool.pool
+                    else 0,
+                    "maxsize": pool.pool.maxsize if pool.pool else 0,
+                }
+            )
+    return stats
@@ -2,13 +2,22 @@ from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework import routers
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 
-from .api import UserViewSet, JiraIntegrationViewSet, ChatViewSet
+from .api import (
+    AsyncChatView,
+    MetricsView,
+    TokenObtainPairView,
+    UserViewSet,
+    JiraIntegrationViewSet,
+    ChatViewSet,
+)
 
 router = routers.DefaultRouter()
 router.register("users", UserViewSet, basename="api-users")
-router.register("integrations/jira", JiraIntegrationViewSet, basename="api-jira-integration")
+router.register(
+    "integrations/jira", JiraIntegrationViewSet, basename="api-jira-integration"
+)
 router.register("chat", ChatViewSet, basename="api-chat")
 
 urlpatterns = [
@@ -17,8 +26,14 @@ urlpatterns = [
         SpectacularSwaggerView.as_view(url_name="schema"),
     ),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path(
+        "api/chat/message-async/",
+        AsyncChatView.as_view(),
+        name="api-chat-message-async",
+    ),
     path("api/", include(router.urls)),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
     path("admin/", admin.site.urls),
 ]
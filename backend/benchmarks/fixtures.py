@@ -0,0 +1,153 @@
+"""Deterministic, realistic-looking Jira payloads for the benchmarks"""
+
+import random
+
+PROJECTS = [
+    ("PULSE", "Pulse Platform"),
+    ("WEB", "Web Frontend"),
+    ("MOB", "Mobile Apps"),
+    ("OPS", "Operations"),
+]
+STATUSES = [
+    ("To Do", "To Do"),
+    ("In Progress", "In Progress"),
+    ("In Review", "In Progress"),
+    ("Done", "Done"),
+]
+PRIORITIES = ["Highest", "High", "Medium", "Low"]
+PEOPLE = [
+    "Ada Lovelace",
+    "Grace Hopper",
+    "Alan Turing",
+    "Barbara Liskov",
+    "Ken Thompson",
+]
+WORDS = (
+    "login session token refresh dashboard chart sprint velocity board filter "
+    "timeout retry cache latency export import billing invoice avatar upload "
+    "notification email webhook permission role audit search index migration"
+).split()
+
+
+def _sentence(rng, low, high):
+    return " ".join(
+        rng.choice(WORDS) for _ in range(rng.randint(low, high))
+    ).capitalize()
+
+
+def make_raw_issues(count, seed=42):
+    """Issues shaped like the Jira REST `search` response"""
+    rng = random.Random(seed)
+    issues = []
+    for number in range(1, count + 1):
+        project_key, project_name = rng.choice(PROJECTS)
+        status, category = rng.choice(STATUSES)
+        assignee = rng.choice(PEOPLE + [None])
+        issues.append(
+            {
+                "id": str(10000 + number),
+                "key": f"{project_key}-{number}",
+                "self": f"https://api.atlassian.com/ex/jira/cloud/rest/api/2/issue/{10000 + number}",
+                "fields": {
+                    "summary": _sentence(rng, 4, 24),
+                    "description": _sentence(rng, 20, 80),
+                    "status": {
+                        "name": status,
+                        "statusCategory": {
+                            "name": category,
+                            "key": category.lower().replace(" ", ""),
+                        },
+                    },
+                    "priority": {"name": rng.choice(PRIORITIES)},
+                    "project": {"key": project_key, "name": project_name},
+                    "assignee": {
+                        "displayName": assignee,
+                        "accountId": f"acc-{assignee}",
+                    }
+                    if assignee
+                    else None,
+                    "labels": rng.sample(WORDS, rng.randint(0, 3)),
+                    "components": [{"name": rng.choice(WORDS)}],
+                    "created": f"2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T09:15:00.000+0000",
+                    "updated": f"2025-1{rng.randint(0, 2)}-0{rng.randint(1, 9)}T16:42:31.512+0000",
+                    "customfield_10016": rng.choice([1, 2, 3, 5, 8, None]),
+                },
+            }
+        )
+    return issues
+
+
+def make_tool_issue_records(count, seed=42):
+    """Issues as ChatService shapes them for the `search_issues` tool"""
+    records = []
+    for issue in make_raw_issues(count, seed):
+        fields = issue["fields"]
+        records.append(
+            {
+                "key": issue["key"],
+                "summary": fields["summary"],
+                "status": fields["status"]["name"],
+                "priority": fields["priority"]["name"],
+                "project": fields["project"]["name"],
+                "assignee": fields["assignee"]["displayName"]
+                if fields["assignee"]
+                else "Unassigned",
+                "updated": fields["updated"],
+            }
+        )
+    return records
+
+
+def make_dashboard_payload(issue_count, seed=42):
+    """A get_dashboard_data() result with issue_count user issues, all fields included"""
+    rng = random.Random(seed)
+    issues = make_raw_issues(issue_count, seed)
+    for issue in issues:
+        # The search endpoint returns every field unless asked otherwise
+        issue["fields"].update(
+            {
+                "issuetype": {
+                    "name": rng.choice(["Bug", "Story", "Task"]),
+                    "subtask": False,
+                    "hierarchyLevel": 0,
+                },
+                "reporter": {
+                    "displayName": rng.choice(PEOPLE),
+                    "active": True,
+                    "timeZone": "Europe/Berlin",
+                },
+                "watches": {"watchCount": rng.randint(0, 6), "isWatching": False},
+                "timetracking": {"originalEstimateSeconds": rng.randint(0, 40) * 3600},
+                **{f"customfield_{10020 + n}": None for n in range(20)},
+            }
+        )
+    projects = [
+        {
+            "id": str(10000 + n),
+            "key": key,
+            "name": name,
+            "projectTypeKey": "software",
+            "simplified": False,
+        }
+        for n, (key, name) in enumerate(PROJECTS)
+    ]
+    return {
+        "projects": projects,
+        "current_user": {
+            "displayName": PEOPLE[0],
+            "emailAddress": "ada@example.com",
+            "accountId": "acc-1",
+        },
+        "user_issues": {"total": issue_count, "issues": issues},
+        "recent_activity": {
+            "total": issue_count // 2,
+            "issues": issues[: issue_count // 2],
+        },
+        "sprint_data": [],
+        "velocity_data": [],
+        "stats": {
+            "total_projects": len(projects),
+            "user_open_issues": issue_count,
+            "recent_activity_count": issue_count // 2,
+        },
+    }
@@ -0,0 +1,67 @@
+"""
+Serialization time of dashboard-data payloads: DRF's JSONRenderer against
+api.renderers.FastJSONRenderer, plus parsing the result back.
+
+Run from the backend directory:
+
+    python -m benchmarks.json_render
+"""
+
+import io
+import json
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+django.setup()
+
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api import fastjson  # noqa: E402
+from api.renderers import FastJSONParser, FastJSONRenderer  # noqa: E402
+
+from .fixtures import make_dashboard_payload  # noqa: E402
+
+
+def _time(fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    backend = (
+        "orjson"
+        if fastjson.orjson is not None
+        else "stdlib json (orjson not installed)"
+    )
+    print(f"fast backend: {backend}")
+    print(
+        f"{'issues':>6} {'KB':>7} {'drf ms':>8} {'fast ms':>8} {'speedup':>8} {'parse drf':>10} {'parse fast':>11}"
+    )
+    for count in (50, 200, 500):
+        payload = make_dashboard_payload(count)
+        body = FastJSONRenderer().render(payload)
+        assert json.loads(body) == json.loads(JSONRenderer().render(payload))
+        rounds = max(5, 2000 // count)
+
+        drf = _time(lambda payload=payload: JSONRenderer().render(payload), rounds)
+        fast = _time(lambda payload=payload: FastJSONRenderer().render(payload), rounds)
+        parse_drf = _time(
+            lambda body=body: JSONParser().parse(io.BytesIO(body)), rounds
+        )
+        parse_fast = _time(
+            lambda body=body: FastJSONParser().parse(io.BytesIO(body)), rounds
+        )
+        print(
+            f"{count:>6} {len(body) / 1024:>7.0f} {drf * 1000:>8.2f} {fast * 1000:>8.2f} {drf / fast:>7.1f}x"
+            f" {parse_drf * 1000:>10.2f} {parse_fast * 1000:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Query latency of the local issue index.
+
+The fixture summaries draw from a 30-word vocabulary, so most query terms hit
+a large share of all issues; this is close to the worst case for the index.
+
+Run from the backend directory:
+
+    python -m benchmarks.search_index
+"""
+
+import time
+
+from api.search_index import IssueIndex
+
+from .fixtures import make_raw_issues
+
+QUERIES = [
+    "login bug",
+    "sprint velocity chart",
+    "PULSE-42",
+    "billing invoice export",
+    "timeout",
+]
+
+
+def main():
+    print(f"{'issues':>7} {'index ms':>9} {'query µs':>9}")
+    for count in (100, 1000, 10000):
+        issues = make_raw_issues(count)
+        started = time.perf_counter()
+        index = IssueIndex()
+        index.add_issues(issues)
+        indexed = time.perf_counter() - started
+
+        rounds = 200
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for query in QUERIES:
+                index.search(query, limit=10)
+        per_query = (time.perf_counter() - started) / (rounds * len(QUERIES))
+        print(f"{count:>7} {indexed * 1000:>9.1f} {per_query * 1e6:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
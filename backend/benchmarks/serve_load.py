@@ -0,0 +1,167 @@
+"""
+Throughput of the production server (gunicorn.conf.py) by number of workers.
+
+Starts gunicorn with 1, 2, 4, ... workers up to the number of cores and keeps
+it busy from client processes for a few seconds each. Run from the backend
+directory:
+
+    python -m benchmarks.serve_load [--path /api/schema/swagger-ui/] [--seconds 5] [--clients 32] [--asgi]
+
+The default path needs neither a login nor the database. Pass --header
+"Authorization: Bearer <token>" to load an authenticated endpoint (it then
+needs the database). Responses other than 2xx count as errors.
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(port: int, timeout: float = 30):
+    until = time.monotonic() + timeout
+    while time.monotonic() < until:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not start")
+
+
+def _connection(port, path, headers, until, latencies, errors):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    while time.monotonic() < until:
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            conn.close()
+            continue
+        if not 200 <= response.status < 300:
+            errors.append(1)
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+
+
+def _client(port, path, headers, seconds, connections):
+    """Keep requests in flight on each keep-alive connection; returns latencies in seconds and errors"""
+    latencies, errors = [], []
+    until = time.monotonic() + seconds
+    threads = [
+        threading.Thread(
+            target=_connection, args=(port, path, headers, until, latencies, errors)
+        )
+        for _ in range(connections)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, len(errors)
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run(workers, args, headers):
+    port = _free_port()
+    env = {
+        **os.environ,
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_THREADS": str(args.threads),
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_ACCESS_LOG": "",
+        # A recycled worker drops its connections mid-run
+        "GUNICORN_MAX_REQUESTS": "0",
+        "GUNICORN_ASGI": "1" if args.asgi else "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_up(port)
+        processes = args.client_processes
+        per_process = max(1, args.clients // processes)
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.starmap(
+                _client,
+                [(port, args.path, headers, args.seconds, per_process)] * processes,
+            )
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+    latencies = [latency for result, _ in results for latency in result]
+    errors = sum(count for _, count in results)
+    return (
+        len(latencies) / args.seconds,
+        _percentile(latencies, 0.5),
+        _percentile(latencies, 0.99),
+        errors,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--path", default="/api/schema/swagger-ui/")
+    parser.add_argument("--header", action="append", default=[], help='"Name: value"')
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument(
+        "--clients", type=int, default=32, help="concurrent connections"
+    )
+    parser.add_argument(
+        "--client-processes", type=int, default=max(2, multiprocessing.cpu_count() // 2)
+    )
+    parser.add_argument("--threads", type=int, default=8, help="threads per worker")
+    parser.add_argument(
+        "--asgi", action="store_true", help="serve api.asgi on uvicorn workers"
+    )
+    args = parser.parse_args()
+    headers = dict(header.split(":", 1) for header in args.header)
+    headers = {name.strip(): value.strip() for name, value in headers.items()}
+    # 127.0.0.1 isn't in ALLOWED_HOSTS
+    headers.setdefault("Host", "localhost")
+
+    counts = [1]
+    while counts[-1] * 2 <= multiprocessing.cpu_count():
+        counts.append(counts[-1] * 2)
+
+    server = "ASGI" if args.asgi else f"{args.threads} threads per worker"
+    print(
+        f"GET {args.path}, {args.clients} connections, {server}, {multiprocessing.cpu_count()} cores"
+    )
+    print(
+        f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'scaling':>8}"
+    )
+    baseline = None
+    for workers in counts:
+        throughput, p50, p99, errors = run(workers, args, headers)
+        baseline = baseline or throughput
+        print(
+            f"{workers:>7} {throughput:>9.0f} {p50 * 1000:>8.1f} {p99 * 1000:>8.1f} {errors:>7}"
+            f" {throughput / baseline:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Token savings of the compact tool-result encoding.
+
+Run from the backend directory:
+
+    python -m benchmarks.tool_results
+"""
+
+import json
+
+from api.tool_results import DEFAULT_BUDGET, compact_tool_result, estimate_tokens
+
+from .fixtures import make_tool_issue_records
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(text):
+        return len(_encoding.encode(text))
+
+    TOKENIZER = "tiktoken o200k_base"
+except ImportError:
+    count_tokens = estimate_tokens
+    TOKENIZER = "estimate (words + punctuation)"
+
+
+def main():
+    print(f"tokenizer: {TOKENIZER}, budget: {DEFAULT_BUDGET} chars")
+    print(
+        f"{'issues':>6} {'verbose tok':>12} {'compact tok':>12} {'saved':>7}  summarized"
+    )
+    for count in (5, 20, 50, 100, 500):
+        records = make_tool_issue_records(count)
+        payload = {"issues": records, "total": count}
+        verbose = count_tokens(json.dumps(payload))
+        encoded = compact_tool_result(payload)
+        compact = count_tokens(encoded)
+        summarized = json.loads(encoded).get("truncated", False)
+        print(
+            f"{count:>6} {verbose:>12} {compact:>12} {1 - compact / verbose:>7.0%}"
+            f"  {'yes' if summarized else 'no'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Production server settings:
+
+    gunicorn -c gunicorn.conf.py
+
+serves api.wsgi on threaded workers, or with GUNICORN_ASGI=1 api.asgi on
+uvicorn workers (see below).
+
+The master loads Django and the app (including the SDKs requests import
+lazily) before forking, so workers share that memory copy-on-write. Workers
+are recycled after GUNICORN_MAX_REQUESTS requests.
+
+Reloads: HUP re-reads this file and replaces the workers gracefully, but
+keeps the code the master preloaded. To deploy new code without dropping
+connections, send USR2 (starts a new master with new workers), then WINCH and
+QUIT to the old master.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# GUNICORN_ASGI=1 serves api.asgi from an event loop per worker, so async
+# views (the /api/chat/message-async/ turns) keep hundreds of requests in
+# flight without a thread each. Django then runs the sync views of a worker
+# one at a time on a single thread, so use it for a deployment that takes the
+# async chat traffic, and the default threaded workers for everything else
+ASGI = os.getenv("GUNICORN_ASGI", "0") == "1"
+wsgi_app = "api.asgi:application" if ASGI else "api.wsgi:application"
+
+# One process per core; requests mostly wait on Jira and OpenAI, so each
+# worker serves several at once in threads (or coroutines under ASGI)
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = os.getenv(
+    "GUNICORN_WORKER_CLASS", "uvicorn_worker.UvicornWorker" if ASGI else "gthread"
+)
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+preload_app = True
+
+# Recycle workers to bound slow leaks; the jitter keeps them from restarting together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+# Above CHAT_DEADLINE, so a chat turn times out in the app rather than the worker
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Heartbeat files on a RAM disk; a slow disk can make the master kill healthy workers
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+    # Workers share their metrics there too, so a scrape reports all of them
+    # (read by the settings the master preloads)
+    os.environ.setdefault("METRICS_DIR", f"/dev/shm/api-metrics-{os.getpid()}")
+
+# An empty GUNICORN_ACCESS_LOG turns the access log off
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+
+# Collections in the master would touch every object's header and unshare the
+# pages; objects loaded before the fork are frozen instead (see pre_fork)
+gc.disable()
+
+
+def when_ready(server):
+    # Import what requests otherwise load on first use, once, in the master
+    import openai  # noqa: F401
+    from django.urls import get_resolver
+
+    from api import jira_client  # noqa: F401
+
+    # Evaluating url_patterns imports every view module
+    _ = get_resolver().url_patterns
+    server.log.info("Preloaded the URLconf, openai and atlassian")
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from django.db import connections
+
+    gc.enable()
+    # Connections and pools belong to the process that opened them
+    connections.close_all()
+    for connection in connections.all():
+        if hasattr(connection, "close_pool"):
+            connection.close_pool()
+
+    from django.conf import settings
+
+    from api import metrics
+
+    if settings.METRICS_DIR:
+        metrics.start_flusher(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+
+
+def child_exit(server, worker):
+    from django.conf import settings
+
+    from api import metrics
+
+    # Series of a worker end with it
+    if settings.METRICS_DIR:
+        metrics.remove_snapshot(settings.METRICS_DIR, worker.pid)